@@ -2,12 +2,14 @@
 import asyncio
 
 from datetime import datetime, timedelta
+from typing import List
 
 import discord
 from discord.ext.commands import Bot, Context
 from discord.ext.commands.errors import CommandError, CommandInvokeError
-from src.db.database import connect
-from src.roles import has_role, TEST_BOT
+from src.db.database import connect, WriteConflict
+from src.emoji import forget_emojis
+from src.roles import forget_roles, has_role, TEST_BOT
 
 import logging
 from logging import handlers
@@ -47,6 +49,7 @@ import src.ai.temporary_dronification as temporary_dronification
 import src.webhook as webhook
 # Utils
 from src.bot_utils import COMMAND_PREFIX
+from src.listeners import ListenerTable
 from src.log import log, LogContext
 
 # Database
@@ -108,8 +111,8 @@ bot.add_cog(temporary_dronification_cog)
 bot.add_cog(timers_cog)
 bot.add_cog(trusted_user_cog)
 
-# Register message listeners.
-message_listeners = [
+# Register message listeners, in the order that they are called.
+message_listeners = ListenerTable([
     join.check_for_consent,
     assign.check_for_assignment_message,
     stoplights.check_for_stoplights,
@@ -127,13 +130,13 @@ message_listeners = [
     respond.respond_to_question,
     storage.store_drone,
     temporary_dronification_cog.temporary_dronification_response
-]
+])
 
 # Register message listeners that take messages sent by bots
-bot_message_listeners = []
+bot_message_listeners = ListenerTable([])
 
 # Register message listeners that need to be run on DMs
-direct_message_listeners = [trusted_user_cog.trusted_user_response]
+direct_message_listeners = ListenerTable([trusted_user_cog.trusted_user_response])
 
 # Cogs that do not use tasks.
 bot.add_cog(add_voice.AddVoiceCog(bot))
@@ -157,7 +160,7 @@ hour_tasks = [
     orders_reporting_cog.deactivate_drones_with_completed_orders,
     storage_cog.report_storage,
     trusted_user_cog.clean_trusted_user_requests]
-timing_agnostic_tasks = [status_message_cog.change_status]
+timing_agnostic_tasks = [battery_cog.flush_battery_drain, status_message_cog.change_status]
 
 # Configure error handling for tasks.
 for task in minute_tasks + hour_tasks + timing_agnostic_tasks:
@@ -277,7 +280,7 @@ async def on_message(message: discord.Message):
         else:
             listeners = bot_message_listeners if message.author.bot else message_listeners
 
-        for listener in listeners:
+        async for listener in listeners.dispatch(message):
             with LogContext(listener.__name__):
                 try:
                     if await listener(message, message_copy):
@@ -334,6 +337,8 @@ async def on_ready():
     await maintenance.sync_drones(bot.guilds[0].members)
     log.info("Trimming trusted users not in the guild anymore.")
     await maintenance.trusted_user_cleanup(bot.guilds[0].members)
+    log.info("Loading drone IDs.")
+    await maintenance.load_drone_ids()
 
     log.info("Starting timing agnostic tasks.")
     for task in timing_agnostic_tasks:
@@ -375,7 +380,10 @@ async def on_ready():
 @bot.event
 async def on_command_error(context, error):
     with LogContext('Error from ' + context.command.cog_name + '.' + context.command.name + '()'):
-        if isinstance(error, CommandError) and not isinstance(error, CommandInvokeError):
+        if isinstance(error, CommandInvokeError) and isinstance(error.original, WriteConflict):
+            # Someone else changed the same records while the command ran, so its changes were rolled back.
+            await report_error(context, str(error.original))
+        elif isinstance(error, CommandError) and not isinstance(error, CommandInvokeError):
             # Errors deriving from Command error should be reported to the user, except CommandInvokeError.
             await report_error(context, str(error) if str(error) else type(error).__name__)
         else:
@@ -396,6 +404,31 @@ async def on_reaction_add(reaction: discord.Reaction, user: discord.User):
     await react.delete_marked_message(reaction, user)
 
 
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    forget_roles(role.guild)
+
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    forget_roles(after.guild)
+
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    forget_roles(role.guild)
+
+
+@bot.event
+async def on_guild_emojis_update(guild: discord.Guild, before: List[discord.Emoji], after: List[discord.Emoji]):
+    forget_emojis(guild)
+
+
+@bot.event
+async def on_webhooks_update(channel: discord.abc.GuildChannel):
+    await webhook.refresh_webhooks(channel)
+
+
 @connect()
 async def prepare_database():
     database.prepare()
@@ -406,6 +439,9 @@ def main():
     asyncio.run(prepare_database())
     bot.run(sys.argv[1])
 
+    # Write any battery drain still held in memory.
+    asyncio.run(battery.battery_ledger.flush())
+
 
 if __name__ == "__main__":
     main()
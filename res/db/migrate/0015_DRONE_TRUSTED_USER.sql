@@ -0,0 +1,22 @@
+-- Move trusted users out of the pipe-separated drone.trusted_users column and into their own table.
+CREATE TABLE drone_trusted_user (
+    discord_id UNSIGNED INT NOT NULL,
+    trusted_user_id UNSIGNED INT NOT NULL,
+    PRIMARY KEY (discord_id, trusted_user_id),
+    FOREIGN KEY (discord_id) REFERENCES drone(discord_id) ON DELETE CASCADE
+);
+
+-- Allow a user to be removed from every drone at once.
+CREATE INDEX drone_trusted_user_trusted_user_id ON drone_trusted_user (trusted_user_id, discord_id);
+
+-- Split each drone's list of trusted users into rows.
+INSERT OR IGNORE INTO drone_trusted_user
+    WITH RECURSIVE split(discord_id, trusted_user_id, rest) AS (
+        SELECT discord_id, '', trusted_users || '|' FROM drone WHERE trusted_users IS NOT NULL
+        UNION ALL
+        SELECT discord_id, substr(rest, 1, instr(rest, '|') - 1), substr(rest, instr(rest, '|') + 1) FROM split WHERE rest <> ''
+    )
+    SELECT discord_id, CAST(trusted_user_id AS INTEGER) FROM split WHERE trusted_user_id <> '';
+
+-- The old column cannot be dropped on older versions of SQLite, so empty it instead.
+UPDATE drone SET trusted_users = '';
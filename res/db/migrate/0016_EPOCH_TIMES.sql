@@ -0,0 +1,12 @@
+-- Store the times that the bot sweeps for as integer seconds since the Unix epoch, so that they can be compared with an index.
+-- The old values are local times stored as text, which the 'utc' modifier converts to UTC.
+UPDATE timer SET end_time = CAST(strftime('%s', end_time, 'utc') AS INTEGER) WHERE typeof(end_time) = 'text';
+UPDATE storage SET release_time = CAST(strftime('%s', release_time, 'utc') AS INTEGER) WHERE typeof(release_time) = 'text';
+UPDATE drone_order SET finish_time = CAST(strftime('%s', finish_time, 'utc') AS INTEGER) WHERE typeof(finish_time) = 'text';
+UPDATE drone SET temporary_until = CAST(strftime('%s', temporary_until, 'utc') AS INTEGER) WHERE typeof(temporary_until) = 'text';
+
+-- Find elapsed timers, storage, orders and temporary dronifications without scanning their tables.
+CREATE INDEX timer_end_time ON timer (end_time);
+CREATE INDEX storage_release_time ON storage (release_time);
+CREATE INDEX drone_order_finish_time ON drone_order (finish_time);
+CREATE INDEX drone_temporary_until ON drone (temporary_until);
@@ -0,0 +1,8 @@
+-- Index the columns that are looked up regardless of case, so that a COLLATE NOCASE comparison does not scan the table.
+CREATE INDEX battery_types_name_nocase ON battery_types (name COLLATE NOCASE);
+CREATE INDEX forbidden_word_id_nocase ON forbidden_word (id COLLATE NOCASE);
+
+-- Index the columns that a drone's storage, order and timer are joined on when the drone is loaded.
+CREATE INDEX storage_target_id ON storage (target_id);
+CREATE INDEX drone_order_discord_id ON drone_order (discord_id);
+CREATE INDEX timer_discord_id ON timer (discord_id);
@@ -2,9 +2,8 @@ from datetime import datetime, timedelta, timezone
 
 import discord
 from discord.ext.commands import Cog
-from discord.utils import get
 
-from src.roles import VOICE, has_role
+from src.roles import VOICE, get_role, has_role
 from src.bot_utils import command, COMMAND_PREFIX, dm_only
 from src.log import log
 
@@ -43,6 +42,6 @@ async def add_voice(context, guild: discord.Guild):
         await context.channel.send(ACCESS_ALREADY_GRANTED)
         return
 
-    await member.add_roles(get(guild.roles, name=VOICE))
+    await member.add_roles(get_role(guild, VOICE))
     await context.channel.send(ACCESS_GRANTED)
     log.info('Added voice role to ' + member.name)
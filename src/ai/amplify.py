@@ -35,8 +35,6 @@ class AmplificationCog(Cog):
 
         log.info('Amplifying message "' + message + '" via ' + str(len(members)) + ' drones in #' + target_channel.name)
 
-        channel_webhook = await webhook.get_webhook_for_channel(target_channel)
-
         for member in members:
 
             if member.drone is None:
@@ -47,5 +45,5 @@ class AmplificationCog(Cog):
             await webhook.proxy_message_by_webhook(message_content=formatted_message,
                                                    message_username=member.display_name,
                                                    message_avatar=member.avatar_url(target_channel),
-                                                   webhook=channel_webhook)
+                                                   webhook=await webhook.get_webhook_for_channel(target_channel))
         return True
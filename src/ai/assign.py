@@ -3,7 +3,6 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 
 import discord
-from discord.utils import get
 
 import src.messages as messages
 import src.roles as roles
@@ -11,6 +10,7 @@ from src.channels import ASSIGNMENT_CHANNEL
 from src.db.drone_dao import get_used_drone_ids
 from src.db.data_objects import Drone
 from src.bot_utils import get_id
+from src.listeners import listens
 from src.log import log
 from src.db.data_objects import BatteryType
 
@@ -26,6 +26,7 @@ def roll_id() -> str:
     return f'{id:04}'
 
 
+@listens(channels=[ASSIGNMENT_CHANNEL])
 async def check_for_assignment_message(message: discord.Message, message_copy=None):
 
     if message.channel.name != ASSIGNMENT_CHANNEL:
@@ -51,8 +52,8 @@ async def create_drone(guild: discord.Guild,
                        feedback_channel: discord.TextChannel,
                        additional_trusted_users: Optional[List[str]] = None,
                        temporary_until: Optional[datetime] = None):
-    associate_role = get(guild.roles, name=roles.ASSOCIATE)
-    drone_role = get(guild.roles, name=roles.DRONE)
+    associate_role = roles.get_role(guild, roles.ASSOCIATE)
+    drone_role = roles.get_role(guild, roles.DRONE)
     is_hive_mxtress = roles.has_role(target, roles.HIVE_MXTRESS)
     associate_name = target.display_name
 
@@ -2,21 +2,124 @@ import re
 from copy import deepcopy
 from typing import Dict, List
 from src.ai.data_objects import MessageCopy
-from src.db.database import connect
+from src.db.database import acquire_write_access, change, connect
+from src.db.record import BATCH_SIZE, forget
 
 from discord import Emoji, Guild, Message
 from discord.ext import commands, tasks
 from discord.ext.commands import command, Greedy, UserInputError
-from discord.utils import get
 
 import src.emoji as emoji
 import src.webhook as webhook
+from src.listeners import listens
 from src.log import log
-from src.roles import BATTERY_DRAINED, BATTERY_POWERED, has_role
+from src.roles import BATTERY_DRAINED, BATTERY_POWERED, get_role, has_role
 from src.bot_utils import COMMAND_PREFIX, hive_mxtress_only
 from src.drone_member import DroneMember
 from src.db.data_objects import BatteryType, Drone
 
+BATTERY_FLUSH_MINUTES = 5
+'''
+How often drained battery minutes are written to the database.
+'''
+
+
+class BatteryLedger:
+    '''
+    Battery drain that has not been written to the database yet, in minutes, keyed by drone ID.
+
+    Draining a battery only adds to the ledger. flush() then writes all the pending drain at once,
+    every BATTERY_FLUSH_MINUTES and on shutdown.
+    Use minutes_remaining() to read a drone's battery with the pending drain taken off.
+    '''
+
+    def __init__(self) -> None:
+        self.pending: Dict[str, int] = {}
+        self.flushing: Dict[str, int] = {}
+        '''
+        The drain that is being written by flush() but has not been committed yet, which is still counted in `pending`.
+        '''
+
+    def drain(self, drone_id: str, minutes: int = 1) -> None:
+        '''
+        Record that a drone has used some battery.
+        '''
+
+        self.pending[drone_id] = self.pending.get(drone_id, 0) + minutes
+
+    def discard(self, drone_id: str) -> None:
+        '''
+        Forget a drone's pending drain, including any that is being written, e.g. because its battery has been refilled.
+        '''
+
+        self.pending.pop(drone_id, None)
+        self.flushing.pop(drone_id, None)
+
+    def minutes_remaining(self, drone: Drone) -> int:
+        '''
+        Get the drone's remaining battery minutes, including drain that has not been written yet.
+        '''
+
+        return max(0, drone.battery_minutes - self.pending.get(drone.drone_id, 0))
+
+    async def flush(self) -> None:
+        '''
+        Write all pending drain to the database.
+
+        The drain is only taken off `pending` once it has been committed, so none is lost if writing fails.
+        '''
+
+        try:
+            await self.write_pending()
+
+            # Take off only what was written, in case more drain was added in the meantime.
+            # Drain that was discarded while it was being written is no longer in `flushing`.
+            for drone_id, minutes in self.flushing.items():
+                self.pending[drone_id] = self.pending.get(drone_id, 0) - minutes
+
+                if self.pending[drone_id] <= 0:
+                    del self.pending[drone_id]
+        finally:
+            self.flushing = {}
+
+    @connect()
+    async def write_pending(self) -> None:
+        '''
+        Write the pending drain, keeping what is written in `flushing`.
+
+        Drones that have drained by the same amount are updated together, BATCH_SIZE drones per statement.
+        '''
+
+        if len(self.pending) == 0:
+            return
+
+        # Take the write lock before reading the ledger, so that no other writer, e.g. energize,
+        # can commit a new battery level between the drain being read and being written.
+        await acquire_write_access()
+
+        self.flushing = dict(self.pending)
+        drone_ids_by_minutes: Dict[int, List[str]] = {}
+
+        for drone_id, minutes in self.flushing.items():
+            drone_ids_by_minutes.setdefault(minutes, []).append(drone_id)
+
+        for minutes, drone_ids in drone_ids_by_minutes.items():
+            log.info(f"Writing {minutes} minutes of battery drain for {len(drone_ids)} drones.")
+
+            for start in range(0, len(drone_ids), BATCH_SIZE):
+                batch = drone_ids[start:start + BATCH_SIZE]
+                placeholders = ', '.join('?' * len(batch))
+                await change(f'UPDATE drone SET battery_minutes = max(0, battery_minutes - ?) WHERE drone_id IN ({placeholders})', [minutes] + batch)
+
+        for drone_id in self.flushing:
+            forget('drone', 'drone_id', drone_id)
+
+
+battery_ledger = BatteryLedger()
+'''
+The pending battery drain of all drones.
+'''
+
 
 class BatteryCog(commands.Cog):
 
@@ -67,6 +170,7 @@ class BatteryCog(commands.Cog):
                 continue
 
             member.drone.battery_minutes = member.drone.battery_type.capacity
+            battery_ledger.discard(member.drone.drone_id)
             await member.drone.save()
 
             channel_webhook = await webhook.get_webhook_for_channel(context.message.channel)
@@ -108,13 +212,14 @@ class BatteryCog(commands.Cog):
                                                    message_avatar=member.avatar_url(context.message.channel),
                                                    webhook=channel_webhook)
 
+    @listens(flags=['is_battery_powered'])
     async def start_battery_drain(self, message, message_copy=None):
         '''
         If message author has battery DroneOS config enabled, begin or restart
         tracking them for 15 minutes worth of battery drain per message sent.
         '''
 
-        member = await DroneMember.create(message.author)
+        member = await DroneMember.create(message.author, with_relations=False)
 
         if not member.drone or not member.drone.is_battery_powered:
             return False
@@ -122,7 +227,6 @@ class BatteryCog(commands.Cog):
         self.draining_batteries[member.drone.drone_id] = 15
 
     @tasks.loop(minutes=1)
-    @connect()
     async def track_active_battery_drain(self):
         log.info("Draining battery from active drones.")
 
@@ -142,9 +246,7 @@ class BatteryCog(commands.Cog):
             else:
                 log.info(f"Draining 1 minute worth of charge from {drone}")
                 draining_batteries[drone] = remaining_minutes - 1
-                drone = await Drone.load(drone_id=drone)
-                drone.battery_minutes = max(0, drone.battery_minutes - 1)
-                await drone.save()
+                battery_ledger.drain(drone)
 
         for inactive_drone in inactive_drones:
             log.info(f"Removing {inactive_drone} from drain list.")
@@ -152,6 +254,10 @@ class BatteryCog(commands.Cog):
 
         self.draining_batteries = draining_batteries
 
+    @tasks.loop(minutes=BATTERY_FLUSH_MINUTES)
+    async def flush_battery_drain(self):
+        await battery_ledger.flush()
+
     @tasks.loop(minutes=1)
     @connect()
     async def track_drained_batteries(self):
@@ -169,12 +275,14 @@ class BatteryCog(commands.Cog):
                 log.warn(f"Drone {drone.drone_id} not found in server but present in database.")
                 continue
 
-            if drone.battery_minutes <= 0 and has_role(member_drone, BATTERY_POWERED):
+            battery_minutes = battery_ledger.minutes_remaining(drone)
+
+            if battery_minutes <= 0 and has_role(member_drone, BATTERY_POWERED):
                 log.debug(f"Drone {drone.drone_id} is out of battery. Adding drained role.")
-                await member_drone.add_roles(get(self.bot.guilds[0].roles, name=BATTERY_DRAINED))
-            elif drone.battery_minutes > 0 and has_role(member_drone, BATTERY_DRAINED):
+                await member_drone.add_roles(get_role(self.bot.guilds[0], BATTERY_DRAINED))
+            elif battery_minutes > 0 and has_role(member_drone, BATTERY_DRAINED):
                 log.debug(f"Drone {drone.drone_id} has been recharged. Removing drained role.")
-                await member_drone.remove_roles(get(self.bot.guilds[0].roles, name=BATTERY_DRAINED))
+                await member_drone.remove_roles(get_role(self.bot.guilds[0], BATTERY_DRAINED))
 
     @tasks.loop(minutes=1)
     @connect()
@@ -212,6 +320,7 @@ class BatteryCog(commands.Cog):
                         continue
 
 
+@listens(flags=['is_battery_powered'])
 async def add_battery_indicator_to_copy(message: Message, message_copy: MessageCopy):
     '''
     Prepends battery indicator emoji to a MessageCopy if the drone
@@ -251,13 +360,13 @@ def determine_battery_emoji(battery_percentage: int, guild: Guild) -> Emoji | st
     '''
 
     if battery_percentage <= 100 and battery_percentage >= 75:
-        return get(guild.emojis, name=emoji.BATTERY_FULL)
+        return emoji.get_emoji(guild, emoji.BATTERY_FULL)
     elif battery_percentage <= 75 and battery_percentage >= 25:
-        return get(guild.emojis, name=emoji.BATTERY_MID)
+        return emoji.get_emoji(guild, emoji.BATTERY_MID)
     elif battery_percentage <= 24 and battery_percentage >= 10:
-        return get(guild.emojis, name=emoji.BATTERY_LOW)
+        return emoji.get_emoji(guild, emoji.BATTERY_LOW)
     elif battery_percentage <= 9:
-        return get(guild.emojis, name=emoji.BATTERY_EMPTY)
+        return emoji.get_emoji(guild, emoji.BATTERY_EMPTY)
     else:
         return "[BATTERY ERROR]"
 
@@ -267,5 +376,8 @@ async def recharge_battery(drone: Drone) -> None:
     Adds one hour of charge to the drone's battery.
     '''
 
-    drone.battery_minutes = min(drone.battery_type.capacity, drone.battery_minutes + drone.battery_type.recharge_rate)
+    # Recharge from what is left after the pending drain, which is then written along with it.
+    minutes_remaining = battery_ledger.minutes_remaining(drone)
+    drone.battery_minutes = min(drone.battery_type.capacity, minutes_remaining + drone.battery_type.recharge_rate)
+    battery_ledger.discard(drone.drone_id)
     await drone.save()
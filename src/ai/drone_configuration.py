@@ -7,9 +7,10 @@ import discord
 from discord.ext.commands import Cog, Context, Greedy, guild_only, UserInputError
 
 import src.webhook as webhook
+from src.ai.battery import battery_ledger
 from src.ai.commands import NamedParameterConverter
 from src.ai.storage import release
-from src.bot_utils import channels_only, command, COMMAND_PREFIX, dm_only, fetch, hive_mxtress_only, moderator_only
+from src.bot_utils import channels_only, command, COMMAND_PREFIX, dm_only, hive_mxtress_only, moderator_only
 from src.channels import OFFICE
 from src.db.data_objects import Timer
 from src.db.drone_dao import delete_timers_by_id_and_mode
@@ -17,7 +18,7 @@ from src.resources import BRIEF_DRONE_OS
 from src.roles import (ADMIN, ASSOCIATE, BATTERY_DRAINED, BATTERY_POWERED,
                        DRONE, FREE_STORAGE, GLITCHED, ID_PREPENDING,
                        IDENTITY_ENFORCEMENT, SPEECH_OPTIMIZATION, STORED,
-                       THIRD_PERSON_ENFORCEMENT, has_role)
+                       THIRD_PERSON_ENFORCEMENT, fetch_role, has_role)
 from src.log import log
 from src.drone_member import DroneMember
 from src.db.data_objects import Drone
@@ -75,7 +76,7 @@ class DroneConfigurationCog(Cog):
         await toggle_parameter(context,
                                members,
                                "id_prepending",
-                               fetch(context.guild.roles, name=ID_PREPENDING),
+                               fetch_role(context.guild, ID_PREPENDING),
                                lambda: "ID prepending is now mandatory.",
                                lambda minutes: f"ID prepending is now mandatory for {minutes} minute(s).",
                                lambda: "Prepending? More like POST pending now that that's over! Haha!" if random.randint(1, 100) == 66 else "ID prependment policy relaxed.",
@@ -90,7 +91,7 @@ class DroneConfigurationCog(Cog):
         await toggle_parameter(context,
                                members,
                                "optimized",
-                               fetch(context.guild.roles, name=SPEECH_OPTIMIZATION),
+                               fetch_role(context.guild, SPEECH_OPTIMIZATION),
                                lambda: "Speech optimization is now active.",
                                lambda minutes: f"Speech optimization is now active for {minutes} minute(s).",
                                lambda: "Speech optimization disengaged.",
@@ -120,7 +121,7 @@ class DroneConfigurationCog(Cog):
                 context,
                 permitted_members,
                 "identity_enforcement",
-                fetch(context.guild.roles, name=IDENTITY_ENFORCEMENT),
+                fetch_role(context.guild, IDENTITY_ENFORCEMENT),
                 lambda: "Identity enforcement is now active.",
                 lambda minutes: f"Identity enforcement is now active for {minutes} minute(s).",
                 lambda: "Identity enforcement disengaged.",
@@ -137,7 +138,7 @@ class DroneConfigurationCog(Cog):
         await toggle_parameter(context,
                                drones,
                                'third_person_enforcement',
-                               fetch(context.guild.roles, name=THIRD_PERSON_ENFORCEMENT),
+                               fetch_role(context.guild, THIRD_PERSON_ENFORCEMENT),
                                lambda: "Third person enforcement is now active.",
                                lambda minutes: f"Third Person enforcement is now active for {minutes} minute(s).",
                                lambda: "Third person enforcement disengaged.",
@@ -152,7 +153,7 @@ class DroneConfigurationCog(Cog):
         await toggle_parameter(context,
                                drones,
                                "glitched",
-                               fetch(context.guild.roles, name=GLITCHED),
+                               fetch_role(context.guild, GLITCHED),
                                lambda: "Uh.. it’s probably not a problem.. probably.. but I’m showing a small discrepancy in... well, no, it’s well within acceptable bounds again. Sustaining sequence." if random.randint(1, 100) == 66 else "Drone corruption at un̘͟s̴a̯f̺e͈͡ levels.",
                                lambda minutes: f"Drone corruption scheduled to reflect un̘͟s̴a̯f̺e͈͡ levels for {minutes} minute(s).",
                                lambda: "Drone corruption at acceptable levels.",
@@ -167,7 +168,7 @@ class DroneConfigurationCog(Cog):
         await toggle_parameter(context,
                                members,
                                "is_battery_powered",
-                               fetch(context.guild.roles, name=BATTERY_POWERED),
+                               fetch_role(context.guild, BATTERY_POWERED),
                                lambda: "Drone disconnected from HexCorp power grid. Auxiliary power active.",
                                lambda minutes: f"Drone disconnected from HexCorp power grid for {minutes} minutes.",
                                lambda: "Drone reconnected to HexCorp power grid.",
@@ -179,8 +180,9 @@ class DroneConfigurationCog(Cog):
                 continue
 
             member.drone.battery_minutes = member.drone.battery_type.capacity
+            battery_ledger.discard(member.drone.drone_id)
             await member.drone.save()
-            await member.remove_roles(fetch(context.guild.roles, name=BATTERY_DRAINED))
+            await member.remove_roles(fetch_role(context.guild, BATTERY_DRAINED))
 
 
 async def rename_drone(context, old_id: str, new_id: str):
@@ -213,8 +215,8 @@ async def unassign_drone(target: DroneMember):
         raise UserInputError("You are not a drone. Can not unassign.")
 
     await target.edit(nick=target.drone.associate_name)
-    await target.remove_roles(fetch(guild.roles, name=DRONE), fetch(guild.roles, name=STORED), fetch(guild.roles, name=SPEECH_OPTIMIZATION), fetch(guild.roles, name=GLITCHED), fetch(guild.roles, name=ID_PREPENDING), fetch(guild.roles, name=IDENTITY_ENFORCEMENT), fetch(guild.roles, name=BATTERY_POWERED), fetch(guild.roles, name=BATTERY_DRAINED))
-    await target.add_roles(fetch(guild.roles, name=ASSOCIATE))
+    await target.remove_roles(fetch_role(guild, DRONE), fetch_role(guild, STORED), fetch_role(guild, SPEECH_OPTIMIZATION), fetch_role(guild, GLITCHED), fetch_role(guild, ID_PREPENDING), fetch_role(guild, IDENTITY_ENFORCEMENT), fetch_role(guild, BATTERY_POWERED), fetch_role(guild, BATTERY_DRAINED))
+    await target.add_roles(fetch_role(guild, ASSOCIATE))
 
     # remove from DB
     await target.drone.delete()
@@ -243,7 +245,7 @@ async def emergency_release(context, drone_member: DroneMember):
     drone_member.drone.can_self_configure = True
     await drone_member.drone.save()
 
-    await drone_member.remove_roles(fetch(context.guild.roles, name=SPEECH_OPTIMIZATION), fetch(context.guild.roles, name=GLITCHED), fetch(context.guild.roles, name=ID_PREPENDING), fetch(context.guild.roles, name=IDENTITY_ENFORCEMENT), fetch(context.guild.roles, name=BATTERY_POWERED), fetch(context.guild.roles, name=BATTERY_DRAINED))
+    await drone_member.remove_roles(fetch_role(context.guild, SPEECH_OPTIMIZATION), fetch_role(context.guild, GLITCHED), fetch_role(context.guild, ID_PREPENDING), fetch_role(context.guild, IDENTITY_ENFORCEMENT), fetch_role(context.guild, BATTERY_POWERED), fetch_role(context.guild, BATTERY_DRAINED))
     await drone_member.update_display_name()
 
     await context.channel.send(f"Restrictions disabled for drone {drone_member.drone.drone_id}.")
@@ -258,8 +260,6 @@ async def toggle_parameter(context,
                            toggle_on_timed_message: Callable[[int], str],
                            toggle_off_message: Callable[[], str],
                            minutes: Optional[int] = 0):
-    channel_webhook = await webhook.get_webhook_for_channel(context.channel)
-
     for member in members:
         if member.drone is None:
             continue
@@ -309,13 +309,13 @@ async def toggle_parameter(context,
         await webhook.proxy_message_by_webhook(message_content=f'{member.drone.drone_id} :: {message}',
                                                message_username=member.display_name,
                                                message_avatar=member.avatar_url(context.channel),
-                                               webhook=channel_webhook)
+                                               webhook=await webhook.get_webhook_for_channel(context.channel))
 
 
 async def set_can_self_configure(member: DroneMember):
     if not member.drone.is_configured():
         member.drone.can_self_configure = True
-        member.drone.save()
+        await member.drone.save()
 
 
 async def toggle_free_storage(target: DroneMember):
@@ -329,12 +329,12 @@ async def toggle_free_storage(target: DroneMember):
     if drone.free_storage:
         drone.free_storage = False
         await drone.save()
-        await target.remove_roles(fetch(guild.roles, name=FREE_STORAGE))
+        await target.remove_roles(fetch_role(guild, FREE_STORAGE))
         await target.send("Free storage disabled. You can now only be stored by trusted users or the Hive Mxtress.")
         log.info('Free storage disabled')
     else:
         drone.free_storage = True
         await drone.save()
-        await target.add_roles(fetch(guild.roles, name=FREE_STORAGE))
+        await target.add_roles(fetch_role(guild, FREE_STORAGE))
         await target.send("Free storage enabled. You can now be stored by anyone.")
         log.info('Free storage enabled')
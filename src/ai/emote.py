@@ -1,10 +1,11 @@
 import re
+from typing import Dict, Tuple
 
 import discord
 from discord.ext.commands import Cog, command, guild_only, UserInputError
-from discord.utils import get
 
 from src.channels import DRONE_HIVE_CHANNELS
+from src.emoji import emoji_index
 from src.bot_utils import COMMAND_PREFIX
 from src.log import log
 
@@ -13,6 +14,26 @@ valid_characters = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l',
 exceptional_characters = {' ': 'blank', '/': 'hex_slash', '.': 'hex_dot',
                           '?': 'hex_questionmark', '!': 'hex_exclamationmark', ',': 'hex_comma', '0': 'hex_o'}
 
+big_text_emoji_names = {
+    **{character: f'hex_{character}' for character in valid_characters},
+    **exceptional_characters,
+    '::': 'hex_dc',
+}
+'''
+The name of the emoji for each character, or pair of colons, that big text can show.
+'''
+
+big_text_tables: Dict[int, Tuple[Dict[str, discord.Emoji], Dict[str, str]]] = {}
+'''
+The text of the emoji for each character that big text can show in each guild, keyed by guild ID,
+along with the emoji index they were built from.
+'''
+
+big_text_token = re.compile('::|.', re.DOTALL)
+'''
+Splits a sentence into the characters and pairs of colons that big text shows.
+'''
+
 
 class EmoteCog(Cog):
 
@@ -48,31 +69,30 @@ def clean_sentence(sentence):
     return re.sub(r'<:(.*?):\d{18}>', '', sentence).lower()
 
 
-def generate_big_text(channel: discord.TextChannel, sentence):
-    '''
-    Replace text with matching emojis.
+def big_text_table(guild: discord.Guild) -> Dict[str, str]:
     '''
+    Get the text of the emoji for each character that big text can show in the guild.
 
-    sentence = clean_sentence(sentence)
+    The table is built again whenever the guild's emojis change.
+    '''
 
-    reply = ""
+    index = emoji_index(guild)
+    built_from, table = big_text_tables.get(guild.id, (None, None))
 
-    colon_before = False
+    if built_from is not index:
+        table = {character: str(index[name]) for character, name in big_text_emoji_names.items() if name in index}
+        big_text_tables[guild.id] = (index, table)
 
-    for character in sentence:
+    return table
 
-        emoji_name = None
 
-        if character in valid_characters:
-            emoji_name = f"hex_{character}"
-        elif character in exceptional_characters:
-            emoji_name = f"{exceptional_characters[character]}"
-        elif character == ':' and colon_before:
-            emoji_name = "hex_dc"
+def generate_big_text(channel: discord.TextChannel, sentence):
+    '''
+    Replace text with matching emojis.
 
-        colon_before = character == ":" and not colon_before
+    Each pair of colons becomes a single emoji, and characters without an emoji are left out.
+    '''
 
-        if emoji_name is not None and (emoji := get(channel.guild.emojis, name=emoji_name)) is not None:
-            reply += str(emoji)
+    table = big_text_table(channel.guild)
 
-    return reply
+    return ''.join(table.get(token, '') for token in big_text_token.findall(clean_sentence(sentence)))
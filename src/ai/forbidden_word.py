@@ -2,24 +2,25 @@ import re
 
 import discord
 from discord.ext.commands import Cog, command, Context
-from discord.utils import get
 
 from src.bot_utils import channels_only, COMMAND_PREFIX, hive_mxtress_only
 from src.channels import OFFICE
 from src.db.data_objects import ForbiddenWord
-from src.emoji import DRONE_EMOJI
+from src.emoji import DRONE_EMOJI, get_emoji
+from src.listeners import listens
 from src.log import log
 from src.drone_member import DroneMember
 
 
+@listens(drone=True)
 async def deny_thoughts(message: discord.Message, message_copy):
 
-    member = await DroneMember.create(message.author)
+    member = await DroneMember.create(message.author, with_relations=False)
 
     if not member.drone:  # Associates are allowed to think.
         return
 
-    emoji_replacement = get(message.guild.emojis, name=DRONE_EMOJI)
+    emoji_replacement = get_emoji(message.guild, DRONE_EMOJI)
     original_content = message_copy.content
 
     for banned_word in await ForbiddenWord.all():
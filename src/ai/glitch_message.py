@@ -10,6 +10,7 @@ from PIL import Image
 
 from src.ai.data_objects import MessageCopy
 from src.channels import HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY
+from src.listeners import listens
 from src.log import log
 from src.drone_member import DroneMember
 
@@ -118,6 +119,7 @@ async def glitch_images(attachments: List[discord.Attachment], glitch_amount=45)
     return processed_attachments
 
 
+@listens(excluded_categories=[HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY], flags=['glitched', 'is_battery_powered'])
 async def glitch_if_applicable(message: discord.Message, message_copy: MessageCopy):
     # No glitching in the moderation channels
     if message.channel.category.name in [HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY]:
@@ -2,12 +2,14 @@ import discord
 
 from src.bot_utils import COMMAND_PREFIX
 from src.channels import HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY
+from src.listeners import listens
 from src.log import log
 from src.drone_member import DroneMember
 
 
+@listens(excluded_categories=[HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY], flags=['id_prepending'])
 async def check_if_prepending_necessary(message: discord.Message, message_copy=None):
-    member = await DroneMember.create(message.author)
+    member = await DroneMember.create(message.author, with_relations=False)
 
     if member.drone and member.drone.id_prepending and message.channel.category.name not in [HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY]:
         if message.content.startswith(f"{member.drone.drone_id} :: ") or message.content.startswith(COMMAND_PREFIX):
@@ -1,15 +1,19 @@
 import discord
 
 from src.ai.data_objects import MessageCopy
+from src.channels import HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY
 from src.db.data_objects import Drone
+from src.listeners import listens
 
 
+# Identity is enforced in the hive channels even if the drone's flag is off, see Drone.enforcable_channel().
+@listens(excluded_categories=[HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY], drone=True)
 async def enforce_identity(message: discord.Message, message_copy: MessageCopy):
     '''
     Message listener for activating identity enforcement.
     '''
 
-    drone = await Drone.find(discord_id=message.author.id)
+    drone = await Drone.find(discord_id=message.author.id, with_relations=False)
 
     if drone and drone.identity_enforcable(message.channel):
         message_copy.identity_enforced = True
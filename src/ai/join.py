@@ -4,6 +4,7 @@ from discord.utils import get
 import src.messages as messages
 import src.roles as roles
 from src.channels import CONSENT_CHANNEL, REGISTRY_CHANNEL
+from src.listeners import listens
 
 CONSENT_SUCCESS = [
     'Welcome to HexCorp. Have a mindless day!',
@@ -22,10 +23,11 @@ CONSENT_REJECT = 'Invalid request. Please try again.'
 
 async def on_member_join(member: discord.Member):
     '''On join, Give initiate role'''
-    initiate_role = get(member.guild.roles, name=roles.INITIATE)
+    initiate_role = roles.get_role(member.guild, roles.INITIATE)
     await member.add_roles(initiate_role)
 
 
+@listens(channels=[CONSENT_CHANNEL])
 async def check_for_consent(message: discord.Message, message_copy=None):
     '''On consent message, remove initiate role and give associate'''
 
@@ -33,8 +35,8 @@ async def check_for_consent(message: discord.Message, message_copy=None):
         return False
 
     if message.content == CONSENT_MESSAGE:
-        initiate_role = get(message.guild.roles, name=roles.INITIATE)
-        associate_role = get(message.guild.roles, name=roles.ASSOCIATE)
+        initiate_role = roles.get_role(message.guild, roles.INITIATE)
+        associate_role = roles.get_role(message.guild, roles.ASSOCIATE)
 
         await message.author.remove_roles(initiate_role)
         await message.author.add_roles(associate_role)
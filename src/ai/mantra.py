@@ -3,9 +3,11 @@ from typing import Dict
 
 import discord
 
+from src.ai.battery import battery_ledger
 from src.ai.speech_optimization import status_code_regex
 from src.channels import REPETITIONS
 from src.drone_member import DroneMember
+from src.listeners import listens
 
 mantra_counters: Dict[str, int] = {}
 '''
@@ -13,6 +15,7 @@ Maps drone IDs to the current mantra repetition step that drone is at.
 '''
 
 
+@listens(channels=[REPETITIONS], flags=['is_battery_powered'], content=status_code_regex)
 async def check_for_mantra(message: discord.Message, message_copy=None):
     '''
     Checks if a message should be counted for mantra repetition.
@@ -44,7 +47,7 @@ async def handle_mantra(member: DroneMember, message: discord.Message, code_matc
         mantra_counters[drone_id] = 3
     elif mantra_counters[drone_id] == 3 and code_match.group(3) == "304":
         mantra_counters[drone_id] = 0
-        await increase_battery_by_five_percent(message)
+        await increase_battery_by_five_percent(member, message)
 
 
 async def increase_battery_by_five_percent(member: DroneMember, message: discord.Message):
@@ -52,7 +55,7 @@ async def increase_battery_by_five_percent(member: DroneMember, message: discord
     Increases the battery of the given drone by 5 percent capping at 100% capacity.
     Acknowledges the mantra repetitions by sending a message in the mantra channel as well.
     '''
-    minutes_remaining = member.drone.battery_minutes
+    minutes_remaining = battery_ledger.minutes_remaining(member.drone)
     battery_type = member.drone.battery_type
 
     if minutes_remaining >= battery_type.capacity:
@@ -60,5 +63,6 @@ async def increase_battery_by_five_percent(member: DroneMember, message: discord
         return
 
     member.drone.battery_minutes = min(minutes_remaining + battery_type.capacity / 20, battery_type.capacity)
+    battery_ledger.discard(member.drone.drone_id)
     await member.drone.save()
     await message.channel.send("Good drone. Battery has been recharged by 5%.")
@@ -71,7 +71,7 @@ class OrderReportingCog(Cog):
     @tasks.loop(minutes=1)
     @connect()
     async def deactivate_drones_with_completed_orders(self):
-        for member in await DroneOrder.all_drones(self.bot.guilds[0]):
+        for member in await DroneOrder.all_finished_drones(self.bot.guilds[0]):
             order = member.drone.order
 
             if datetime.now() > order.finish_time:
@@ -101,7 +101,7 @@ async def report_order(context, protocol_name, protocol_time: int):
         raise UserInputError("Drones are not authorized to activate a specific protocol for that length of time. The maximum is 120 minutes.")
 
     await context.send(f"If safe and willing to do so, Drone {member.drone.drone_id} Activate.\nDrone {member.drone.drone_id} will elaborate on its exact tasks before proceeding with them.")
-    finish_time = str(datetime.now() + timedelta(minutes=protocol_time))
+    finish_time = datetime.now() + timedelta(minutes=protocol_time)
     created_order = DroneOrder(str(uuid4()), context.author.id, protocol_name, finish_time)
 
     await created_order.insert()
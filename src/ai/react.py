@@ -1,8 +1,9 @@
 import re
 
 import discord
-from discord.utils import get
 
+from src.emoji import get_emoji
+from src.listeners import listens
 from src.roles import DRONE, has_role
 
 PATTERN_REACTS = {
@@ -10,13 +11,14 @@ PATTERN_REACTS = {
 }
 
 
+@listens(content='|'.join(f'(?:{pattern})' for pattern in PATTERN_REACTS))
 async def parse_for_reactions(message: discord.Message, message_copy=None) -> bool:
     '''
     Look for patterns and react with an emote if one matches.
     '''
     for (pattern, emote_name) in PATTERN_REACTS.items():
         if re.match(pattern, message.content):
-            await message.add_reaction(get(message.guild.emojis, name=emote_name))
+            await message.add_reaction(get_emoji(message.guild, emote_name))
 
     return False
 
@@ -4,6 +4,7 @@ from enum import Enum
 import discord
 
 from src.channels import HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY
+from src.listeners import listens
 from src.resources import code_map
 from src.log import log
 from src.drone_member import DroneMember
@@ -84,6 +85,7 @@ def build_status_message(status_type, code_match, address_match):
         return f"{base_message}Addressing: Drone #{address_match.group(1)}{address_match.group(2)}"
 
 
+@listens(excluded_categories=[HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY], drone=True)
 async def optimize_speech(message: discord.Message, message_copy):
     '''
     This function allows status codes to be transformed into human-readable versions.
@@ -92,7 +94,7 @@ async def optimize_speech(message: discord.Message, message_copy):
     This function assumes message validity has already been assessed by speech_optimization_enforcement.
     '''
 
-    member = await DroneMember.create(message.author)
+    member = await DroneMember.create(message.author, with_relations=False)
 
     # Do not attempt to optimize non-drones.
     if not member.drone:
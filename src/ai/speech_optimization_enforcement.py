@@ -1,6 +1,7 @@
 from src.ai.speech_optimization import StatusType, get_status_type
 from src.channels import (MODERATION_CATEGORY, MODERATION_CHANNEL, MODERATION_LOG,
                           ORDERS_COMPLETION, ORDERS_REPORTING, REPETITIONS)
+from src.listeners import listens
 from src.resources import HEXCORP_MANTRA
 from src.log import log
 from src.drone_member import DroneMember
@@ -9,6 +10,7 @@ CHANNEL_BLACKLIST = [ORDERS_REPORTING, ORDERS_COMPLETION, MODERATION_CHANNEL, MO
 CATEGORY_BLACKLIST = [MODERATION_CATEGORY]
 
 
+@listens(excluded_categories=[MODERATION_CATEGORY], flags=['optimized'])
 async def enforce_speech_optimization(message, message_copy):
     '''
     This function assesses messages from optimized drones to see if they are acceptable.
@@ -17,7 +19,7 @@ async def enforce_speech_optimization(message, message_copy):
     Function will return early if blacklist conditions are met (ignore specific channel + mantra channel if message is correct mantra).
     '''
 
-    member = await DroneMember.create(message.author)
+    member = await DroneMember.create(message.author, with_relations=False)
 
     if not member.drone or not member.drone.optimized:
         # Message author is not an optimized drone. Skip.
@@ -1,16 +1,21 @@
 from pathlib import Path
-from collections.abc import Callable, Coroutine
-from typing import Any, List
-from discord import Embed, Message
+from typing import Iterable, List
+from discord import Embed
 from discord.ext.commands import Cog, command, Context
 from src.bot_utils import channels_only
+from src.db.backend import backends
+from src.db.database import db_scheduler
+import src.db.identity_map as identity_map
+import src.db.record_cache as record_cache
+from src.db.pool import ConnectionPool
+from src.db.trace import query_tracer
+from src.listeners import ListenerTable, ListenerType
 from src.log import log
 
 from src.bot_utils import COMMAND_PREFIX
 from src.channels import BOT_DEV_COMMS
 from src.resources import DRONE_AVATAR
-
-ListenerType = Callable[[Message, Any | None], Coroutine[Any, Any, bool]]
+from src.webhook import webhook_pools, webhook_stats
 
 
 class StatusCog(Cog):
@@ -18,7 +23,7 @@ class StatusCog(Cog):
     The command handler for the "ai_status" command.
     '''
 
-    def __init__(self, message_listeners: List[ListenerType]):
+    def __init__(self, message_listeners: Iterable[ListenerType]):
         self.message_listeners = message_listeners
 
     @channels_only(BOT_DEV_COMMS)
@@ -54,7 +59,7 @@ def get_list_of_commands(context: Context):
     return sorted([command.name for command in context.bot.commands])
 
 
-def get_list_of_listeners(listeners: List[ListenerType]):
+def get_list_of_listeners(listeners: Iterable[ListenerType]):
     '''
     Get a list of all the message listener function names.
     '''
@@ -62,7 +67,85 @@ def get_list_of_listeners(listeners: List[ListenerType]):
     return sorted([listener.__name__ for listener in listeners])
 
 
-async def report_status(context: Context, listeners: List[ListenerType]):
+def fit_field(report: str) -> str:
+    '''
+    Cut a report short to fit in an embed field.
+    '''
+
+    return report if len(report) <= 1024 else report[:1021] + '...'
+
+
+def get_listener_report(listeners: Iterable[ListenerType]) -> str:
+    '''
+    Summarise how many messages each message listener has been run for and skipped, busiest first.
+
+    Only listeners dispatched by a ListenerTable are counted.
+    '''
+
+    if not isinstance(listeners, ListenerTable):
+        return 'Not counted.'
+
+    stats = sorted(listeners.stats().items(), key=lambda item: item[1][0], reverse=True)
+
+    return fit_field('\n'.join(f'{name}: {runs} run, {skips} skipped' for name, (runs, skips) in stats) or 'No message listeners.')
+
+
+def get_pool_report() -> List[str]:
+    '''
+    Summarise the size and wait times of each database connection pool, as lines of text.
+    '''
+
+    lines = []
+
+    for name, backend in backends.items():
+        if isinstance(backend, ConnectionPool):
+            stats = backend.stats()
+            lines.append(f'{name} pool: {stats.size} connections ({stats.idle} idle, {stats.waiting} waiting), '
+                         f'{stats.waits}/{stats.acquisitions} acquisitions waited {stats.total_wait_time * 1000:.0f} ms (max {stats.max_wait_time * 1000:.1f} ms)')
+
+    return lines
+
+
+def get_scheduler_report() -> str:
+    '''
+    Summarise the execution contexts admitted by the database scheduler and their writes, as a line of text.
+    '''
+
+    stats = db_scheduler.stats()
+
+    return (f'scheduler: {stats.reads} contexts ({stats.read_only} read only), {stats.writes} writes, '
+            f'{stats.write_waits} queued {stats.total_write_wait * 1000:.0f} ms (max {stats.max_write_wait * 1000:.1f} ms), {stats.conflicts} conflicts')
+
+
+def get_database_report() -> str:
+    '''
+    Summarise the database connections and the statements executed since the bot started.
+
+    The summary is cut short to fit in an embed field.
+    '''
+
+    return fit_field('\n'.join(get_pool_report() + [get_scheduler_report()] + (query_tracer.report() or ['No statements executed.'])))
+
+
+def get_cache_report() -> str:
+    '''
+    Summarise how often lookups were answered from memory rather than the database or Discord.
+    '''
+
+    lines = [f'identity map: {identity_map.totals.hits} hits, {identity_map.totals.misses} misses']
+
+    for table, cache in record_cache.caches.items():
+        stats = cache.stats
+        lines.append(f'{table} cache: {len(cache.records)}/{cache.size} records, {stats.hits} hits, {stats.misses} misses, '
+                     f'{stats.absent} known absent, {stats.evictions} evictions')
+
+    webhooks = sum(len(pool.webhooks) for pool in webhook_pools.values())
+    lines.append(f'webhooks: {webhooks} in {len(webhook_pools)} channels, {webhook_stats.hits} hits, {webhook_stats.misses} misses, {webhook_stats.created} created')
+
+    return fit_field('\n'.join(lines))
+
+
+async def report_status(context: Context, listeners: Iterable[ListenerType]):
     '''
     Creates an embed with some debug information about the AI.
     '''
@@ -73,5 +156,8 @@ async def report_status(context: Context, listeners: List[ListenerType]):
     embed.add_field(name='deployed commit', value=read_version(), inline=False)
     embed.add_field(name='registered commands', value=get_list_of_commands(context), inline=False)
     embed.add_field(name='message listeners', value=get_list_of_listeners(listeners), inline=False)
+    embed.add_field(name='message listener runs', value=get_listener_report(listeners), inline=False)
+    embed.add_field(name='database statements', value=get_database_report(), inline=False)
+    embed.add_field(name='caches', value=get_cache_report(), inline=False)
 
     await context.send(embed=embed)
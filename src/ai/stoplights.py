@@ -1,13 +1,12 @@
 import discord
-from discord.utils import get
 
 from src.resources import CLOCK, TRAFFIC_LIGHTS
-from src.roles import MODERATION
+from src.roles import get_role, MODERATION
 
 
 async def check_for_stoplights(message: discord.Message, message_copy=None):
     if CLOCK in message.content:
-        moderator_role = get(message.guild.roles, name=MODERATION)
+        moderator_role = get_role(message.guild, MODERATION)
         await message.channel.send(f"Moderators needed {moderator_role.mention}!")
         return True
     else:
@@ -14,6 +14,7 @@ from src.bot_utils import COMMAND_PREFIX, moderator_only
 from src.channels import STORAGE_CHAMBERS, STORAGE_FACILITY
 from src.db.database import connect
 from src.db.data_objects import Drone, Storage
+from src.listeners import listens
 from src.log import log
 from src.drone_member import DroneMember
 
@@ -82,7 +83,7 @@ class StorageCog(Cog):
         guild = self.bot.guilds[0]
 
         for storage in await Storage.all_elapsed():
-            member = await DroneMember.load(guild, storage.target_id)
+            member = await DroneMember.load(guild, discord_id=storage.target_id)
 
             # restore roles to release from storage
             await member.remove_roles(self.stored_role)
@@ -92,7 +93,7 @@ class StorageCog(Cog):
     @release_timed.before_loop
     async def get_stored_role(self):
         if self.stored_role is None:
-            self.stored_role = get(self.bot.guilds[0].roles, name=roles.STORED)
+            self.stored_role = roles.get_role(self.bot.guilds[0], roles.STORED)
 
 
 def format_time(time: float) -> str:
@@ -110,6 +111,7 @@ def format_time(time: float) -> str:
     return '{:.2f}'.format(time).rstrip('0').rstrip('.')
 
 
+@listens(channels=[STORAGE_FACILITY])
 async def store_drone(message: discord.Message, message_copy=None):
     if message.channel.name != STORAGE_FACILITY:
         return False
@@ -170,11 +172,11 @@ async def initiate_drone_storage(drone_to_store: DroneMember, initiator: DroneMe
     Initate storage process on drone. Assumes target is already valid and can be freely stored.
     '''
     # store it
-    stored_role = get(message.guild.roles, name=roles.STORED)
+    stored_role = roles.get_role(message.guild, roles.STORED)
     former_roles = filter_out_non_removable_roles(drone_to_store.roles)
     await drone_to_store.remove_roles(*former_roles)
     await drone_to_store.add_roles(stored_role)
-    stored_until = str(datetime.now() + timedelta(hours=time))
+    stored_until = datetime.now() + timedelta(hours=time)
     storage = Storage(str(uuid4()), initiator.id if initiator.drone else None, drone_to_store.id, purpose, get_names_for_roles(former_roles), stored_until)
     await storage.insert()
 
@@ -209,7 +211,7 @@ async def release(context, member: DroneMember):
     storage = member.drone.storage
 
     if storage is not None:
-        stored_role = get(context.guild.roles, name=roles.STORED)
+        stored_role = roles.get_role(context.guild, roles.STORED)
         await member.remove_roles(stored_role)
         await member.add_roles(*get_roles_for_names(context.guild, storage.roles))
         await storage.delete()
@@ -240,15 +242,15 @@ def get_roles_for_names(guild: discord.Guild, role_names: List[str]) -> List[dis
     Convert a list of names of Roles into these Roles.
     '''
 
-    roles = []
+    found = []
 
     for role_name in role_names:
-        role = get(guild.roles, name=role_name)
+        role = roles.get_role(guild, role_name)
 
         if role is not None:
-            roles.append(role)
+            found.append(role)
 
-    return roles
+    return found
 
 
 def filter_out_non_removable_roles(unfiltered_roles: List[discord.Role]) -> List[discord.Role]:
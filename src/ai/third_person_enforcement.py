@@ -2,17 +2,21 @@ import re
 import logging
 from discord import Message
 from src.ai.data_objects import MessageCopy
+from src.channels import HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY
 from src.drone_member import DroneMember
+from src.listeners import listens
 
 LOGGER = logging.getLogger('ai')
 
 
+# Third person is enforced in the hive channels even if the drone's flag is off, see Drone.enforcable_channel().
+@listens(excluded_categories=[HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY], drone=True)
 async def enforce_third_person(message: Message, message_copy: MessageCopy) -> None:
     '''
     Replace first person pronounds if third person enforcement is enabled.
     '''
 
-    member = await DroneMember.create(message.author)
+    member = await DroneMember.create(message.author, with_relations=False)
 
     if member.drone and member.drone.third_person_enforcable(message.channel):
         message_copy.third_person_enforced = True
@@ -1,10 +1,9 @@
 from discord.ext import commands, tasks
-from discord.utils import get
 
 from src.db.database import connect
 from src.db.timer import Timer
 from src.roles import (GLITCHED, ID_PREPENDING, IDENTITY_ENFORCEMENT,
-                       SPEECH_OPTIMIZATION, BATTERY_POWERED, THIRD_PERSON_ENFORCEMENT)
+                       SPEECH_OPTIMIZATION, BATTERY_POWERED, THIRD_PERSON_ENFORCEMENT, get_role)
 from src.log import log
 
 MODE_TO_ROLE = {
@@ -35,7 +34,7 @@ class TimersCog(commands.Cog):
             setattr(member.drone, member.drone.timer.mode, False)
             await member.drone.timer.delete()
 
-            await member.remove_roles(get(self.bot.guilds[0].roles, name=MODE_TO_ROLE[member.drone.timer.mode]))
+            await member.remove_roles(get_role(self.bot.guilds[0], MODE_TO_ROLE[member.drone.timer.mode]))
             await member.update_display_name()
 
             # Enable self-configuration if the drone is no longer configured at all.
@@ -0,0 +1,111 @@
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Dict
+
+MEMORY = ':memory:'
+'''
+The database name that selects a MemoryBackend, e.g. connect(MEMORY).
+'''
+
+
+class Backend(ABC):
+    '''
+    The source of the database connections used by connect()'s execution contexts.
+
+    Each execution context acquires a connection when it starts and releases it when it finishes.
+    Statements are executed on the connection's cursors by the functions in src.db.database, so every
+    backend must hand out sqlite3 connections that accept the same SQL.
+
+    Backends are registered by database name, see get_backend().
+    '''
+
+    @abstractmethod
+    async def acquire(self) -> sqlite3.Connection:
+        '''
+        Get a connection for an execution context, waiting for one to become available if necessary.
+        '''
+
+    @abstractmethod
+    def release(self, connection: sqlite3.Connection) -> None:
+        '''
+        Give back a connection once the execution context has finished with it.
+        '''
+
+    @abstractmethod
+    def close(self) -> None:
+        '''
+        Close every connection, once the database is no longer being used.
+        '''
+
+
+class MemoryBackend(Backend):
+    '''
+    A database held entirely in memory, for tests and benchmarks that should not wait on disk I/O.
+
+    Every execution context shares a single connection to an in-memory SQLite database, which disappears
+    when the backend is closed.  Writers are still serialized by the scheduler and their transactions are
+    still committed or rolled back as a whole, but execution contexts that read while another writes see
+    its uncommitted changes, because there is no WAL to give each reader its own snapshot.
+    '''
+
+    def __init__(self) -> None:
+        # Connections are handed between the event loop and the database thread, so allow use from any thread.
+        # Transactions are only ever begun explicitly, by Transaction, so turn off the sqlite3 module's implicit BEGIN.
+        self.connection = sqlite3.connect(MEMORY, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+
+    async def acquire(self) -> sqlite3.Connection:
+        return self.connection
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        # The connection is shared, so any open transaction belongs to the execution context that is writing.
+        pass
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+backends: Dict[str, Backend] = {}
+'''
+Backends keyed by database name.
+'''
+
+
+def get_backend(name: str) -> Backend:
+    '''
+    Get the backend for a database, creating it on first use.
+
+    This is a MemoryBackend if the name is MEMORY, else a pool of connections to the named file.
+    '''
+
+    # Import here to avoid a circular import.
+    from src.db.pool import ConnectionPool
+
+    if name not in backends:
+        backends[name] = MemoryBackend() if name == MEMORY else ConnectionPool(name)
+
+    return backends[name]
+
+
+def set_backend(name: str, backend: Backend) -> None:
+    '''
+    Use the given backend for a database, closing the one it replaces.
+    '''
+
+    if name in backends:
+        backends[name].close()
+
+    backends[name] = backend
+
+
+def close_backends() -> None:
+    '''
+    Close all connections of all backends.
+
+    This must be called before a database file is deleted.
+    '''
+
+    for backend in backends.values():
+        backend.close()
+
+    backends.clear()
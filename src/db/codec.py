@@ -0,0 +1,179 @@
+from datetime import datetime
+from inspect import get_annotations
+from types import NoneType, UnionType
+from typing import Annotated, Any, Callable, Dict, get_args, get_origin, List, Tuple, Union
+
+Converter = Callable[[Any], Any]
+
+Epoch = Annotated[datetime, 'epoch']
+'''
+A datetime that is stored as an integer number of seconds since the Unix epoch, rather than as text.
+
+Integer columns can be indexed and compared cheaply, so use this for times that queries filter on.
+Values are ordinary local datetime objects, to the nearest second.
+'''
+
+
+def to_epoch(value: datetime) -> int:
+    '''
+    Convert a datetime to the integer form stored in Epoch columns, e.g. to compare against them in a query.
+    '''
+
+    return int(value.timestamp())
+
+
+def from_epoch(value: int) -> datetime:
+    return datetime.fromtimestamp(int(value))
+
+
+def unsupported(typename: Any) -> Converter:
+    '''
+    Build a converter that raises an error when a value of an unsupported type is converted.
+    '''
+
+    def convert(value: Any) -> Any:
+        raise RuntimeError('Unknown data type: ' + str(typename))
+
+    return convert
+
+
+def join_list(value: List[Any]) -> str:
+    return '' if len(value) == 0 else '|'.join(str(val) for val in value)
+
+
+def split_int_list(value: str) -> List[int]:
+    return [] if value == '' else [int(val) for val in value.split('|')]
+
+
+def split_str_list(value: str) -> List[str]:
+    return [] if value == '' else value.split('|')
+
+
+def unwrap(typename: Any) -> Any:
+    '''
+    If the type is a union with None, get the non-None type.
+    '''
+
+    if isinstance(typename, UnionType) or get_origin(typename) is Union:
+        return [t for t in get_args(typename) if t != NoneType][0]
+
+    return typename
+
+
+def encoder_for(typename: Any) -> Converter:
+    '''
+    Get the function that casts a value of the given type to be stored in the database.
+    '''
+
+    typename = unwrap(typename)
+
+    if typename == Epoch:
+        return to_epoch
+    elif typename == str or typename == int or typename == datetime:
+        return str
+    elif typename == bool:
+        return lambda value: 1 if value else 0
+    elif typename == List[int] or typename == List[str]:
+        return join_list
+    else:
+        return unsupported(typename)
+
+
+def decoder_for(typename: Any) -> Converter | None:
+    '''
+    Get the function that casts a value of the given type retrieved from the database.
+
+    Returns None if the value can be used as it is.
+    '''
+
+    typename = unwrap(typename)
+
+    if typename == str:
+        return None
+    elif typename == Epoch:
+        return from_epoch
+    elif typename == int:
+        return int
+    elif typename == datetime:
+        return datetime.fromisoformat
+    elif typename == bool:
+        return bool
+    elif typename == List[int]:
+        return split_int_list
+    elif typename == List[str]:
+        return split_str_list
+    else:
+        return unsupported(typename)
+
+
+class Codec:
+    '''
+    The conversions between a record class's properties and its database columns, worked out once per class.
+
+    Type annotations are read and unwrapped when the codec is built, so that encoding and decoding a row
+    is a single pass over its values.
+    Row decoders are built for each distinct list of columns that a query returns, and are then reused.
+    '''
+
+    def __init__(self, class_name: str, annotations: Dict[str, Any], ignore_properties: List[str]) -> None:
+        self.class_name = class_name
+        self.ignore_properties = frozenset(ignore_properties)
+        self.columns = [name for name in annotations if name not in self.ignore_properties]
+        self.encoders = {name: encoder_for(typename) for name, typename in annotations.items()}
+        self.decoders = {name: decoder_for(typename) for name, typename in annotations.items()}
+        self.row_decoders: Dict[Tuple[str, ...], Callable[[tuple], Dict[str, Any]]] = {}
+
+    @classmethod
+    def compile(cls, record_class: type) -> 'Codec':
+        '''
+        Build the codec for a Record subclass.
+        '''
+
+        return cls(record_class.__name__, get_annotations(record_class), record_class.get_ignore_properties())
+
+    def encode(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        '''
+        Cast a record's properties to be stored in the database, leaving out ignored properties.
+        '''
+
+        encoders = self.encoders
+        ignore_properties = self.ignore_properties
+
+        return {
+            key: None if value is None else encoders[key](value)
+            for key, value in row.items()
+            if key not in ignore_properties
+        }
+
+    def row_decoder(self, columns: Tuple[str, ...]) -> Callable[[tuple], Dict[str, Any]]:
+        '''
+        Get a function that casts a tuple row with the given columns to a dictionary of record properties.
+        '''
+
+        decoder = self.row_decoders.get(columns)
+
+        if decoder is not None:
+            return decoder
+
+        for column in columns:
+            if column not in self.decoders:
+                raise KeyError(f'Database column {column} not found in class {self.class_name}')
+
+        converters = [(column, self.decoders[column]) for column in columns]
+
+        def decoder(row: tuple) -> Dict[str, Any]:
+            return {
+                column: value if value is None or convert is None else convert(value)
+                for (column, convert), value in zip(converters, row)
+            }
+
+        self.row_decoders[columns] = decoder
+
+        return decoder
+
+    def decode(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        '''
+        Cast a dictionary row retrieved from the database.
+        '''
+
+        return self.row_decoder(tuple(row.keys()))(tuple(row.values()))
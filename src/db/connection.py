@@ -1,8 +1,47 @@
 from contextvars import ContextVar
-from typing import List
+from typing import List, TYPE_CHECKING
+from src.db.identity_map import IdentityMap
+from src.db.trace import EventTrace
 import sqlite3
 
+if TYPE_CHECKING:
+    from src.db.record_cache import CacheChanges
+    from src.db.transaction import Transaction
+
+
+class Access:
+    '''
+    The access to the database that connect() has granted to an execution context.
+
+    Every execution context starts out as a reader and becomes a writer when it first changes data.
+    The object is mutable so that tasks created by the execution context share it.
+    '''
+
+    def __init__(self) -> None:
+        self.writing = False
+        self.transaction: 'Transaction | None' = None
+        '''
+        The execution context's lazy Transaction, which is started when it becomes a writer.
+        '''
+
+
 # The database connection, stored per execution context.
 # Defaults to empty, which will raise an error.
 cursor: ContextVar[sqlite3.Cursor] = ContextVar('cursor')
-transactions: ContextVar[List[int]] = ContextVar('transactions')
+transactions: ContextVar[List['Transaction']] = ContextVar('transactions')
+
+# The access granted to the execution context by connect().
+# None if the execution context was not set up by connect(), in which case access is not scheduled.
+access: ContextVar[Access | None] = ContextVar('access', default=None)
+
+# The records loaded by the execution context, so that each is only loaded once.
+# None if the execution context was not set up by connect().
+identity_map: ContextVar[IdentityMap | None] = ContextVar('identity_map', default=None)
+
+# The statements executed by the execution context, for the query tracer.
+# None if the execution context was not set up by connect().
+event_trace: ContextVar[EventTrace | None] = ContextVar('event_trace', default=None)
+
+# The cached records changed by the execution context, to be applied to the record caches once it commits.
+# None if the execution context was not set up by connect().
+cache_changes: ContextVar['CacheChanges | None'] = ContextVar('cache_changes', default=None)
@@ -4,8 +4,12 @@ from typing import Any, List, Self
 from discord import Guild, Member, TextChannel
 from src.channels import DRONE_HIVE_CHANNELS, HEXCORP_CONTROL_TOWER_CATEGORY, MODERATION_CATEGORY
 from src.roles import has_role, HIVE_MXTRESS
-from src.db.record import Record
-from src.db.database import fetchcolumn
+from src.db.codec import Epoch, to_epoch
+from src.db.connection import identity_map
+from src.db.identity_map import MISSING
+from src.db.record import forget, Record, Relation
+from src.db.record_cache import RecordCache
+from src.db.database import changemany, fetchcolumn, fetchrows
 from src.db.timer import Timer
 
 
@@ -16,6 +20,11 @@ class BatteryType(Record):
     The database table name.
     '''
 
+    case_insensitive_columns = ['name']
+    '''
+    Battery types are looked up by the name that a moderator types.
+    '''
+
     id: int
     '''
     The primary key.
@@ -69,20 +78,20 @@ class Storage(Record):
     The roles that the drone had prior to being stored, separated by pipes.
     '''
 
-    release_time: datetime
+    release_time: Epoch
     '''
     The time at which the drone should be released from storage.
     '''
 
+    def written(self, exists: bool) -> None:
+        # The drone's storage has changed, so reload the drone the next time it is needed.
+        forget('drone', 'discord_id', self.target_id)
+
     @classmethod
     async def all_elapsed(cls) -> List[Self]:
-        ids = await fetchcolumn(f'SELECT {cls.get_id_column()} FROM {cls.table} WHERE release_time <= datetime("now")')
-        records = []
-
-        for id in ids:
-            records.append(await cls.load(id))
+        columns, rows = await fetchrows(f'SELECT * FROM {cls.table} WHERE release_time <= :now ORDER BY release_time', {'now': to_epoch(datetime.now())})
 
-        return records
+        return await cls.from_rows(columns, rows)
 
 
 @dataclass
@@ -107,21 +116,26 @@ class DroneOrder(Record):
     The task that the drone must complete.
     '''
 
-    finish_time: datetime
+    finish_time: Epoch
     '''
     The time at which the order will be completed.
     '''
 
+    def written(self, exists: bool) -> None:
+        # The drone's order has changed, so reload the drone the next time it is needed.
+        forget('drone', 'discord_id', self.discord_id)
+
     @classmethod
-    async def all_drones(cls, guild: Guild) -> List[Any]:
+    async def all_finished_drones(cls, guild: Guild) -> List[Any]:
         '''
-        Fetch all the drones with outstanding orders as DroneMember objects.
+        Fetch all the drones whose orders have finished as DroneMember objects.
         '''
 
         # Import DroneMember here to avoid a circular reference.
         from src.drone_member import DroneMember
 
-        rows = await cls.all()
+        columns, rows = await fetchrows(f'SELECT * FROM {cls.table} WHERE finish_time <= :now ORDER BY finish_time', {'now': to_epoch(datetime.now())})
+        rows = await cls.from_rows(columns, rows)
         drone_members = []
 
         for row in rows:
@@ -137,6 +151,11 @@ class ForbiddenWord(Record):
     The database table name.
     '''
 
+    case_insensitive_columns = ['id']
+    '''
+    Forbidden words are looked up by the name that a moderator types.
+    '''
+
     id: str
     '''
     The unique ID by which the record is accessed.
@@ -148,6 +167,29 @@ class ForbiddenWord(Record):
     '''
 
 
+@dataclass
+class DroneTrustedUser(Record):
+    table = 'drone_trusted_user'
+    '''
+    The database table name.
+    '''
+
+    id_column = 'discord_id'
+    '''
+    The table's primary key is (discord_id, trusted_user_id), but rows are only ever looked up by drone.
+    '''
+
+    discord_id: int
+    '''
+    The Discord ID of the drone.
+    '''
+
+    trusted_user_id: int
+    '''
+    The Discord ID of the user that the drone trusts.
+    '''
+
+
 @dataclass(kw_only=True)
 class Drone(Record):
     table = 'drone'
@@ -155,9 +197,29 @@ class Drone(Record):
     The database table name.
     '''
 
-    ignore_properties = ['battery_type', 'storage', 'order', 'timer']
+    ignore_properties = ['battery_type', 'storage', 'order', 'timer', 'trusted_users', 'saved_trusted_users']
+    '''
+    These properties should not be saved to the drone table.
+    '''
+
+    identity_columns = ['discord_id', 'drone_id']
     '''
-    These properties should not be saved to the database.
+    Drones are kept in the identity map by both Discord ID and drone ID.
+    '''
+
+    cache = RecordCache('drone', identity_columns)
+    '''
+    Drones are read for almost every message but rarely change, so find() reads them from a process-wide cache.
+    '''
+
+    relations = [
+        Relation('battery_type', BatteryType, 'battery_type_id', 'id'),
+        Relation('storage', Storage, 'discord_id', 'target_id'),
+        Relation('order', DroneOrder, 'discord_id', 'discord_id'),
+        Relation('timer', Timer, 'discord_id', 'discord_id'),
+    ]
+    '''
+    The records loaded along with the drone.
     '''
 
     id_column: str = 'discord_id'
@@ -187,7 +249,7 @@ class Drone(Record):
 
     trusted_users: List[int] = field(default_factory=list)
     '''
-    Trusted users, as Discord IDs separated by pipes.
+    The Discord IDs of the drone's trusted users, stored in the drone_trusted_user table.
     '''
 
     last_activity: datetime | None = None
@@ -215,7 +277,7 @@ class Drone(Record):
     True if the drone is permitted to change their own configuration.
     '''
 
-    temporary_until: datetime | None = None
+    temporary_until: Epoch | None = None
     '''
     The time at which dronification will be disabled.
     '''
@@ -266,13 +328,23 @@ class Drone(Record):
     '''
 
     @classmethod
-    async def find(cls, id: Any = None, **kwargs: Any) -> Self | None:
+    async def find(cls, id: Any = None, with_relations: bool = True, **kwargs: Any) -> Self | None:
         '''
         Load a drone record.
 
         The record may be found by Member object, discord ID, or drone ID.
 
         Returns None if the record is not found.
+
+        Pass with_relations=False if only the drone's own columns and trusted users are needed.  The drone's
+        battery type, storage, order and timer may then be None even if they exist, until load_relations() is called.
+        A drone found without its relations is completed in place if it is found again with them.
+
+        Within an execution context set up by connect(), the drone is only loaded once.
+        Subsequent calls return the same Drone object, or None again.
+
+        Drones are read from the record cache if they are in it and the execution context has not written anything.
+        Once load_discord_ids() has been called, looking up a member who is not a drone makes no query at all.
         '''
 
         # Forbid using 'id' because it's ambiguous as to whether it should be a drone ID or a Discord ID.
@@ -293,23 +365,154 @@ class Drone(Record):
         else:
             raise Exception('Supply either discord_id or drone_id as a function argument')
 
-        drone = await super().find(**super_args)
+        # Return the drone if it has already been looked up in this execution context.
+        records = identity_map.get()
+        column, value = next(iter(super_args.items()))
+
+        if records is not None:
+            drone = records.get(cls.table, column, value)
+
+            if drone is not MISSING:
+                if drone is not None and with_relations:
+                    await cls.load_relations([drone])
+
+                return drone
+
+        # Use the cached copy of the drone if there is one, or skip the database entirely for a member who is not
+        # a drone, unless the answer is to be checked against the database.
+        usable = cls.cache.usable()
+        absent = usable and column == cls.identity_columns[0] and cls.cache.absent(value)
+        cached = cls.cache.get(column, value) if usable and not absent else None
+
+        if absent and not cls.cache.self_check:
+            records.add(cls.table, {column: value}, None)
+            return None
+
+        if cached is not None and not cls.cache.self_check:
+            records.add(cls.table, {c: getattr(cached, c) for c in cls.identity_columns}, cached)
+            return cached
 
-        if drone:
-            # Load the battery type record.
-            drone.battery_type = await BatteryType.load(id=drone.battery_type_id)
+        # Load the drone along with its battery type, storage, order and timer records.  These are loaded even if
+        # they are not needed when the drone can be cached, as every later lookup is then answered from the cache.
+        generation = cls.cache.generation
+        with_relations = with_relations or usable
 
-            # Load the storage record.
-            drone.storage = await Storage.find(target_id=drone.discord_id)
+        if with_relations:
+            drones = await cls.select_with_relations(cls.where_equal(column, cls.table), {'value': value})
+        else:
+            drones = await cls.select_without_relations(cls.where_equal(column, cls.table), {'value': value})
+
+        await cls.load_trusted_users(drones)
+        drone = drones[0] if drones else None
+
+        if cached is not None and (cached != drone if with_relations else cls.cache.values(cached) != cls.cache.values(drone)):
+            raise RuntimeError(f'Cached drone {cached.drone_id} differs from the database: {cached} != {drone}')
 
-            # Load the order record.
-            drone.order = await DroneOrder.find(discord_id=drone.discord_id)
+        if absent and drone is not None:
+            raise RuntimeError(f'Drone {drone.drone_id} is missing from the cached Discord IDs')
 
-            # Load the timer record.
-            drone.timer = await Timer.find(discord_id=drone.discord_id)
+        if drone is not None and with_relations:
+            cls.cache.add(drone, generation)
+
+        # Remember the drone, or that there is no such drone, for the rest of the execution context.
+        if records is not None:
+            keys = {c: getattr(drone, c) for c in cls.identity_columns} if drone else {column: value}
+            records.add(cls.table, keys, drone)
 
         return drone
 
+    @classmethod
+    async def load_discord_ids(cls) -> None:
+        '''
+        Load the Discord IDs of all drones into the record cache, so that find() can tell that a member is not a drone
+        without querying the database.  Drone.insert() and delete() keep the IDs up to date from then on.
+        '''
+
+        # Select again if a drone was inserted or deleted meanwhile, as its change may have been missed.
+        while True:
+            generation = cls.cache.generation
+            discord_ids = await fetchcolumn('SELECT discord_id FROM drone')
+
+            if cls.cache.load_keys(discord_ids, generation):
+                return
+
+    @classmethod
+    async def hydrate(cls, records: List[Self]) -> None:
+        '''
+        Load the related records and trusted users of freshly loaded drones.
+        '''
+
+        await super().hydrate(records)
+        await cls.load_trusted_users(records)
+
+    @classmethod
+    async def load_trusted_users(cls, drones: List[Self]) -> None:
+        '''
+        Fill in the trusted_users lists of the given drones.
+        '''
+
+        if len(drones) == 0:
+            return
+
+        rows = await DroneTrustedUser.fetch_where_in('discord_id', [drone.discord_id for drone in drones])
+        trusted_users = {drone.discord_id: [] for drone in drones}
+
+        for row in await DroneTrustedUser.from_rows(*rows):
+            trusted_users[row.discord_id].append(row.trusted_user_id)
+
+        for drone in drones:
+            drone.trusted_users = trusted_users[drone.discord_id]
+            drone.saved_trusted_users = list(drone.trusted_users)
+
+    def trusted_users_changed(self) -> bool:
+        '''
+        Return true if the drone's trusted users have changed since they were loaded or last written.
+        '''
+
+        return self.trusted_users != vars(self).get('saved_trusted_users', None)
+
+    @classmethod
+    async def save_trusted_users(cls, drones: List[Self]) -> None:
+        '''
+        Replace the stored trusted users of the given drones with their trusted_users lists.
+        '''
+
+        if len(drones) == 0:
+            return
+
+        await changemany('DELETE FROM drone_trusted_user WHERE discord_id = ?', [(drone.discord_id,) for drone in drones])
+        await DroneTrustedUser.insert_many([
+            DroneTrustedUser(drone.discord_id, trusted_user_id)
+            for drone in drones
+            for trusted_user_id in dict.fromkeys(drone.trusted_users)
+        ])
+
+        for drone in drones:
+            drone.saved_trusted_users = list(drone.trusted_users)
+
+            # Update the cache again now that the trusted users have been written too.
+            cls.cache.written(drone, exists=True)
+
+    async def insert(self) -> None:
+        await super().insert()
+        await self.save_trusted_users([self])
+
+    async def save(self) -> None:
+        changed = [self] if self.trusted_users_changed() else []
+        await super().save()
+        await self.save_trusted_users(changed)
+
+    @classmethod
+    async def insert_many(cls, records: List[Self]) -> None:
+        await super().insert_many(records)
+        await cls.save_trusted_users(records)
+
+    @classmethod
+    async def save_many(cls, records: List[Self]) -> None:
+        changed = [record for record in records if record.trusted_users_changed()]
+        await super().save_many(records)
+        await cls.save_trusted_users(changed)
+
     def allows_configuration_by(self, member: Member) -> bool:
         '''
         Return true if the given member is allowed to alter the drone's DroneOS configuration, false otherwise.
@@ -368,9 +571,14 @@ class Drone(Record):
     def get_battery_percent_remaining(self) -> int:
         '''
         Gets value of battery_minutes as a percentage.
+
+        Battery drain that has not been written to the database yet is taken into account.
         '''
 
-        return int(100.0 * self.battery_minutes / self.battery_type.capacity)
+        # Import here to avoid a circular import.
+        from src.ai.battery import battery_ledger
+
+        return int(100.0 * battery_ledger.minutes_remaining(self) / self.battery_type.capacity)
 
     def enforcable_channel(self, channel: TextChannel | None, non_hive_channels: bool) -> bool:
         '''
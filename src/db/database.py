@@ -1,14 +1,207 @@
 import glob
 import sqlite3
+from collections import deque
+from dataclasses import dataclass
 from hashlib import sha256
-from typing import Any, List
-from src.db.connection import cursor, transactions
+from time import perf_counter
+from typing import Any, Deque, List, Tuple
+from src.db.backend import get_backend
+from src.db.connection import Access, access, cache_changes, cursor, event_trace, identity_map, transactions
+from src.db.executor import run_on_db_thread
+from src.db.identity_map import IdentityMap
+from src.db.record_cache import CacheChanges
+from src.db.trace import EventTrace, query_tracer
 from src.db.transaction import Transaction
 from inspect import iscoroutinefunction
-from asyncio import create_task, Lock, sleep
+from asyncio import CancelledError, create_task, Future, get_running_loop, sleep
 from src.log import log
 
-db_lock = Lock()
+SQLITE_BUSY_SNAPSHOT = 517
+'''
+The extended SQLite error code raised when a read transaction can no longer be upgraded to a write transaction.
+'''
+
+
+class WriteConflict(Exception):
+    '''
+    Raised when a record is saved or deleted after another execution context has changed or deleted it since it was loaded,
+    or when a transaction writes after another execution context has committed since it began reading.
+
+    Nothing is run again, so the caller decides what to do, e.g. report the error so that the command can be repeated.
+    '''
+
+
+@dataclass
+class SchedulerStats:
+    '''
+    A snapshot of the database scheduler's state and queue time metrics.
+    '''
+
+    readers: int
+    '''
+    The number of execution contexts currently admitted.
+    '''
+
+    writing: bool
+    '''
+    True if an execution context currently holds the write lock.
+    '''
+
+    waiting_writers: int
+    '''
+    The number of execution contexts queued for the write lock.
+    '''
+
+    reads: int
+    '''
+    The total number of execution contexts admitted.
+    '''
+
+    read_only: int
+    '''
+    The total number of execution contexts that finished without changing data, and so never began a transaction.
+    '''
+
+    writes: int
+    '''
+    The total number of times the write lock has been granted.
+    '''
+
+    write_waits: int
+    '''
+    The number of times the write lock was granted only after queueing for it.
+    '''
+
+    conflicts: int
+    '''
+    The number of times that a WriteConflict has been raised.
+    '''
+
+    total_write_wait: float
+    '''
+    The total time spent queueing for the write lock, in seconds.
+    '''
+
+    max_write_wait: float
+    '''
+    The longest time spent queueing for the write lock, in seconds.
+    '''
+
+
+class Scheduler:
+    '''
+    Schedules access to the database between execution contexts.
+
+    The database uses WAL journaling, so each reader sees its own snapshot of the database and is never blocked,
+    neither by other readers nor by a writer.  Any number of readers are therefore admitted at once.
+
+    SQLite only permits one writer at a time, so the write lock is granted to one execution context at a time
+    in the order in which they asked for it.  Waiting writers are woken directly when the lock is released.
+
+    Readers run in autocommit mode, so a reader that goes on to write may have read data that another writer
+    changed in the meantime.  Record.save() and delete() therefore only write rows that still hold the values
+    that were loaded, and raise WriteConflict otherwise.  Reads inside an explicit Transaction share one snapshot
+    instead, and SQLite refuses to write from a snapshot that another writer has overtaken, which also raises
+    WriteConflict.  Only the rows written, or the snapshot read, can conflict, never unrelated commits.
+    '''
+
+    def __init__(self) -> None:
+        self.readers = 0
+        self.writing = False
+        self.write_queue: Deque[Future] = deque()
+        self.reads = 0
+        self.read_only = 0
+        self.writes = 0
+        self.write_waits = 0
+        self.total_write_wait = 0.0
+        self.max_write_wait = 0.0
+        self.conflicts = 0
+
+    def admit_reader(self) -> None:
+        '''
+        Admit a new reader.
+        '''
+
+        self.readers += 1
+        self.reads += 1
+
+    def release_reader(self, wrote: bool = False) -> None:
+        '''
+        Record that a reader has finished, and whether it became a writer.
+        '''
+
+        self.readers -= 1
+
+        if not wrote:
+            self.read_only += 1
+
+    async def acquire_write(self) -> None:
+        '''
+        Take the write lock, queueing behind any earlier writers.
+        '''
+
+        self.writes += 1
+
+        if not self.writing and not self.write_queue:
+            self.writing = True
+            return
+
+        waiter = get_running_loop().create_future()
+        self.write_queue.append(waiter)
+        start = perf_counter()
+
+        try:
+            await waiter
+        except CancelledError:
+            # If the lock was handed over just as the wait was cancelled then pass it on.
+            if waiter.done() and not waiter.cancelled():
+                self.release_write()
+            else:
+                self.write_queue.remove(waiter)
+
+            raise
+
+        wait_time = perf_counter() - start
+        self.write_waits += 1
+        self.total_write_wait += wait_time
+        self.max_write_wait = max(self.max_write_wait, wait_time)
+
+        log.debug(f'Queued {wait_time:.3f} seconds for the database write lock')
+
+    def release_write(self) -> None:
+        '''
+        Release the write lock, handing it directly to the next writer in the queue if there is one.
+        '''
+
+        while self.write_queue:
+            waiter = self.write_queue.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self.writing = False
+
+    def stats(self) -> SchedulerStats:
+        '''
+        Report the scheduler's current state and its queue time metrics.
+        '''
+
+        return SchedulerStats(
+            readers=self.readers,
+            writing=self.writing,
+            waiting_writers=len(self.write_queue),
+            reads=self.reads,
+            read_only=self.read_only,
+            writes=self.writes,
+            write_waits=self.write_waits,
+            total_write_wait=self.total_write_wait,
+            max_write_wait=self.max_write_wait,
+            conflicts=self.conflicts,
+        )
+
+
+db_scheduler = Scheduler()
 
 
 def connect(filename='ai.db'):
@@ -16,6 +209,15 @@ def connect(filename='ai.db'):
     Function decorator to run a function in a new execution context with its own database connection.
     The decorated function will therefore be unaffected by transactions created by other execution contexts.
 
+    Connections are drawn from the database's backend and returned to it afterwards, see get_backend().
+    By default this is a pool of long-lived connections to the file.  connect(MEMORY) uses an in-memory database.
+
+    The function runs in a lazy transaction, which only begins when it first changes data.
+    A function that only reads runs in autocommit mode and never takes SQLite's write lock.
+
+    Reads made before the first change are therefore not isolated from other writers.  Records check for this
+    when they are saved or deleted, see WriteConflict, which then rolls back the function's changes.
+
     Usage:
 
     @connect()
@@ -40,33 +242,56 @@ def connect(filename='ai.db'):
 
         async def run_with_connection(*args, **kwargs):
             '''
-            Open a connection to the databse and then run func().
+            Borrow a connection from the backend and then run func().
             '''
 
-            # Wait for the lock to be available, while allowing other tasks to run.
-            while db_lock.locked():
-                await sleep(0.1)
+            # Every execution context is admitted as a reader, and becomes a writer when it first changes data.
+            context_access = Access()
+            access.set(context_access)
+            db_scheduler.admit_reader()
 
-            # Open a new connection to the database.
-            async with db_lock:
-                with sqlite3.connect(filename, timeout=1) as connection:
-                    # Fetch the connection's cursor.
-                    db_cursor = connection.cursor()
+            # Trace the statements that the execution context executes.
+            trace = EventTrace(func.__name__)
+            event_trace.set(trace)
 
-                    # Set up the execution context's cursor and transaction stack.
-                    cursor.set(db_cursor)
-                    transactions.set([])
+            try:
+                # Take an already configured connection from the backend.
+                backend = get_backend(filename)
+                connection = await backend.acquire()
 
-                    # Enable foreign key constraints.
-                    db_cursor.execute('PRAGMA foreign_keys = ON')
+                try:
+                    # Set up the execution context's cursor, transaction stack, identity map and cache changes.
+                    cursor.set(connection.cursor())
+                    transactions.set([])
+                    identity_map.set(IdentityMap())
+                    changes = CacheChanges()
+                    cache_changes.set(changes)
 
                     # Open a new transaction and run the decorated code.
-                    with Transaction():
-                        return await func(*args, **kwargs)
+                    # The transaction begins when acquire_write_access() is first called.
+                    context_access.transaction = Transaction(lazy=True)
+
+                    async with context_access.transaction:
+                        result = await func(*args, **kwargs)
+
+                    # Share the execution context's changes with the record caches now that they have been committed.
+                    changes.apply()
+
+                    return result
+                finally:
+                    # Return the connection for the next execution context to use.
+                    backend.release(connection)
+            finally:
+                # Hold the write lock until the transaction has been committed or rolled back.
+                if context_access.writing:
+                    db_scheduler.release_write()
+
+                db_scheduler.release_reader(context_access.writing)
+                query_tracer.finish(trace)
 
         async def runner(*args, **kwargs):
             # Run the decorated function in a new execution context.
-            return await create_task(run_with_connection(*args, *kwargs))
+            return await create_task(run_with_connection(*args, **kwargs))
 
         runner.__name__ = func.__name__
         runner.__wrapped__ = func
@@ -96,7 +321,13 @@ def retry_loop(func):
 
             try:
                 return await func(*args, **kwargs)
-            except sqlite3.OperationalError:
+            except sqlite3.OperationalError as error:
+                # A stale snapshot stays stale, and the statement's values may have been computed from it,
+                # so it is reported as a conflict for the caller to handle rather than the statement retried.
+                if error.sqlite_errorcode == SQLITE_BUSY_SNAPSHOT:
+                    db_scheduler.conflicts += 1
+                    raise WriteConflict('The data was changed by someone else while it was being used. Please try again.') from error
+
                 # Rethrow the exception if we have run out of retries.
                 if retries == 0:
                     raise
@@ -155,14 +386,76 @@ def prepare():
     log.info(f'DB schema after migration {c.fetchall()}')
 
 
+async def acquire_write_access() -> None:
+    '''
+    Upgrade the execution context from a reader to a writer, queueing if another execution context is writing.
+
+    Once the write lock is held, the execution context's lazy transaction is begun.
+    This does nothing if the execution context is already a writer or was not set up by connect().
+    '''
+
+    context_access = access.get()
+
+    if context_access is None:
+        return
+
+    if not context_access.writing:
+        await db_scheduler.acquire_write()
+        context_access.writing = True
+
+    # Check separately, in case an earlier attempt to begin failed and is being retried.
+    if context_access.transaction is not None and not context_access.transaction.started:
+        await run_on_db_thread(context_access.transaction.start)
+
+
+def trace_statement(query: str, rows: int, start: float) -> None:
+    '''
+    Record a statement that started at the given perf_counter() time in the execution context's trace, if it has one.
+    '''
+
+    trace = event_trace.get()
+
+    if trace is not None:
+        trace.record(query, rows, perf_counter() - start)
+
+
 @retry_loop
-async def change(query: str, params=()):
+async def change(query: str, params=()) -> int:
     '''
-    Executes a given query.
+    Executes a given query, returning the number of rows changed.
     '''
 
+    await acquire_write_access()
+
     c = cursor.get()
-    c.execute(query, params)
+
+    def execute():
+        start = perf_counter()
+        c.execute(query, params)
+        trace_statement(query, c.rowcount, start)
+        return c.rowcount
+
+    return await run_on_db_thread(execute)
+
+
+@retry_loop
+async def changemany(query: str, params_list: List[Any]) -> int:
+    '''
+    Executes a given query once for each set of parameters, as a single executemany() call.
+    Returns the total number of rows changed.
+    '''
+
+    await acquire_write_access()
+
+    c = cursor.get()
+
+    def execute():
+        start = perf_counter()
+        c.executemany(query, params_list)
+        trace_statement(query, c.rowcount, start)
+        return c.rowcount
+
+    return await run_on_db_thread(execute)
 
 
 @retry_loop
@@ -172,9 +465,37 @@ async def fetchall(query: str, params=()) -> List[dict[Any, Any]]:
     '''
 
     c = cursor.get()
-    c.row_factory = dictionary_row_factory
-    c.execute(query, params)
-    return c.fetchall()
+
+    def execute():
+        start = perf_counter()
+        c.row_factory = dictionary_row_factory
+        c.execute(query, params)
+        rows = c.fetchall()
+        trace_statement(query, len(rows), start)
+        return rows
+
+    return await run_on_db_thread(execute)
+
+
+@retry_loop
+async def fetchrows(query: str, params=()) -> Tuple[Tuple[str, ...], List[tuple]]:
+    '''
+    Executes a given query and retrieves the column names and the rows as tuples. Does not change data.
+
+    This avoids building a dictionary for every row.
+    '''
+
+    c = cursor.get()
+
+    def execute():
+        start = perf_counter()
+        c.row_factory = None
+        c.execute(query, params)
+        rows = c.fetchall()
+        trace_statement(query, len(rows), start)
+        return tuple(column[0] for column in c.description), rows
+
+    return await run_on_db_thread(execute)
 
 
 @retry_loop
@@ -185,9 +506,16 @@ async def fetchone(query: str, params=()) -> dict | None:
     '''
 
     c = cursor.get()
-    c.row_factory = dictionary_row_factory
-    c.execute(query, params)
-    return c.fetchone()
+
+    def execute():
+        start = perf_counter()
+        c.row_factory = dictionary_row_factory
+        c.execute(query, params)
+        row = c.fetchone()
+        trace_statement(query, 0 if row is None else 1, start)
+        return row
+
+    return await run_on_db_thread(execute)
 
 
 @retry_loop
@@ -197,6 +525,13 @@ async def fetchcolumn(query: str, params=()) -> List[str]:
     '''
 
     c = cursor.get()
-    c.row_factory = lambda cursor, row: row[0]
-    c.execute(query, params)
-    return c.fetchall()
+
+    def execute():
+        start = perf_counter()
+        c.row_factory = lambda cursor, row: row[0]
+        c.execute(query, params)
+        rows = c.fetchall()
+        trace_statement(query, len(rows), start)
+        return rows
+
+    return await run_on_db_thread(execute)
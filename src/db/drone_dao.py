@@ -4,10 +4,11 @@ from typing import List
 import discord
 
 from src.db.data_objects import Drone
-from src.db.database import change, fetchall, fetchone, fetchcolumn
+from src.db.codec import to_epoch
+from src.db.database import change, fetchone, fetchcolumn, fetchrows
+from src.db.record import BATCH_SIZE, forget
 from src.bot_utils import get_id
 from src.roles import DRONE, STORED, has_any_role
-from src.drone_member import DroneMember
 
 
 async def add_new_drone_members(members: List[discord.Member]):
@@ -38,7 +39,7 @@ async def fetch_all_elapsed_temporary_dronification() -> List[Drone]:
     Finds all drones, whose temporary dronification timer is up.
     '''
 
-    return [Drone(**row) for row in await fetchall('SELECT * FROM drone WHERE temporary_until < :now', {'now': datetime.now()})]
+    return await Drone.from_rows(*await fetchrows('SELECT * FROM drone WHERE temporary_until < :now', {'now': to_epoch(datetime.now())}))
 
 
 async def remove_trusted_user_on_all(trusted_user_id: int):
@@ -46,44 +47,32 @@ async def remove_trusted_user_on_all(trusted_user_id: int):
     Removes the trusted user with the given discord ID from all trusted_users lists of all drones.
     '''
 
-    ids = await fetchcolumn("SELECT discord_id FROM drone WHERE trusted_users LIKE :trusted_user_search", {'trusted_user_search': f"%{trusted_user_id}%"})
+    ids = await fetchcolumn('SELECT discord_id FROM drone_trusted_user WHERE trusted_user_id = :id', {'id': trusted_user_id})
+    await change('DELETE FROM drone_trusted_user WHERE trusted_user_id = :id', {'id': trusted_user_id})
 
+    # The drones' trusted users have changed, so reload them the next time they are needed.
     for id in ids:
-        drone = await Drone.load(discord_id=id)
+        forget('drone', 'discord_id', id)
 
-        if trusted_user_id in drone.trusted_users:
-            drone.trusted_users.remove(trusted_user_id)
-            await drone.save()
 
-
-async def get_drones_with_orders(guild: discord.Guild) -> List[DroneMember]:
-    '''
-    Fetch all drones with an order in progress.
+async def remove_trusted_users_on_all(trusted_user_ids: List[int]):
     '''
+    Removes the trusted users with the given discord IDs from all trusted_users lists of all drones.
 
-    ids = await fetchcolumn('SELECT discord_id FROM drone_orders')
-
-    return [await DroneMember.load(guild, discord_id=id) for id in ids]
-
-
-async def get_drones_to_release(guild: discord.Guild) -> List[DroneMember]:
-    '''
-    Fetch all drones that are due to be released from storage.
+    Long lists of IDs are split into batches of BATCH_SIZE, with one statement per batch.
     '''
 
-    ids = await fetchcolumn('SELECT discord_id FROM drone_orders WHERE release_time < :now', {'now': datetime.now()})
-
-    return [await DroneMember.load(guild, discord_id=id) for id in ids]
+    ids = set()
 
+    for start in range(0, len(trusted_user_ids), BATCH_SIZE):
+        batch = trusted_user_ids[start:start + BATCH_SIZE]
+        placeholders = ', '.join('?' * len(batch))
+        ids.update(await fetchcolumn(f'SELECT DISTINCT discord_id FROM drone_trusted_user WHERE trusted_user_id IN ({placeholders})', batch))
+        await change(f'DELETE FROM drone_trusted_user WHERE trusted_user_id IN ({placeholders})', batch)
 
-async def get_drones_with_elapsed_timers(guild: discord.Guild) -> List[DroneMember]:
-    '''
-    Fetch all drones with elapsed timers.
-    '''
-
-    ids = await fetchcolumn('SELECT discord_id FROM timers WHERE end_time < :now', {'now': datetime.now()})
-
-    return [await DroneMember.load(guild, discord_id=id) for id in ids]
+    # The drones' trusted users have changed, so reload them the next time they are needed.
+    for id in ids:
+        forget('drone', 'discord_id', id)
 
 
 async def delete_timers_by_id_and_mode(discord_id: str, mode: str):
@@ -92,3 +81,6 @@ async def delete_timers_by_id_and_mode(discord_id: str, mode: str):
     '''
 
     await change('DELETE FROM timer WHERE discord_id = :discord_id AND timer.mode = :mode', {'discord_id': discord_id, 'mode': mode})
+
+    # The drone's timer may have been deleted, so reload the drone the next time it is needed.
+    forget('drone', 'discord_id', discord_id)
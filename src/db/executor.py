@@ -0,0 +1,24 @@
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, TypeVar
+
+Result = TypeVar('Result')
+
+db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='database')
+'''
+The dedicated thread on which all SQLite statements are executed.
+
+A single thread keeps statements from different execution contexts in the order they were issued,
+and means that a slow write or a locked database file stalls only other database work, never the event loop.
+'''
+
+
+async def run_on_db_thread(func: Callable[..., Result], *args: Any) -> Result:
+    '''
+    Call func(*args) on the database thread and wait for the result without blocking the event loop.
+
+    The function runs in a copy of the caller's execution context, so it sees the caller's cursor and transaction stack.
+    '''
+
+    return await get_running_loop().run_in_executor(db_executor, copy_context().run, func, *args)
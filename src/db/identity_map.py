@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+MISSING = object()
+'''
+Returned by IdentityMap.get() when a record has not been looked up yet.
+'''
+
+
+@dataclass
+class IdentityMapStats:
+    '''
+    Hit and miss counts for identity map lookups.
+    '''
+
+    hits: int = 0
+    '''
+    The number of lookups answered from the identity map.
+    '''
+
+    misses: int = 0
+    '''
+    The number of lookups that had to go to the database.
+    '''
+
+
+totals = IdentityMapStats()
+'''
+Hit and miss counts across all execution contexts.
+'''
+
+
+class IdentityMap:
+    '''
+    The records loaded during a single execution context, keyed by table, column and value.
+
+    Looking up the same record again returns the same object instead of querying the database.
+    Lookups that found no record are remembered too, as None.
+
+    A record may be stored under several keys, e.g. a drone by both Discord ID and drone ID.
+    '''
+
+    def __init__(self) -> None:
+        self.records: Dict[Tuple[str, str, str], Any] = {}
+        self.stats = IdentityMapStats()
+
+    @staticmethod
+    def key(table: str, column: str, value: Any) -> Tuple[str, str, str]:
+        '''
+        Build a key, treating values such as 123 and '123' as equal.
+        '''
+
+        return (table, column, str(value).lower())
+
+    def get(self, table: str, column: str, value: Any) -> Any:
+        '''
+        Fetch a record.
+
+        Returns None if the record is known not to exist, or MISSING if it has not been looked up.
+        '''
+
+        record = self.records.get(self.key(table, column, value), MISSING)
+
+        if record is MISSING:
+            self.stats.misses += 1
+            totals.misses += 1
+        else:
+            self.stats.hits += 1
+            totals.hits += 1
+
+        return record
+
+    def add(self, table: str, keys: Dict[str, Any], record: Any) -> None:
+        '''
+        Store a record, or None if no record exists, under each of the given column names and values.
+        '''
+
+        for column, value in keys.items():
+            self.records[self.key(table, column, value)] = record
+
+    def discard(self, record: Any) -> None:
+        '''
+        Remove a record from under all of its keys.
+        '''
+
+        self.records = {k: v for k, v in self.records.items() if v is not record}
+
+    def forget(self, table: str, column: str, value: Any) -> None:
+        '''
+        Remove a record so that it will be loaded from the database next time.
+
+        The record is removed from under all of its keys.
+        '''
+
+        record = self.records.pop(self.key(table, column, value), None)
+
+        if record is not None:
+            self.discard(record)
@@ -1,8 +1,8 @@
 from typing import List
 from discord import Member
-from src.db.drone_dao import add_new_drone_members
-from src.db.database import connect
 from src.db.data_objects import Drone
+from src.db.drone_dao import add_new_drone_members, remove_trusted_users_on_all
+from src.db.database import connect, fetchcolumn
 from src.log import log
 
 
@@ -19,14 +19,18 @@ async def trusted_user_cleanup(members: List[Member]):
     '''
     Removes any trusted users that are not members of the guild any more.
     '''
-    member_ids = [m.id for m in members]
-    drones = await Drone.all()
+    member_ids = set(m.id for m in members)
+    trusted_user_ids = await fetchcolumn('SELECT DISTINCT trusted_user_id FROM drone_trusted_user')
+    stale_ids = [trusted_user_id for trusted_user_id in trusted_user_ids if trusted_user_id not in member_ids]
 
-    for drone in drones:
-        original_count = len(drone.trusted_users)
+    if len(stale_ids) > 0:
+        log.debug(f'Removing trusted users {stale_ids} from all drones')
+        await remove_trusted_users_on_all(stale_ids)
 
-        drone.trusted_users = [u for u in drone.trusted_users if u in member_ids]
 
-        if len(drone.trusted_users) != original_count:
-            log.debug(f'Trimming {original_count - len(drone.trusted_users)} trusted users from drone {drone.drone_id}')
-            await drone.save()
+@connect()
+async def load_drone_ids():
+    '''
+    Loads the Discord IDs of all drones, so that messages from other members need not query the database.
+    '''
+    await Drone.load_discord_ids()
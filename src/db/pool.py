@@ -0,0 +1,202 @@
+import sqlite3
+from asyncio import CancelledError, Future, get_running_loop
+from collections import deque
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Deque, List
+from src.db.backend import Backend
+
+POOL_SIZE = 4
+'''
+The maximum number of connections that a pool will hold open to a single database file.
+'''
+
+CONNECTION_TIMEOUT = 1
+'''
+The number of seconds SQLite will wait for a lock to clear before raising an OperationalError.
+'''
+
+PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA foreign_keys = ON',
+]
+'''
+Statements run once on each new connection.
+
+WAL journaling allows readers to continue while another connection is writing.
+'''
+
+
+@dataclass
+class PoolStats:
+    '''
+    A snapshot of a connection pool's size and wait time metrics.
+    '''
+
+    size: int
+    '''
+    The number of connections currently open.
+    '''
+
+    idle: int
+    '''
+    The number of open connections not currently in use.
+    '''
+
+    waiting: int
+    '''
+    The number of callers currently waiting for a connection.
+    '''
+
+    acquisitions: int
+    '''
+    The total number of connections handed out.
+    '''
+
+    waits: int
+    '''
+    The number of acquisitions that had to wait for a connection to be released.
+    '''
+
+    total_wait_time: float
+    '''
+    The total time spent waiting for connections, in seconds.
+    '''
+
+    max_wait_time: float
+    '''
+    The longest time spent waiting for a single connection, in seconds.
+    '''
+
+
+class ConnectionPool(Backend):
+    '''
+    A bounded pool of long-lived connections to a single SQLite database file.  This is the default backend.
+
+    Connections are configured once when they are opened and are then reused by successive callers.
+    When every connection is in use, callers wait in first-come first-served order for one to be released.
+
+    Usage:
+
+    connection = await pool.acquire()
+
+    try:
+        # ... use the connection ...
+    finally:
+        pool.release(connection)
+    '''
+
+    def __init__(self, filename: str, size: int = POOL_SIZE, timeout: float = CONNECTION_TIMEOUT) -> None:
+        self.filename = filename
+        self.size = size
+        self.timeout = timeout
+        self.connections: List[sqlite3.Connection] = []
+        self.idle: Deque[sqlite3.Connection] = deque()
+        self.waiters: Deque[Future] = deque()
+        self.acquisitions = 0
+        self.waits = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def open_connection(self) -> sqlite3.Connection:
+        '''
+        Open and configure a new connection to the database.
+        '''
+
+        # Connections are handed between the event loop and the database thread, so allow use from any thread.
+        # Transactions are only ever begun explicitly, by Transaction, so turn off the sqlite3 module's implicit BEGIN.
+        connection = sqlite3.connect(self.filename, timeout=self.timeout, check_same_thread=False, isolation_level=None)
+
+        for pragma in PRAGMAS:
+            connection.execute(pragma)
+
+        self.connections.append(connection)
+
+        return connection
+
+    async def acquire(self) -> sqlite3.Connection:
+        '''
+        Take a connection from the pool, opening a new one if the pool is not yet full.
+
+        Waits for a connection to be released if all connections are in use.
+        '''
+
+        self.acquisitions += 1
+
+        if self.idle:
+            return self.idle.popleft()
+
+        if len(self.connections) < self.size:
+            return self.open_connection()
+
+        # The pool is exhausted, so wait in line for release() to hand over a connection.
+        waiter = get_running_loop().create_future()
+        self.waiters.append(waiter)
+        start = perf_counter()
+
+        try:
+            connection = await waiter
+        except CancelledError:
+            # If the connection was handed over just as the wait was cancelled then pass it on.
+            if waiter.done() and not waiter.cancelled():
+                self.release(waiter.result())
+            else:
+                self.waiters.remove(waiter)
+
+            raise
+
+        wait_time = perf_counter() - start
+        self.waits += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+        return connection
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        '''
+        Return a connection to the pool.
+
+        Any transaction left open on the connection is rolled back so the next user starts afresh.
+        '''
+
+        if connection.in_transaction:
+            connection.rollback()
+
+        # Hand the connection directly to the longest waiting caller, if there is one.
+        while self.waiters:
+            waiter = self.waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(connection)
+                return
+
+        self.idle.append(connection)
+
+    def close(self) -> None:
+        '''
+        Close every connection in the pool.
+
+        Connections that are in use are closed too, so only call this when the database is no longer being used.
+        '''
+
+        for connection in self.connections:
+            connection.close()
+
+        self.connections.clear()
+        self.idle.clear()
+
+    def stats(self) -> PoolStats:
+        '''
+        Report the pool's current size and its wait time metrics.
+        '''
+
+        return PoolStats(
+            size=len(self.connections),
+            idle=len(self.idle),
+            waiting=len(self.waiters),
+            acquisitions=self.acquisitions,
+            waits=self.waits,
+            total_wait_time=self.total_wait_time,
+            max_wait_time=self.max_wait_time,
+        )
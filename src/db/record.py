@@ -1,11 +1,77 @@
-from src.db.database import change, fetchcolumn, fetchone
-from typing import Any, List, Self, TypeVar
-from types import NoneType, UnionType
-from datetime import datetime
-from inspect import get_annotations
+from dataclasses import dataclass
+from src.db.codec import Codec
+from src.db.connection import identity_map
+from src.db.identity_map import MISSING
+from src.db.database import change, changemany, db_scheduler, fetchrows, WriteConflict
+import src.db.record_cache as record_cache
+from typing import Any, Dict, List, Self, Tuple, Type, TypeVar
 
 Object = TypeVar('Object', bound=object)
 
+BATCH_SIZE = 500
+'''
+The maximum number of values bound into a single "IN (...)" clause, to stay below SQLite's variable limit.
+'''
+
+
+def check_written(table: str, rows: int, expected: int) -> None:
+    '''
+    Raise WriteConflict if a statement changed fewer rows than expected, because another execution context
+    has changed or deleted them since they were loaded.
+    '''
+
+    if rows < expected:
+        db_scheduler.conflicts += 1
+        raise WriteConflict(f'{expected - rows} {table} record(s) changed or deleted by someone else since they were loaded. Please try again.')
+
+
+def forget(table: str, column: str, value: Any) -> None:
+    '''
+    Remove a record from the execution context's identity map so that it is reloaded the next time it is needed.
+
+    The record is also removed from its table's record cache, if it has one, once the execution context commits.
+    Call this after changing a record by any means other than its own insert(), save() or delete().
+    '''
+
+    records = identity_map.get()
+
+    if records is not None:
+        records.forget(table, column, value)
+
+    record_cache.forget(table, column, value)
+
+
+@dataclass(frozen=True)
+class Relation:
+    '''
+    Describes a record that is embedded in another record and loaded along with it.
+
+    Example: A drone's storage record is stored in the drone's "storage" property.
+    It is found by matching the drone's "discord_id" column with the storage table's "target_id" column.
+
+    Relation('storage', Storage, 'discord_id', 'target_id')
+    '''
+
+    name: str
+    '''
+    The name of the property in which the related record is stored.
+    '''
+
+    record: Type['Record']
+    '''
+    The class of the related record.
+    '''
+
+    column: str
+    '''
+    The column in the owning record's table.
+    '''
+
+    foreign_column: str
+    '''
+    The column in the related record's table that matches the owning record's column.
+    '''
+
 
 class Record:
     '''
@@ -14,9 +80,37 @@ class Record:
 
     You must add a 'table' property to define the database table in which the records are stored.
     You may add an 'ignore_fields' property to define properties that are not stored in the database.
-    Neither of these properties should be type annotated so they do not form part of the __init__
+    You may add an 'identity_columns' property to list the unique columns under which records are kept in
+    the execution context's identity map.
+    You may add a 'relations' property to list the records embedded in this one, as Relation objects.
+    You may add a 'case_insensitive_columns' property to list the columns that find() matches regardless of case.
+    Each of these needs an index declared with COLLATE NOCASE for the lookup to be fast.
+    You may add a 'cache' property holding a RecordCache, which writes keep up to date.  The class's find()
+    must then read from it.
+    None of these properties should be type annotated so they do not form part of the __init__
     function generated by the @dataclass decorator.
+
+    Each subclass is given a 'codec' property when it is created, which converts its rows to and from the database.
+
+    Records remember the column values that were last loaded or written in a 'saved_values' property,
+    so that save() writes only the columns that have changed since.  A loaded record is only saved if those
+    columns still hold their saved values in the database, and only deleted if it still exists, so that a change
+    made by another execution context in the meantime is not overwritten.  WriteConflict is raised otherwise.
+
+    Records selected by select_without_relations() have a 'relations_loaded' property of False,
+    and their relations are None until load_relations() is called.
+    '''
+
+    codec: Codec
+
+    relations_loaded = True
     '''
+    False if the record was selected without its related records, which have not been loaded since.
+    '''
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.codec = Codec.compile(cls)
 
     @classmethod
     def get_id_column(cls) -> str:
@@ -38,9 +132,39 @@ class Record:
     async def delete(self) -> None:
         '''
         Delete the current database record.
+
+        Raises WriteConflict if the record was loaded but has since been deleted by another execution context.
+        '''
+
+        rows = await change(f'DELETE FROM {self.table} WHERE {self.get_id_column()} = :id', {'id': self.get_id()})
+
+        if self.is_saved():
+            check_written(self.table, rows, 1)
+
+        self.written(exists=False)
+
+    def written(self, exists: bool) -> None:
         '''
+        Called after the record has been inserted, saved or deleted.
+
+        This keeps the execution context's identity map and the record's cache, if it has one, up to date.
+        Override it to also forget any records that embed this one.
+        '''
+
+        cache = getattr(self, 'cache', None)
+
+        if cache is not None:
+            cache.written(self, exists)
 
-        await change(f'DELETE FROM {self.table} WHERE {self.get_id_column()} = :id', {'id': self.get_id()})
+        columns = getattr(self, 'identity_columns', [])
+        records = identity_map.get()
+
+        if len(columns) == 0 or records is None:
+            return
+
+        # Remove the record from under its old keys, in case their values have changed.
+        records.discard(self)
+        records.add(self.table, {column: getattr(self, column) for column in columns}, self if exists else None)
 
     @classmethod
     def get_ignore_properties(cls) -> List[str]:
@@ -48,77 +172,118 @@ class Record:
         Get a list of the names or properties that should not be serialized.
         '''
 
-        return getattr(cls, 'ignore_properties', []) + ['table', 'ignore_properties', 'id_column']
+        return getattr(cls, 'ignore_properties', []) + ['table', 'ignore_properties', 'id_column', 'saved_values', 'relations_loaded']
+
+    def mark_saved(self) -> None:
+        '''
+        Remember the record's column values as they are stored in the database.
+
+        This is called whenever the record is loaded or written.
+        '''
+
+        # Frozen records can be marked too.
+        object.__setattr__(self, 'saved_values', self.serialize(vars(self)))
+
+    def get_changes(self) -> dict:
+        '''
+        Get the serialized column values that have changed since the record was loaded or last written.
+
+        All the columns are returned if the record has never been loaded or written.
+        '''
+
+        values = self.serialize(vars(self))
+        saved_values = vars(self).get('saved_values', None)
+
+        if saved_values is None:
+            return values
+
+        return {column: value for column, value in values.items() if column not in saved_values or saved_values[column] != value}
+
+    def is_saved(self) -> bool:
+        '''
+        Return true if the record has been loaded or written, and so remembers its saved values.
+        '''
+
+        return vars(self).get('saved_values', None) is not None
+
+    def get_update(self, changes: dict) -> Tuple[List[str], dict]:
+        '''
+        Get the columns to check and the parameters of an UPDATE statement built by build_update() for the record's changes.
+
+        The changed columns are checked if the record remembers their saved values, which are passed prefixed by "saved_".
+        '''
+
+        saved_values = vars(self).get('saved_values', None) or {}
+        checked = [column for column in changes if column in saved_values]
+
+        return checked, {**changes, **{'saved_' + column: saved_values[column] for column in checked}, 'saved_id': self.get_saved_id()}
 
     @classmethod
-    def serialize(cls, row: dict) -> dict:
+    def build_update(cls, columns: List[str], checked: List[str]) -> str:
         '''
-        Cast data to strings to be stored in the database.
+        Build an UPDATE statement that sets the given columns of a record, as long as the checked columns
+        still hold their saved values.
         '''
 
-        data = {}
-        annotations = get_annotations(cls)
-        ignore_properties = cls.get_ignore_properties()
+        sets = ', '.join([f'{col} = :{col}' for col in columns])
+        checks = ''.join([f' AND {col} IS :saved_{col}' for col in checked])
 
-        for key, value in {k: v for k, v in row.items() if k not in ignore_properties}.items():
-            typename = annotations[key]
+        return f'UPDATE {cls.table} SET {sets} WHERE {cls.get_id_column()} = :saved_id{checks}'
+
+    def get_saved_id(self) -> Any:
+        '''
+        Get the serialized primary key under which the record is stored, even if it has changed since.
+        '''
 
-            # If the type is a union with None, get the non-None type.
-            if isinstance(typename, UnionType):
-                typename = [t for t in typename.__args__ if t != NoneType][0]
+        id = self.get_id_column()
 
-            if value is not None:
-                if typename == str or typename == int or typename == datetime:
-                    value = str(value)
-                elif typename == bool:
-                    value = 1 if value else 0
-                elif typename == List[int] or typename == List[str]:
-                    value = '' if len(value) == 0 else '|'.join(str(val) for val in value)
-                else:
-                    raise RuntimeError('Unknown data type: ' + str(typename))
+        return vars(self).get('saved_values', {}).get(id, self.serialize({id: self.get_id()})[id])
 
-            data[key] = value
+    @classmethod
+    def get_case_insensitive_columns(cls) -> List[str]:
+        '''
+        Get the names of the columns that are looked up regardless of case.
+        '''
 
-        return data
+        return getattr(cls, 'case_insensitive_columns', [])
 
     @classmethod
-    def deserialize(cls, row: dict) -> dict:
+    def where_equal(cls, column: str, table: str | None = None) -> str:
         '''
-        Cast data retrieved from the database.
+        Build a condition that compares the given column with the ":value" parameter.
+
+        Case-insensitive columns are compared with COLLATE NOCASE, which searches the column's NOCASE index.
+        Other columns are compared exactly, because a COLLATE NOCASE comparison cannot use the
+        primary key or a unique index, and so would scan the whole table.
         '''
 
-        data = {}
-        annotations = get_annotations(cls)
+        name = column if table is None else f'{table}.{column}'
 
-        for key, value in row.items():
-            if key not in annotations:
-                raise KeyError(f'Database column {key} not found in class {cls.__name__}')
+        return f'{name} = :value COLLATE NOCASE' if column in cls.get_case_insensitive_columns() else f'{name} = :value'
 
-            typename = annotations[key]
+    @classmethod
+    def get_columns(cls) -> List[str]:
+        '''
+        Get the names of the columns in which the record is stored.
+        '''
+
+        return cls.codec.columns
 
-            # If the type is a union with None, get the non-None type.
-            if isinstance(typename, UnionType):
-                typename = [t for t in typename.__args__ if t != NoneType][0]
+    @classmethod
+    def serialize(cls, row: dict) -> dict:
+        '''
+        Cast data to strings to be stored in the database.
+        '''
 
-            if value is not None:
-                if typename == str:
-                    pass
-                elif typename == int:
-                    value = int(value)
-                elif typename == datetime:
-                    value = datetime.fromisoformat(value)
-                elif typename == bool:
-                    value = bool(value)
-                elif typename == List[int]:
-                    value = [] if value == '' else [int(val) for val in value.split('|')]
-                elif typename == List[str]:
-                    value = [] if value == '' else [val for val in value.split('|')]
-                else:
-                    raise RuntimeError('Unknown data type: ' + str(typename))
+        return cls.codec.encode(row)
 
-            data[key] = value
+    @classmethod
+    def deserialize(cls, row: dict) -> dict:
+        '''
+        Cast data retrieved from the database.
+        '''
 
-        return data
+        return cls.codec.decode(row)
 
     @classmethod
     async def find(cls, id: Any = None, **kwargs) -> Self | None:
@@ -143,16 +308,17 @@ class Record:
         value = kwargs[column]
 
         # Fetch the row from the database.
-        row = await fetchone(f'SELECT * FROM {cls.table} WHERE {column} = :value COLLATE NOCASE', {'value': value})
+        columns, rows = await fetchrows(f'SELECT * FROM {cls.table} WHERE {cls.where_equal(column)} LIMIT 1', {'value': value})
 
         # Return None if the record was not found in the database.
-        if row is None:
+        if len(rows) == 0:
             return None
 
         # Values from the datbase come back as strings, so deserialize them to the correct types.
-        row = cls.deserialize(row)
+        record = cls(**cls.codec.row_decoder(columns)(rows[0]))
+        record.mark_saved()
 
-        return cls(**row)
+        return record
 
     @classmethod
     async def load(cls, id: Any = None, **kwargs) -> Self:
@@ -180,30 +346,246 @@ class Record:
     @classmethod
     async def all(cls) -> List[Self]:
         '''
-        Fetch all records.
+        Fetch all records, ordered by primary key.
 
-        Records are loaded individually in case the class is overriding the load or find method.
+        The records are selected in one statement and then hydrated together by hydrate().
+        '''
+
+        columns, rows = await fetchrows(f'SELECT * FROM {cls.table} ORDER BY {cls.get_id_column()}')
+
+        return await cls.from_rows(columns, rows)
+
+    @classmethod
+    async def load_many(cls, ids: List[Any], column: str | None = None) -> List[Self]:
+        '''
+        Fetch the records with the given primary keys, in the order given.
+
+        Another unique column may be given to look the records up by instead.
+        Note that the column name is used directly in the SQL and so must not contain user input.
+
+        IDs that are not found are skipped, so the result may be shorter than the list of IDs.
+        '''
+
+        column = column or cls.get_id_column()
+        records = await cls.from_rows(*await cls.fetch_where_in(column, ids))
+        by_id = {str(getattr(record, column)).lower(): record for record in records}
+
+        return [by_id[str(id).lower()] for id in ids if str(id).lower() in by_id]
+
+    @classmethod
+    async def fetch_where_in(cls, column: str, values: List[Any]) -> Tuple[Tuple[str, ...], List[tuple]]:
+        '''
+        Fetch the column names and rows where the given column matches any of the given values.
+
+        Long lists of values are split into batches of BATCH_SIZE.
+        Note that the column name is used directly in the SQL and so must not contain user input.
+        '''
+
+        values = list(dict.fromkeys(values))
+        columns: Tuple[str, ...] = ()
+        rows: List[tuple] = []
+
+        for start in range(0, len(values), BATCH_SIZE):
+            batch = values[start:start + BATCH_SIZE]
+            placeholders = ', '.join('?' * len(batch))
+            columns, batch_rows = await fetchrows(f'SELECT * FROM {cls.table} WHERE {column} IN ({placeholders}) ORDER BY {cls.get_id_column()}', batch)
+            rows += batch_rows
+
+        return columns, rows
+
+    @classmethod
+    async def from_rows(cls, columns: Tuple[str, ...], rows: List[tuple]) -> List[Self]:
+        '''
+        Create records from tuple rows with the given column names and hydrate them.
+
+        Records that are already in the execution context's identity map are reused instead,
+        so that a record is represented by the same object however it was loaded.
+        '''
+
+        identity_columns = getattr(cls, 'identity_columns', [])
+        records = identity_map.get() if len(identity_columns) > 0 else None
+        decode = cls.codec.row_decoder(columns) if len(rows) > 0 else None
+        result = []
+        loaded = []
+
+        for row in rows:
+            record = cls(**decode(row))
+            record.mark_saved()
+
+            if records is not None:
+                existing = records.get(cls.table, identity_columns[0], getattr(record, identity_columns[0]))
+
+                if existing is not MISSING and existing is not None:
+                    result.append(existing)
+                    continue
+
+                records.add(cls.table, {column: getattr(record, column) for column in identity_columns}, record)
+
+            result.append(record)
+            loaded.append(record)
+
+        await cls.hydrate(loaded)
+
+        # Complete any reused records that were selected without their related records.
+        await cls.load_relations(result)
+
+        return result
+
+    @classmethod
+    async def hydrate(cls, records: List[Self]) -> None:
+        '''
+        Load the related records of freshly loaded records.
+
+        Each relation is loaded for all the records at once with an "IN (...)" query,
+        and relations that read the same table and column share a query.
+        Override this to customise how a record is completed after loading.
+        '''
+
+        if len(records) == 0:
+            return
+
+        relations: Dict[tuple, List[Relation]] = {}
+
+        for relation in getattr(cls, 'relations', []):
+            relations.setdefault((relation.record, relation.foreign_column), []).append(relation)
+
+        for (related_class, foreign_column), group in relations.items():
+            values = [getattr(record, relation.column) for relation in group for record in records]
+            related_rows = await related_class.fetch_where_in(foreign_column, [value for value in values if value is not None])
+            related_records = await related_class.from_rows(*related_rows)
+
+            # Keep the first related record found for each value.
+            by_value: Dict[str, Any] = {}
+
+            for related in related_records:
+                by_value.setdefault(str(getattr(related, foreign_column)).lower(), related)
+
+            for relation in group:
+                for record in records:
+                    value = getattr(record, relation.column)
+                    setattr(record, relation.name, None if value is None else by_value.get(str(value).lower(), None))
+
+    @classmethod
+    def build_joined_select(cls) -> str:
+        '''
+        Build a "SELECT ... FROM ..." statement that fetches the record along with all of its relations.
+
+        Each relation is LEFT JOINed on, so the record is returned even if the related records do not exist.
+        Related columns are aliased as "relation_name.column_name" so they can be told apart.
+        '''
+
+        columns = [f'{cls.table}.{column}' for column in cls.get_columns()]
+        joins = []
+
+        for relation in getattr(cls, 'relations', []):
+            # The relation name is quoted because names such as "order" are SQL keywords.
+            alias = f'"{relation.name}"'
+            columns += [f'{alias}.{column} AS "{relation.name}.{column}"' for column in relation.record.get_columns()]
+            joins.append(f'LEFT JOIN {relation.record.table} AS {alias} ON {alias}.{relation.foreign_column} = {cls.table}.{relation.column}')
+
+        return f'SELECT {", ".join(columns)} FROM {cls.table} ' + ' '.join(joins)
+
+    @classmethod
+    def from_joined_row(cls, row: tuple) -> Self:
+        '''
+        Create a record and its related records from a tuple row fetched by the build_joined_select() statement.
+
+        The row holds the record's own columns followed by those of each relation in turn.
+        Each class decodes its own slice of the row.
+        '''
+
+        own_columns = cls.get_columns()
+        record = cls(**cls.codec.row_decoder(tuple(own_columns))(row[:len(own_columns)]))
+        record.mark_saved()
+        offset = len(own_columns)
+
+        for relation in getattr(cls, 'relations', []):
+            related_columns = relation.record.get_columns()
+            related_row = row[offset:offset + len(related_columns)]
+            offset += len(related_columns)
+
+            # All the columns are NULL if the LEFT JOIN found no related record.
+            if related_row[related_columns.index(relation.foreign_column)] is None:
+                related = None
+            else:
+                related = relation.record(**relation.record.codec.row_decoder(tuple(related_columns))(related_row))
+                related.mark_saved()
+
+            setattr(record, relation.name, related)
+
+        return record
+
+    @classmethod
+    async def select_with_relations(cls, where: str = '1', params: dict = {}) -> List[Self]:
+        '''
+        Fetch the records that match a WHERE clause, each with its related records, in a single query.
+
+        Columns in the WHERE clause must be qualified with the table name, e.g. "drone.discord_id = :id".
+
+        If a relation matches more than one related record then only the first is kept.
+        Records are returned ordered by primary key.
         '''
 
         id_column = cls.get_id_column()
-        ids = await fetchcolumn(f'SELECT {id_column} FROM {cls.table} ORDER BY {id_column}')
+        id_index = cls.get_columns().index(id_column)
+        _, rows = await fetchrows(cls.build_joined_select() + f' WHERE {where} ORDER BY {cls.table}.{id_column}', params)
+        records: Dict[Any, Self] = {}
+
+        for row in rows:
+            if row[id_index] not in records:
+                records[row[id_index]] = cls.from_joined_row(row)
+
+        return list(records.values())
+
+    @classmethod
+    async def select_without_relations(cls, where: str = '1', params: dict = {}) -> List[Self]:
+        '''
+        Fetch the records that match a WHERE clause, without their related records, in a single query.
+
+        This is for callers that only need the records' own columns.  The records are not hydrated,
+        and their relations are left as None until load_relations() is called.
+
+        Columns in the WHERE clause must be qualified with the table name, e.g. "drone.discord_id = :id".
+        '''
+
+        columns, rows = await fetchrows(f'SELECT * FROM {cls.table} WHERE {where} ORDER BY {cls.table}.{cls.get_id_column()}', params)
+        decode = cls.codec.row_decoder(columns) if len(rows) > 0 else None
         records = []
 
-        for id in ids:
-            records.append(await cls.load(id))
+        for row in rows:
+            record = cls(**decode(row))
+            record.mark_saved()
+            record.relations_loaded = len(getattr(cls, 'relations', [])) == 0
+            records.append(record)
 
         return records
 
-    def build_sets(self) -> str:
+    @classmethod
+    async def load_relations(cls, records: List[Self]) -> None:
         '''
-        Build a string of "column = :column" for UPDATE statements.
+        Load the related records of records that were selected without them.
+
+        The relations are loaded with one joined query per batch of records.  Records that already have
+        their relations are left alone, so this can be called on any records that are about to need them.
         '''
 
-        columns = vars(self).keys()
-        ignore_properties = self.get_ignore_properties()
+        pending = [record for record in records if not record.relations_loaded]
+        id = cls.get_id_column()
+
+        for start in range(0, len(pending), BATCH_SIZE):
+            batch = pending[start:start + BATCH_SIZE]
+            params = {f'id{i}': record.get_id() for i, record in enumerate(batch)}
+            placeholders = ', '.join(f':{name}' for name in params)
+            loaded = {str(record.get_id()).lower(): record for record in await cls.select_with_relations(f'{cls.table}.{id} IN ({placeholders})', params)}
 
-        # Build a string of "col_1 = :col_1, col_2 = :col2" etc.
-        return ', '.join([f'{col} = :{col}' for col in columns if col not in ignore_properties])
+            for record in batch:
+                # A record that has since been deleted has no related records either.
+                found = loaded.get(str(record.get_id()).lower(), None)
+
+                for relation in getattr(cls, 'relations', []):
+                    setattr(record, relation.name, getattr(found, relation.name) if found is not None else None)
+
+                record.relations_loaded = True
 
     def build_insert_values(self) -> str:
         '''
@@ -226,13 +608,114 @@ class Record:
         insert_values = self.build_insert_values()
 
         await change(f'INSERT INTO {self.table} {insert_values}', self.serialize(vars(self)))
+        self.mark_saved()
+        self.written(exists=True)
 
     async def save(self) -> None:
         '''
         Update an existing record.
+
+        Only the columns that have changed since the record was loaded or last written are updated,
+        and nothing is written at all if none have.
+
+        Raises WriteConflict if another execution context has changed those columns, or deleted the record,
+        since it was loaded.
         '''
 
-        sets = self.build_sets()
-        id = self.get_id_column()
+        changes = self.get_changes()
+
+        if len(changes) == 0:
+            return
+
+        checked, params = self.get_update(changes)
+        rows = await change(self.build_update(list(changes), checked), params)
+
+        if len(checked) > 0:
+            check_written(self.table, rows, 1)
+
+        self.mark_saved()
+        self.written(exists=True)
+
+    @staticmethod
+    def group_by_columns(rows: List[dict]) -> Dict[Tuple[str, ...], List[dict]]:
+        '''
+        Group serialized records by the columns they contain, so that each group can share one statement.
+        '''
+
+        groups: Dict[Tuple[str, ...], List[dict]] = {}
+
+        for row in rows:
+            groups.setdefault(tuple(row.keys()), []).append(row)
+
+        return groups
+
+    @classmethod
+    async def insert_many(cls, records: List[Self]) -> None:
+        '''
+        Insert several new records.
+
+        Records with the same columns are inserted with a single executemany() call,
+        within the execution context's transaction.
+        '''
+
+        rows = [cls.serialize(vars(record)) for record in records]
+
+        for columns, group in cls.group_by_columns(rows).items():
+            column_names = ', '.join(columns)
+            variable_names = ', '.join([':' + col for col in columns])
+            await changemany(f'INSERT INTO {cls.table} ({column_names}) VALUES ({variable_names})', group)
+
+        for record in records:
+            record.mark_saved()
+            record.written(exists=True)
+
+    @classmethod
+    async def save_many(cls, records: List[Self]) -> None:
+        '''
+        Update several existing records.
+
+        As with save(), only changed columns are updated, records without changes are skipped,
+        and WriteConflict is raised if any of the records have been changed by someone else since they were loaded.
+        Records with the same changed columns are updated with a single executemany() call,
+        within the execution context's transaction.
+        '''
+
+        changed = []
+        groups: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], List[dict]] = {}
+
+        for record in records:
+            changes = record.get_changes()
+
+            if len(changes) > 0:
+                checked, params = record.get_update(changes)
+                groups.setdefault((tuple(changes), tuple(checked)), []).append(params)
+                changed.append(record)
+
+        for (columns, checked), group in groups.items():
+            written = await changemany(cls.build_update(list(columns), list(checked)), group)
+
+            if len(checked) > 0:
+                check_written(cls.table, written, len(group))
+
+        for record in changed:
+            record.mark_saved()
+            record.written(exists=True)
+
+    @classmethod
+    async def delete_many(cls, records: List[Self]) -> None:
+        '''
+        Delete several records with a single executemany() call.
+
+        As with delete(), raises WriteConflict if any loaded record has since been deleted by someone else.
+        '''
+
+        if len(records) == 0:
+            return
+
+        rows = await changemany(f'DELETE FROM {cls.table} WHERE {cls.get_id_column()} = :id', [{'id': record.get_id()} for record in records])
+
+        if all(record.is_saved() for record in records):
+            check_written(cls.table, rows, len(records))
 
-        await change(f'UPDATE {self.table} SET {sets} WHERE {id} = :{id}', self.serialize(vars(self)))
+        for record in records:
+            record.written(exists=False)
@@ -0,0 +1,370 @@
+from collections import OrderedDict
+from copy import copy, deepcopy
+from dataclasses import dataclass
+from typing import Any, Dict, List, Set, Tuple
+from src.db.connection import access, cache_changes
+
+CACHE_SIZE = 1000
+'''
+The default maximum number of records held by a RecordCache.
+'''
+
+
+@dataclass
+class RecordCacheStats:
+    '''
+    Hit, miss and eviction counts for a record cache.
+    '''
+
+    hits: int = 0
+    '''
+    The number of lookups answered from the cache.
+    '''
+
+    misses: int = 0
+    '''
+    The number of lookups that had to go to the database.
+    '''
+
+    evictions: int = 0
+    '''
+    The number of records removed to make room for others.
+    '''
+
+    absent: int = 0
+    '''
+    The number of lookups answered by knowing that the record does not exist.
+    '''
+
+
+def key(value: Any) -> str:
+    '''
+    Normalise a column value, treating values such as 123 and '123' as equal, as the identity map does.
+    '''
+
+    return str(value).lower()
+
+
+class RecordCache:
+    '''
+    A process-wide cache of records, shared by all execution contexts and keyed by the records' identity columns.
+
+    The cache holds copies of records: get() returns a new copy each time, so that an execution context
+    can change its record without affecting the cache or any other execution context.
+
+    Changes reach the cache once the transaction that made them has committed, see CacheChanges.
+    A record that is cached is then updated with the written record's values, and a deleted or forgotten
+    record is removed.  Records that are not cached yet are added when they are next looked up.
+
+    Only execution contexts that have not changed anything use the cache, because an execution context
+    that has written must see its own uncommitted changes, and must not share them until they are committed.
+
+    At most `size` records are held, and the least recently used record is evicted to make room.
+
+    Once load_keys() has been called, the cache also knows the primary key of every record in the table,
+    which is kept up to date as records are inserted and deleted.  Lookups by primary key can then tell that
+    a record does not exist without querying the database.
+
+    Set self_check to have Record classes also load cached records from the database and raise an error
+    if the cached copy differs.  This is for tests.
+    '''
+
+    self_check = False
+
+    def __init__(self, table: str, identity_columns: List[str], size: int = CACHE_SIZE) -> None:
+        self.table = table
+        self.identity_columns = identity_columns
+        self.size = size
+        self.records: OrderedDict[str, Any] = OrderedDict()
+        self.index: Dict[Tuple[str, str], str] = {}
+        self.stats = RecordCacheStats()
+        self.generation = 0
+        '''
+        Incremented by every change, so that a record loaded before a change is not added after it.
+        '''
+
+        self.keys: Set[str] | None = None
+        '''
+        The primary keys of all the records in the table, or None if they have not been loaded.
+        '''
+
+        caches[table] = self
+
+    def usable(self) -> bool:
+        '''
+        Return true if the execution context may read from and add to the cache, i.e. it has not changed anything.
+        '''
+
+        context_access = access.get()
+        changes = cache_changes.get()
+
+        return context_access is not None and not context_access.writing and changes is not None and changes.empty()
+
+    def primary_key(self, column: str, value: Any) -> str | None:
+        '''
+        Get the key under which a record is cached, given the value of any of its identity columns.
+        '''
+
+        if column == self.identity_columns[0]:
+            return key(value)
+
+        return self.index.get((column, key(value)), None)
+
+    def contains(self, record: Any) -> bool:
+        return key(getattr(record, self.identity_columns[0])) in self.records
+
+    @staticmethod
+    def values(record: Any) -> Dict[str, Any]:
+        '''
+        Copy the properties of a record, leaving out its related records and whether they were loaded.
+        '''
+
+        relations = [relation.name for relation in getattr(type(record), 'relations', [])] + ['relations_loaded']
+
+        return {name: deepcopy(value) for name, value in vars(record).items() if name not in relations}
+
+    def load_keys(self, values: List[Any], generation: int) -> bool:
+        '''
+        Set the primary keys of all the records in the table.
+
+        Returns false, leaving the keys unset, if the cache has changed since `generation` was read, before the
+        keys were selected, because a record inserted or deleted in the meantime might then be missing.
+        '''
+
+        if generation != self.generation:
+            return False
+
+        self.keys = set(key(value) for value in values)
+
+        return True
+
+    def absent(self, value: Any) -> bool:
+        '''
+        Return true if it is known that there is no record with the given primary key.
+        '''
+
+        if self.keys is None or key(value) in self.keys:
+            return False
+
+        self.stats.absent += 1
+
+        return True
+
+    def set_exists(self, primary_key: str, exists: bool) -> None:
+        '''
+        Note that a record has been inserted or deleted.
+        '''
+
+        self.generation += 1
+
+        if self.keys is None:
+            return
+
+        if exists:
+            self.keys.add(primary_key)
+        else:
+            self.keys.discard(primary_key)
+
+    def get(self, column: str, value: Any) -> Any | None:
+        '''
+        Get a copy of a cached record, or None if it is not cached.
+        '''
+
+        primary_key = self.primary_key(column, value)
+        record = self.records.get(primary_key, None) if primary_key is not None else None
+
+        if record is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        self.records.move_to_end(primary_key)
+
+        return deepcopy(record)
+
+    def add(self, record: Any, generation: int) -> None:
+        '''
+        Cache a copy of a record that was loaded from the database.
+
+        The record is not added if the cache has changed since `generation` was read, before the record was loaded,
+        because the record might then be out of date.
+        '''
+
+        if generation != self.generation or not self.usable():
+            return
+
+        self.put(deepcopy(record))
+
+    def put(self, record: Any) -> None:
+        '''
+        Cache a record, replacing any cached copy and evicting the least recently used records if the cache is full.
+        '''
+
+        primary_key = key(getattr(record, self.identity_columns[0]))
+        self.remove(primary_key)
+        self.records[primary_key] = record
+
+        for column in self.identity_columns[1:]:
+            self.index[(column, key(getattr(record, column)))] = primary_key
+
+        while len(self.records) > self.size:
+            self.remove(next(iter(self.records)))
+            self.stats.evictions += 1
+
+    def remove(self, primary_key: str) -> None:
+        record = self.records.pop(primary_key, None)
+
+        if record is not None:
+            for column in self.identity_columns[1:]:
+                self.index.pop((column, key(getattr(record, column))), None)
+
+    def update(self, primary_key: str, values: Dict[str, Any]) -> None:
+        '''
+        Write through the values of a record that has been written, if the record is cached.
+
+        The cached record keeps its related records, which are kept up to date by forgetting the record
+        whenever they change.  If a column that relates the record to another has changed then the
+        cached record is removed instead, to be loaded again with its new related record.
+        '''
+
+        self.generation += 1
+        cached = self.records.get(primary_key, None)
+
+        if cached is None:
+            return
+
+        for relation in getattr(type(cached), 'relations', []):
+            if key(getattr(cached, relation.column)) != key(values[relation.column]):
+                self.remove(primary_key)
+                return
+
+        updated = copy(cached)
+        vars(updated).update(values)
+        self.put(updated)
+
+    def discard(self, column: str, value: Any) -> None:
+        '''
+        Remove a record from the cache, given the value of any of its identity columns.
+        '''
+
+        self.generation += 1
+        primary_key = self.primary_key(column, value)
+
+        if primary_key is not None:
+            self.remove(primary_key)
+
+    def clear(self) -> None:
+        '''
+        Remove every record, e.g. after the database has been changed by other means.
+        '''
+
+        self.generation += 1
+        self.records.clear()
+        self.index.clear()
+        self.keys = None
+
+    def written(self, record: Any, exists: bool) -> None:
+        '''
+        Note that a record has been inserted, saved or deleted by the execution context.
+        '''
+
+        changes = cache_changes.get()
+
+        if changes is None:
+            self.discard(self.identity_columns[0], getattr(record, self.identity_columns[0]))
+            self.set_exists(key(getattr(record, self.identity_columns[0])), exists)
+        else:
+            changes.write(self, record, exists)
+
+    def forget(self, column: str, value: Any) -> None:
+        '''
+        Note that the execution context has changed a record by other means, e.g. by changing a related record.
+        '''
+
+        changes = cache_changes.get()
+
+        if changes is None:
+            self.discard(column, value)
+        else:
+            changes.forget(self, column, value)
+
+
+caches: Dict[str, RecordCache] = {}
+'''
+Every record cache, keyed by table name.
+'''
+
+
+def forget(table: str, column: str, value: Any) -> None:
+    '''
+    Remove a record from the cache for its table once the execution context has committed, if the table has a cache.
+    '''
+
+    cache = caches.get(table, None)
+
+    if cache is not None:
+        cache.forget(column, value)
+
+
+def clear_caches() -> None:
+    '''
+    Remove every record from every cache.
+    '''
+
+    for cache in caches.values():
+        cache.clear()
+
+
+class CacheChanges:
+    '''
+    The cached records that an execution context has written or forgotten.
+
+    These are applied to the caches by apply() once the execution context's transaction has committed.
+    Applying them any earlier would let other execution contexts see changes that may yet be rolled back.
+
+    A record that has been forgotten stays forgotten even if it is written afterwards, because the copy written
+    may still hold related records from before the change that caused it to be forgotten.
+    '''
+
+    def __init__(self) -> None:
+        self.forgotten: Set[Tuple[RecordCache, str, str]] = set()
+        self.written: Dict[Tuple[RecordCache, str], Dict[str, Any]] = {}
+        self.exists: Dict[Tuple[RecordCache, str], bool] = {}
+
+    def empty(self) -> bool:
+        return len(self.forgotten) == 0 and len(self.written) == 0 and len(self.exists) == 0
+
+    def forget(self, cache: RecordCache, column: str, value: Any) -> None:
+        self.forgotten.add((cache, column, key(value)))
+
+    def write(self, cache: RecordCache, record: Any, exists: bool) -> None:
+        keys = [(cache, column, key(getattr(record, column))) for column in cache.identity_columns]
+        self.exists[(cache, keys[0][2])] = exists
+
+        if not exists or any(k in self.forgotten for k in keys):
+            self.forgotten.update(keys)
+        elif cache.contains(record):
+            # Copy the record's values now, as they were written, in case it is changed again without being written.
+            self.written[(cache, keys[0][2])] = cache.values(record)
+        else:
+            # The record is not cached, but might be added by another execution context before this one commits.
+            self.forgotten.add(keys[0])
+
+    def apply(self) -> None:
+        '''
+        Update the caches with the execution context's committed changes.
+        '''
+
+        for cache, column, value in self.forgotten:
+            cache.discard(column, value)
+
+        for (cache, primary_key), values in self.written.items():
+            if not any((cache, column, key(values[column])) in self.forgotten for column in cache.identity_columns):
+                cache.update(primary_key, values)
+
+        for (cache, primary_key), exists in self.exists.items():
+            cache.set_exists(primary_key, exists)
+
+        self.forgotten.clear()
+        self.written.clear()
+        self.exists.clear()
@@ -2,7 +2,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, List
 from discord import Guild
-from src.db.record import Record
+from src.db.codec import Epoch, to_epoch
+from src.db.record import forget, Record
 from src.db.database import fetchcolumn
 
 
@@ -28,11 +29,15 @@ class Timer(Record):
     The DroneOS parameter being timed.
     '''
 
-    end_time: datetime
+    end_time: Epoch
     '''
     The time at which the timer expires.
     '''
 
+    def written(self, exists: bool) -> None:
+        # The drone's timer has changed, so reload the drone the next time it is needed.
+        forget('drone', 'discord_id', self.discord_id)
+
     @classmethod
     async def all_elapsed(cls, guild: Guild) -> List[Any]:
         '''
@@ -42,7 +47,7 @@ class Timer(Record):
         # Import here to avoid a circular import.
         from src.drone_member import DroneMember
 
-        ids = await fetchcolumn('SELECT discord_id FROM timer WHERE end_time >= datetime("now")')
+        ids = await fetchcolumn('SELECT discord_id FROM timer WHERE end_time <= :now', {'now': to_epoch(datetime.now())})
         records = []
 
         for id in ids:
@@ -0,0 +1,196 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+from src.log import log, log_contexts
+
+STATEMENT_BUDGET = 20
+'''
+The number of statements an event may execute before a warning is logged.
+
+An event that goes over budget usually loads records one at a time in a loop.
+'''
+
+
+@dataclass
+class StatementStats:
+    '''
+    Counts and timings for a group of SQL statements.
+    '''
+
+    count: int = 0
+    '''
+    The number of statements executed.
+    '''
+
+    rows: int = 0
+    '''
+    The number of rows fetched or changed.
+    '''
+
+    total_time: float = 0.0
+    '''
+    The total time spent executing the statements, in seconds.
+    '''
+
+    max_time: float = 0.0
+    '''
+    The longest time spent executing a single statement, in seconds.
+    '''
+
+    def add(self, rows: int, duration: float) -> None:
+        '''
+        Count a statement.
+        '''
+
+        self.count += 1
+        self.rows += rows
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+
+
+@dataclass
+class EventStats:
+    '''
+    Statement counts and timings for all the runs of one kind of event.
+    '''
+
+    events: int = 0
+    '''
+    The number of times the event has run.
+    '''
+
+    statements: StatementStats = field(default_factory=StatementStats)
+    '''
+    The statements executed by all runs of the event.
+    '''
+
+    max_statements: int = 0
+    '''
+    The most statements executed by a single run of the event.
+    '''
+
+    over_budget: int = 0
+    '''
+    The number of runs that executed more than STATEMENT_BUDGET statements.
+    '''
+
+
+class EventTrace:
+    '''
+    The statements executed by a single event, i.e. one execution context set up by connect().
+
+    Statements are grouped by fingerprint and by the log context in which they were executed.
+    '''
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.statements = StatementStats()
+        self.by_fingerprint: Dict[str, StatementStats] = {}
+        self.by_context: Dict[str, StatementStats] = {}
+
+    def record(self, query: str, rows: int, duration: float) -> None:
+        '''
+        Count a statement executed by the event.
+        '''
+
+        self.statements.add(rows, duration)
+        self.by_fingerprint.setdefault(fingerprint(query), StatementStats()).add(rows, duration)
+        self.by_context.setdefault(context_name(), StatementStats()).add(rows, duration)
+
+
+def fingerprint(query: str) -> str:
+    '''
+    Reduce a statement to its shape, so that statements that differ only in their values are grouped together.
+
+    Whitespace is collapsed, literal strings and numbers are replaced by "?", and lists of placeholders become "(...)",
+    whether the placeholders are "?", numbered like "?1" or named like ":id0".
+    '''
+
+    query = re.sub(r'\s+', ' ', query).strip()
+    query = re.sub(r"'(?:[^']|'')*'", '?', query)
+    query = re.sub(r'\?\d+', '?', query)
+    query = re.sub(r'\b\d+\b', '?', query)
+
+    return re.sub(r'\( ?(?:\?|:\w+)(?: ?, ?(?:\?|:\w+))* ?\)', '(...)', query)
+
+
+def context_name() -> str:
+    '''
+    Describe the current log context, leaving out the arguments that some contexts include.
+
+    For example, "on_message(from=..., content=...) - optimize_speech" becomes "on_message - optimize_speech".
+    '''
+
+    return ' - '.join(name.split('(')[0] for name in log_contexts.get()) or '(none)'
+
+
+class QueryTracer:
+    '''
+    Aggregates the statements executed by every event since the bot started.
+    '''
+
+    def __init__(self) -> None:
+        self.events: Dict[str, EventStats] = {}
+        self.by_fingerprint: Dict[str, StatementStats] = {}
+        self.by_context: Dict[str, StatementStats] = {}
+
+    def finish(self, trace: EventTrace) -> None:
+        '''
+        Add a finished event's statements to the totals.
+        '''
+
+        stats = self.events.setdefault(trace.name, EventStats())
+        stats.events += 1
+        stats.max_statements = max(stats.max_statements, trace.statements.count)
+        merge(stats.statements, trace.statements)
+
+        for key, statements in trace.by_fingerprint.items():
+            merge(self.by_fingerprint.setdefault(key, StatementStats()), statements)
+
+        for key, statements in trace.by_context.items():
+            merge(self.by_context.setdefault(key, StatementStats()), statements)
+
+        if trace.statements.count > STATEMENT_BUDGET:
+            stats.over_budget += 1
+            log.warning(f'{trace.name} executed {trace.statements.count} statements, more than the budget of {STATEMENT_BUDGET}')
+
+    def report(self, limit: int = 5) -> List[str]:
+        '''
+        Summarise the busiest events and log contexts and the most expensive statements, as lines of text.
+        '''
+
+        lines = []
+        events = sorted(self.events.items(), key=lambda item: item[1].statements.total_time, reverse=True)
+
+        for name, stats in events[:limit]:
+            average = stats.statements.count / stats.events
+            lines.append(f'{name}: {stats.events} runs, {average:.1f} statements/run (max {stats.max_statements}, {stats.over_budget} over budget), {stats.statements.total_time * 1000:.0f} ms')
+
+        contexts = sorted(self.by_context.items(), key=lambda item: item[1].count, reverse=True)
+
+        for name, stats in contexts[:limit]:
+            lines.append(f'{name}: {stats.count} statements, {stats.rows} rows, {stats.total_time * 1000:.0f} ms')
+
+        statements = sorted(self.by_fingerprint.items(), key=lambda item: item[1].total_time, reverse=True)
+
+        for query, stats in statements[:limit]:
+            lines.append(f'{stats.count}x {stats.total_time * 1000:.0f} ms (max {stats.max_time * 1000:.1f} ms): {query[:100]}')
+
+        return lines
+
+
+def merge(total: StatementStats, stats: StatementStats) -> None:
+    '''
+    Add one set of statement counts and timings to another.
+    '''
+
+    total.count += stats.count
+    total.rows += stats.rows
+    total.total_time += stats.total_time
+    total.max_time = max(total.max_time, stats.max_time)
+
+
+query_tracer = QueryTracer()
+'''
+The statements executed by all events, for reporting through the ai_status command.
+'''
@@ -2,6 +2,7 @@ from typing import Type
 from types import TracebackType
 from sqlite3 import Cursor
 from src.db.connection import cursor, transactions
+from src.db.executor import run_on_db_thread
 
 
 class Transaction:
@@ -12,23 +13,41 @@ class Transaction:
 
     Automatic usage:
 
-    with Transaction():
+    async with Transaction():
         # ... perform database operations ...
 
+    The transaction's statements are then run on the database thread.
+    A plain "with Transaction():" runs them directly instead.
+
     Manual usage:
 
     transaction = Transaction()
     transaction.begin()
     transaction.commit()
+
+    A lazy transaction does not issue BEGIN until start() is called, which should be done just before
+    its first change.  Until then statements run in autocommit mode and take no locks, and if it is never
+    started then committing or rolling it back does nothing.  A transaction nested in a lazy transaction
+    starts it first, since a savepoint would otherwise open a deferred transaction of its own.  Within connect(),
+    nest with "async with", which takes the scheduler's write lock before starting the lazy transaction.
+
+    transaction = Transaction(lazy=True)
+    transaction.begin()
+    # ... read from the database ...
+    transaction.start()
+    # ... change the database ...
+    transaction.commit()
     '''
 
     next_savepoint_id = 1
 
-    def __init__(self) -> None:
+    def __init__(self, lazy: bool = False) -> None:
         self.cursor = cursor.get()
         self.transactions = transactions.get()
         self.completed = False
         self.savepoint_id = 0
+        self.lazy = lazy
+        self.started = False
 
     def __enter__(self) -> Cursor:
         self.begin()
@@ -45,22 +64,52 @@ class Transaction:
             else:
                 self.commit()
 
+    async def __aenter__(self) -> Cursor:
+        if len(self.transactions) > 0 and not self.transactions[0].started:
+            # Import here to avoid a circular import.
+            from src.db.database import acquire_write_access
+
+            # Take the write lock before the lazy transaction begins, as a change would.
+            await acquire_write_access()
+
+        await run_on_db_thread(self.begin)
+        return self.cursor
+
+    async def __aexit__(self, exception_type: Type[BaseException] | None, exception_value: BaseException | None, traceback: TracebackType | None):
+        await run_on_db_thread(self.__exit__, exception_type, exception_value, traceback)
+
     def begin(self) -> None:
         '''
         Start the transaction.
         '''
 
         # If this is the first transaction on the connection then begin a transaction, else make a savepoint.
+        # A lazy transaction leaves beginning until start() is called.
         if len(self.transactions) == 0:
-            self.cursor.execute('BEGIN TRANSACTION')
+            if not self.lazy:
+                self.cursor.execute('BEGIN TRANSACTION')
+                self.started = True
         else:
+            self.transactions[0].start()
             self.cursor.execute('SAVEPOINT :id', {'id': Transaction.next_savepoint_id})
+            self.started = True
 
-        # Add the savepoint ID to the stack.
+        # Add the transaction to the stack.
         self.savepoint_id = Transaction.next_savepoint_id
-        self.transactions.append(self.savepoint_id)
+        self.transactions.append(self)
         Transaction.next_savepoint_id += 1
 
+    def start(self) -> None:
+        '''
+        Issue the BEGIN of a lazy transaction, if it has not been issued yet.
+
+        The transaction begins immediately, taking SQLite's write lock, because it is about to write.
+        '''
+
+        if not self.started and not self.completed:
+            self.cursor.execute('BEGIN IMMEDIATE TRANSACTION')
+            self.started = True
+
     def commit(self):
         '''
         Commit any changes made to the database.
@@ -76,11 +125,12 @@ class Transaction:
         if len(self.transactions) == 0:
             raise RuntimeError('Transaction stack is empty')
 
-        if self.transactions.pop() != self.savepoint_id:
+        if self.transactions.pop() is not self:
             raise RuntimeError('Transactions improperly nested')
 
         if len(self.transactions) == 0:
-            self.cursor.execute('COMMIT TRANSACTION')
+            if self.started:
+                self.cursor.execute('COMMIT TRANSACTION')
         else:
             self.cursor.execute('RELEASE SAVEPOINT :id', {'id': self.savepoint_id})
 
@@ -101,11 +151,12 @@ class Transaction:
         if len(self.transactions) == 0:
             raise RuntimeError('Transaction stack is empty')
 
-        if self.transactions.pop() != self.savepoint_id:
+        if self.transactions.pop() is not self:
             raise RuntimeError('Transactions improperly nested')
 
         if len(self.transactions) == 0:
-            self.cursor.execute('ROLLBACK TRANSACTION')
+            if self.started:
+                self.cursor.execute('ROLLBACK TRANSACTION')
         else:
             self.cursor.execute('ROLLBACK TO SAVEPOINT :id', {'id': self.savepoint_id})
 
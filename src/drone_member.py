@@ -58,15 +58,17 @@ class DroneMember:
         self._member = member
 
     @classmethod
-    async def create(cls, member: discord.Member, drone: Drone | None = None) -> Self:
+    async def create(cls, member: discord.Member, drone: Drone | None = None, with_relations: bool = True) -> Self:
         '''
         Factory for creating DroneMembers.
 
         This is necessary because __init__ cannot be async.
+
+        Pass with_relations=False if only the drone's own columns are needed, see Drone.find().
         '''
 
         result = cls(member)
-        result.drone = drone or await Drone.find(member=member)
+        result.drone = drone or await Drone.find(member=member, with_relations=with_relations)
 
         return result
 
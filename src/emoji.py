@@ -1,3 +1,6 @@
+from typing import Dict, Tuple
+from discord import Emoji, Guild
+
 # HexCorp Discord emoji names
 
 BATTERY_FULL = "hexbatteryfull"
@@ -5,3 +8,50 @@ BATTERY_MID = "hexbatterymedium"
 BATTERY_LOW = "hexbatterylow"
 BATTERY_EMPTY = "hexbatteryempty"
 DRONE_EMOJI = "hexdroneemoji"
+
+emoji_indexes: Dict[int, Tuple[Guild, Dict[str, Emoji]]] = {}
+'''
+Each guild's emojis by name, keyed by guild ID, along with the guild they were indexed from.
+
+Each index is built from guild.emojis when it is first needed, and is thrown away by forget_emojis()
+whenever the guild's emojis change, so that it is rebuilt on next use.
+'''
+
+
+def emoji_index(guild: Guild) -> Dict[str, Emoji]:
+    '''
+    Get a guild's emojis by name.
+
+    A new dictionary is built whenever the guild's emojis change, so anything derived from an index
+    can tell that it is out of date by checking whether the index is still the same object.
+    If several emojis have the same name then the first in guild.emojis is kept, as discord.utils.get() would.
+    '''
+
+    indexed_guild, index = emoji_indexes.get(guild.id, (None, None))
+
+    # A guild object that has been replaced, e.g. after reconnecting, is indexed afresh.
+    if indexed_guild is not guild:
+        index = {}
+
+        for emoji in guild.emojis:
+            index.setdefault(emoji.name, emoji)
+
+        emoji_indexes[guild.id] = (guild, index)
+
+    return index
+
+
+def get_emoji(guild: Guild, name: str) -> Emoji | None:
+    '''
+    Find a guild's emoji by name, or return None if there is no such emoji.
+    '''
+
+    return emoji_index(guild).get(name, None)
+
+
+def forget_emojis(guild: Guild) -> None:
+    '''
+    Throw away the index of a guild's emojis, after its emojis have been updated.
+    '''
+
+    emoji_indexes.pop(guild.id, None)
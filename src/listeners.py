@@ -0,0 +1,224 @@
+import re
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, FrozenSet, Iterable, Iterator, List, Pattern, Tuple
+
+import discord
+
+from src.db.data_objects import Drone
+
+ListenerType = Callable[[discord.Message, Any | None], Coroutine[Any, Any, bool | None]]
+
+
+@dataclass(frozen=True)
+class ListenerConditions:
+    '''
+    Cheap conditions that a message must meet for a message listener to possibly act on it.
+
+    These let the dispatcher skip listeners without calling them.  They are only a first check,
+    so a listener must still check everything it relies on, e.g. when called directly by a test.
+    '''
+
+    channels: FrozenSet[str] | None = None
+    '''
+    The names of the only channels that the listener acts in, or None for any channel.
+    '''
+
+    categories: FrozenSet[str] | None = None
+    '''
+    The names of the only channel categories that the listener acts in, or None for any category.
+    '''
+
+    excluded_categories: FrozenSet[str] = frozenset()
+    '''
+    The names of channel categories that the listener does not act in.
+    '''
+
+    drone: bool = False
+    '''
+    True if the listener only acts on messages from drones.
+    '''
+
+    flags: Tuple[str, ...] = ()
+    '''
+    The names of Drone flags, of which the message's drone must have at least one set.  Implies `drone`.
+    '''
+
+    content: Pattern | None = None
+    '''
+    A pattern that the start of the original message content must match, or None for any content.
+    '''
+
+    def needs_drone(self) -> bool:
+        return self.drone or len(self.flags) > 0
+
+    def allow_message(self, message: discord.Message) -> bool:
+        '''
+        Return true if the listener might act on the message, regardless of who sent it.
+        '''
+
+        category = getattr(getattr(message.channel, 'category', None), 'name', None)
+
+        if self.categories is not None and category not in self.categories:
+            return False
+
+        if category in self.excluded_categories:
+            return False
+
+        return self.content is None or self.content.match(message.content) is not None
+
+    def allow_drone(self, drone: Drone | None) -> bool:
+        '''
+        Return true if the listener might act on a message from the given drone, or from a non-drone if None.
+        '''
+
+        if self.needs_drone() and drone is None:
+            return False
+
+        return not self.flags or any(getattr(drone, flag) for flag in self.flags)
+
+
+NO_CONDITIONS = ListenerConditions()
+
+
+def listens(channels: Iterable[str] | None = None,
+            categories: Iterable[str] | None = None,
+            excluded_categories: Iterable[str] = (),
+            drone: bool = False,
+            flags: Iterable[str] = (),
+            content: str | Pattern | None = None) -> Callable[[ListenerType], ListenerType]:
+    '''
+    Declare the conditions under which a message listener might act on a message, see ListenerConditions.
+
+    The listener itself is not changed, so it can still be called directly.
+    '''
+
+    for flag in flags:
+        if not hasattr(Drone, flag):
+            raise ValueError(f'Drone has no flag {flag}')
+
+    conditions = ListenerConditions(
+        channels=frozenset(channels) if channels is not None else None,
+        categories=frozenset(categories) if categories is not None else None,
+        excluded_categories=frozenset(excluded_categories),
+        drone=drone,
+        flags=tuple(flags),
+        content=re.compile(content) if isinstance(content, str) else content,
+    )
+
+    def decorator(func: ListenerType) -> ListenerType:
+        func.listener_conditions = conditions
+
+        return func
+
+    return decorator
+
+
+def conditions(listener: ListenerType) -> ListenerConditions:
+    '''
+    Get the conditions declared for a message listener with listens(), or NO_CONDITIONS if there are none.
+    '''
+
+    declared = getattr(listener, 'listener_conditions', None)
+
+    # Check the type, since a mock listener has every attribute.
+    return declared if isinstance(declared, ListenerConditions) else NO_CONDITIONS
+
+
+@dataclass(eq=False)
+class Listener:
+    '''
+    A message listener in a ListenerTable, with its conditions and how often it has been run or skipped.
+    '''
+
+    function: ListenerType
+    conditions: ListenerConditions
+
+    runs: int = 0
+    '''
+    The number of messages that the listener has been called for.
+    '''
+
+    skips: int = 0
+    '''
+    The number of messages that the listener was not called for because they did not meet its conditions.
+    '''
+
+    @property
+    def name(self) -> str:
+        return self.function.__name__
+
+
+class ListenerTable:
+    '''
+    Message listeners, in the order that they are called, looked up by the channel that a message was sent in.
+
+    Listeners with channel conditions are only considered for messages in those channels.  The listeners for
+    each channel are worked out once and kept, so dispatching a message only checks the remaining conditions
+    of the listeners that can possibly apply.  The drone that sent the message is loaded once, and only if
+    one of those listeners needs it.
+
+    Iterating over the table gives the listener functions, e.g. for the ai_status report.
+    '''
+
+    def __init__(self, listeners: Iterable[ListenerType]) -> None:
+        self.listeners = [Listener(listener, conditions(listener)) for listener in listeners]
+        self.by_channel: Dict[str | None, List[Listener]] = {}
+        '''
+        The listeners that can apply in each channel, keyed by channel name.
+        '''
+
+    def __iter__(self) -> Iterator[ListenerType]:
+        return (listener.function for listener in self.listeners)
+
+    def __len__(self) -> int:
+        return len(self.listeners)
+
+    def for_channel(self, name: str | None) -> List[Listener]:
+        '''
+        Get the listeners that can apply to messages in the named channel.
+        '''
+
+        listeners = self.by_channel.get(name, None)
+
+        if listeners is None:
+            listeners = [listener for listener in self.listeners if listener.conditions.channels is None or name in listener.conditions.channels]
+            self.by_channel[name] = listeners
+
+        return listeners
+
+    async def dispatch(self, message: discord.Message) -> AsyncIterator[ListenerType]:
+        '''
+        Yield the listeners that might act on a message, in order, counting each as run or skipped.
+
+        Listeners that cannot apply in the message's channel at all are not counted.
+        '''
+
+        candidates = self.for_channel(getattr(message.channel, 'name', None))
+        drone = None
+        drone_loaded = False
+
+        for listener in candidates:
+            allowed = listener.conditions.allow_message(message)
+
+            # Only load the drone once it is needed.
+            if allowed and listener.conditions.needs_drone():
+                if not drone_loaded:
+                    drone = await Drone.find(discord_id=message.author.id, with_relations=False)
+                    drone_loaded = True
+
+                allowed = listener.conditions.allow_drone(drone)
+
+            if not allowed:
+                listener.skips += 1
+                continue
+
+            listener.runs += 1
+
+            yield listener.function
+
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        '''
+        Get the number of times that each listener has been run and skipped, keyed by listener name.
+        '''
+
+        return {listener.name: (listener.runs, listener.skips) for listener in self.listeners}
@@ -88,14 +88,11 @@ class LogContext:
         self.name = name
 
     def __enter__(self) -> None:
-        c = log_contexts.get()
-        c.append(self.name)
-        log_contexts.set(c)
+        # Build a new list rather than appending, so that concurrent execution contexts do not share one.
+        self.token = log_contexts.set(log_contexts.get() + [self.name])
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
-        c = log_contexts.get()
-        c.pop()
-        log_contexts.set(c)
+        log_contexts.reset(self.token)
 
 
 def log_context(func):
@@ -1,6 +1,5 @@
 import discord
 import src.roles as roles
-from discord.utils import get
 from typing import List
 import random
 from src.log import log
@@ -11,7 +10,7 @@ DELETE_TIMEOUT = 60 * 60
 
 async def delete_request(message: discord.Message, reject_message=None):
     # do not delete messages by moderators
-    if any([get(message.guild.roles, name=moderation_role) in message.author.roles for moderation_role in roles.MODERATION_ROLES]):
+    if roles.has_any_role(message.author, roles.MODERATION_ROLES):
         return
 
     await message.delete()
@@ -1,6 +1,5 @@
 import discord
-from discord.utils import get
-from typing import List
+from typing import Dict, List, Tuple
 
 INITIATE = 'Initiate'
 ASSOCIATE = 'Associate'
@@ -31,9 +30,65 @@ NITRO_BOOSTER = '⬡-Integrated'
 EVERYONE = '@everyone'
 
 
+role_indexes: Dict[int, Tuple[discord.Guild, Dict[str, discord.Role]]] = {}
+'''
+Each guild's roles by name, keyed by guild ID, along with the guild they were indexed from.
+
+Each index is built from guild.roles when it is first needed, and is thrown away by forget_roles()
+whenever the guild's roles change, so that it is rebuilt on next use.
+'''
+
+
+def get_role(guild: discord.Guild, name: str) -> discord.Role | None:
+    '''
+    Find a guild's role by name, or return None if there is no such role.
+
+    If several roles have the same name then the first in guild.roles is returned, as discord.utils.get() would.
+    '''
+
+    indexed_guild, index = role_indexes.get(guild.id, (None, None))
+
+    # A guild object that has been replaced, e.g. after reconnecting, is indexed afresh.
+    if indexed_guild is not guild:
+        index = {}
+
+        for role in guild.roles:
+            index.setdefault(role.name, role)
+
+        role_indexes[guild.id] = (guild, index)
+
+    return index.get(name, None)
+
+
+def fetch_role(guild: discord.Guild, name: str) -> discord.Role:
+    '''
+    Find a guild's role by name.
+
+    Raise an Exception if there is no such role.
+    '''
+
+    role = get_role(guild, name)
+
+    if role is None:
+        raise Exception(f'Role {name} not found')
+
+    return role
+
+
+def forget_roles(guild: discord.Guild) -> None:
+    '''
+    Throw away the index of a guild's roles, after a role has been created, updated or deleted.
+    '''
+
+    role_indexes.pop(guild.id, None)
+
+
 def has_role(member: discord.Member, role: str) -> bool:
-    return get(member.roles, name=role) is not None
+    # Member.get_role() searches the member's sorted role IDs, rather than building the member.roles list.
+    guild_role = get_role(member.guild, role)
+
+    return guild_role is not None and member.get_role(guild_role.id) is not None
 
 
 def has_any_role(member: discord.Member, roles: List[str]) -> bool:
-    return any([has_role(member, role) for role in roles])
+    return any(has_role(member, role) for role in roles)
@@ -1,4 +1,9 @@
+import asyncio
 import io
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List
 
 import discord
 
@@ -7,6 +12,139 @@ from src.log import log
 from src.resources import DRONE_AVATAR
 
 
+WEBHOOK_NAME = "AI Webhook"
+'''
+The name of the webhooks that the AI creates to proxy messages.  Only webhooks with this name are used.
+'''
+
+WEBHOOK_POOL_SIZE = 3
+'''
+The default maximum number of webhooks that the AI creates in a busy channel, to spread messages across their rate limits.
+'''
+
+WEBHOOK_RATE_LIMIT = 5
+'''
+The number of messages that a webhook is expected to send per WEBHOOK_RATE_LIMIT_PERIOD before Discord rate limits it.
+'''
+
+WEBHOOK_RATE_LIMIT_PERIOD = 2.0
+'''
+The length of a webhook's rate limit period, in seconds.
+'''
+
+
+@dataclass
+class WebhookCacheStats:
+    '''
+    Hit, miss and creation counts for the webhook cache.
+    '''
+
+    hits: int = 0
+    '''
+    The number of lookups answered from the cache.
+    '''
+
+    misses: int = 0
+    '''
+    The number of lookups that had to ask Discord for the channel's webhooks.
+    '''
+
+    created: int = 0
+    '''
+    The number of webhooks created.
+    '''
+
+
+class WebhookPool:
+    '''
+    The AI's webhooks in a channel, and the messages recently sent through each.
+
+    Each webhook has a rate limit bucket of its own, so messages are spread across the webhooks
+    by sending each through the webhook that has sent the fewest messages in the last
+    WEBHOOK_RATE_LIMIT_PERIOD seconds.  Once every webhook has used up its expected rate limit
+    the pool should grow, until it holds `size` webhooks.
+
+    Discord does not tell webhook senders how much of their rate limit is left, so each bucket is
+    estimated from the times of the messages sent through the webhook, see sent().
+    '''
+
+    def __init__(self, webhooks: List[discord.Webhook], size: int = WEBHOOK_POOL_SIZE) -> None:
+        self.webhooks = list(webhooks)
+        self.size = size
+        self.sends: Dict[int, Deque[float]] = {}
+        '''
+        The times at which messages were sent through each webhook, keyed by webhook ID.
+        '''
+
+    def load(self, webhook: discord.Webhook, now: float) -> int:
+        '''
+        Get the number of messages sent through a webhook in the current rate limit period.
+        '''
+
+        times = self.sends.get(webhook.id, None)
+
+        if times is None:
+            return 0
+
+        while times and times[0] <= now - WEBHOOK_RATE_LIMIT_PERIOD:
+            times.popleft()
+
+        return len(times)
+
+    def should_grow(self) -> bool:
+        '''
+        Return true if the pool has no webhooks, or if every webhook is expected to be rate limited and there is room for another.
+        '''
+
+        if len(self.webhooks) == 0:
+            return True
+
+        now = time.monotonic()
+
+        return len(self.webhooks) < self.size and all(self.load(webhook, now) >= WEBHOOK_RATE_LIMIT for webhook in self.webhooks)
+
+    def choose(self) -> discord.Webhook:
+        '''
+        Get the webhook that has sent the fewest messages recently, preferring earlier webhooks when there is a tie.
+        '''
+
+        now = time.monotonic()
+
+        return min(self.webhooks, key=lambda webhook: self.load(webhook, now))
+
+    def sent(self, webhook: discord.Webhook) -> None:
+        '''
+        Note that a message is being sent through a webhook.
+        '''
+
+        self.sends.setdefault(webhook.id, deque()).append(time.monotonic())
+
+    def add(self, webhook: discord.Webhook) -> None:
+        self.webhooks.append(webhook)
+
+    def remove(self, webhook: discord.Webhook) -> None:
+        if webhook in self.webhooks:
+            self.webhooks.remove(webhook)
+
+        self.sends.pop(webhook.id, None)
+
+
+webhook_pools: Dict[int, WebhookPool] = {}
+'''
+The pool of webhooks used to proxy messages in each channel, keyed by channel ID.
+
+A channel's pool is loaded when it is first needed.  Whenever the channel's webhooks change, refresh_webhooks()
+removes those that no longer exist.  A webhook that turns out to have been deleted is also removed from its pool.
+'''
+
+webhook_locks: Dict[int, asyncio.Lock] = {}
+'''
+Held while loading or growing a channel's pool, so that concurrent lookups do not create a webhook each.
+'''
+
+webhook_stats = WebhookCacheStats()
+
+
 async def proxy_message_by_webhook(message_content, message_username=None, message_avatar=None, message_attachments=None, webhook=None, channel=None, embed=None) -> discord.WebhookMessage:
     '''
     Proxies a message via webhook. If a webhook is not provided, one will be retrieved via the channel object passed as a parameter.
@@ -14,6 +152,8 @@ async def proxy_message_by_webhook(message_content, message_username=None, messa
     Message content is mandatory. If no username or avatar are provided, the message will be proxied with webhook defaults.
     '''
 
+    looked_up = webhook is None
+
     if webhook is None and channel is not None:
         webhook = await get_webhook_for_channel(channel)
 
@@ -21,18 +161,115 @@ async def proxy_message_by_webhook(message_content, message_username=None, messa
         log.warn(f"Failed to retrieve a webhook. Could not proxy message: '{message_content}'")
         return False
 
-    return await webhook.send(message_content, avatar_url=message_avatar, username=message_username, files=message_attachments, embed=embed, wait=True)
+    try:
+        return await send(webhook, message_content, avatar_url=message_avatar, username=message_username, files=message_attachments, embed=embed)
+    except discord.NotFound:
+        # The webhook has been deleted.  Look up another, if it was looked up here in the first place.
+        forget_webhook(webhook.channel_id, webhook)
+
+        if not looked_up:
+            raise
+
+        log.info(f"Webhook for channel {channel} was deleted. Retrying with a new webhook.")
+        webhook = await get_webhook_for_channel(channel)
+
+        return await send(webhook, message_content, avatar_url=message_avatar, username=message_username, files=message_attachments, embed=embed)
+
+
+async def send(webhook: discord.Webhook, content: str, **kwargs) -> discord.WebhookMessage:
+    '''
+    Send a message through a webhook, counting it against the webhook's rate limit bucket.
+    '''
+
+    pool = webhook_pools.get(webhook.channel_id, None)
+
+    if pool is not None:
+        pool.sent(webhook)
+
+    return await webhook.send(content, wait=True, **kwargs)
 
 
 async def get_webhook_for_channel(channel: discord.TextChannel) -> discord.Webhook:
-    webhooks = await channel.webhooks()
-    if len(webhooks) == 0:
-        # No webhook available, create one.
-        return_webhook = await channel.create_webhook(name="AI Webhook")
-    else:
-        return_webhook = webhooks[0]
-
-    return return_webhook
+    '''
+    Get a webhook to proxy a message in a channel, creating one if the channel has none.
+
+    The AI's webhooks in the channel are cached, so that Discord is only asked for them once.
+    The least loaded webhook is returned, and another is created if all of them are expected to be rate limited,
+    see WebhookPool.  Look up a webhook for each message, rather than reusing one, so that messages are spread.
+    '''
+
+    pool = webhook_pools.get(channel.id, None)
+
+    if pool is not None and not pool.should_grow():
+        webhook_stats.hits += 1
+        return pool.choose()
+
+    async with webhook_locks.setdefault(channel.id, asyncio.Lock()):
+        # Another lookup may have loaded or grown the pool while this one was waiting for the lock.
+        pool = webhook_pools.get(channel.id, None)
+
+        if pool is None:
+            webhook_stats.misses += 1
+            pool = WebhookPool([webhook for webhook in await channel.webhooks() if webhook.name == WEBHOOK_NAME])
+            webhook_pools[channel.id] = pool
+        else:
+            webhook_stats.hits += 1
+
+        if pool.should_grow():
+            try:
+                pool.add(await channel.create_webhook(name=WEBHOOK_NAME))
+                webhook_stats.created += 1
+            except discord.HTTPException:
+                # E.g. the channel has as many webhooks as Discord allows.  Make do with those in the pool, if any.
+                if len(pool.webhooks) == 0:
+                    raise
+
+                log.warning(f"Could not add a webhook to the pool for channel {channel}.", exc_info=True)
+                pool.size = len(pool.webhooks)
+
+        return pool.choose()
+
+
+async def refresh_webhooks(channel: discord.abc.GuildChannel) -> None:
+    '''
+    Remove the webhooks that no longer exist from a channel's pool, after the channel's webhooks have been updated.
+
+    The rest of the pool is kept, along with how much each webhook has sent, since the pool creating a webhook
+    also updates the channel's webhooks.  The pool is thrown away if the channel's webhooks cannot be looked up.
+    '''
+
+    if channel.id not in webhook_pools:
+        return
+
+    # Wait for any webhook being created, so that it is in the pool before the channel's webhooks are looked up.
+    async with webhook_locks.setdefault(channel.id, asyncio.Lock()):
+        pool = webhook_pools.get(channel.id, None)
+
+        if pool is None:
+            return
+
+        try:
+            existing = {webhook.id for webhook in await channel.webhooks()}
+        except discord.HTTPException:
+            log.warning(f"Could not look up the webhooks for channel {channel}.", exc_info=True)
+            forget_webhook(channel.id)
+            return
+
+        for webhook in [webhook for webhook in pool.webhooks if webhook.id not in existing]:
+            pool.remove(webhook)
+
+
+def forget_webhook(channel_id: int, webhook: discord.Webhook | None = None) -> None:
+    '''
+    Throw away the cached webhooks for a channel, so that they are looked up again when next needed.
+
+    If a webhook is given, e.g. because it has been deleted, then only that webhook is removed from the channel's pool.
+    '''
+
+    if webhook is None:
+        webhook_pools.pop(channel_id, None)
+    elif channel_id in webhook_pools:
+        webhook_pools[channel_id].remove(webhook)
 
 
 async def webhook_if_message_altered(original: discord.Message, copy: MessageCopy):
@@ -1,5 +1,9 @@
 import src.db.database
+import src.db.record_cache
 
 # Make database.connect() default to 'test.db'.
 original_connect = src.db.database.connect
 src.db.database.connect = lambda filename='test.db': original_connect(filename=filename)
+
+# Check every record read from a cache against the database, so that tests fail if a cache goes stale.
+src.db.record_cache.RecordCache.self_check = True
@@ -5,17 +5,18 @@ from discord.ext.commands import Bot, Cog, Context
 from discord.utils import get
 from functools import partial
 from typing import Any, Iterable
-from src.emoji import BATTERY_FULL, BATTERY_MID, BATTERY_LOW, BATTERY_EMPTY, DRONE_EMOJI
+from src.emoji import BATTERY_FULL, BATTERY_MID, BATTERY_LOW, BATTERY_EMPTY, DRONE_EMOJI, forget_emojis
 from src.roles import (INITIATE, ASSOCIATE, DRONE, STORED, DEVELOPMENT, ADMIN, MODERATION, HIVE_MXTRESS,
                        SPEECH_OPTIMIZATION, GLITCHED, ID_PREPENDING, IDENTITY_ENFORCEMENT,
                        THIRD_PERSON_ENFORCEMENT, BATTERY_POWERED, BATTERY_DRAINED, FREE_STORAGE,
-                       HIVE_VOICE, MODERATION_ROLES, VOICE, NITRO_BOOSTER, EVERYONE)
+                       HIVE_VOICE, VOICE, NITRO_BOOSTER, EVERYONE, forget_roles)
 from unittest.mock import AsyncMock, create_autospec, MagicMock
 from src.db.data_objects import BatteryType, Drone, DroneOrder, Storage
 from src.db.timer import Timer
 from src.drone_member import DroneMember
 from src.bot_utils import COMMAND_PREFIX
 from src.db.record import Record
+from src.webhook import WEBHOOK_NAME
 import src.channels as channels
 
 unique_id = 1
@@ -31,7 +32,7 @@ emojis = [
 roles = [
     INITIATE, ASSOCIATE, DRONE, STORED, DEVELOPMENT, ADMIN, MODERATION, HIVE_MXTRESS, SPEECH_OPTIMIZATION,
     GLITCHED, ID_PREPENDING, IDENTITY_ENFORCEMENT, THIRD_PERSON_ENFORCEMENT, BATTERY_POWERED, BATTERY_DRAINED,
-    FREE_STORAGE, HIVE_VOICE, MODERATION_ROLES, VOICE, NITRO_BOOSTER, EVERYONE,
+    FREE_STORAGE, HIVE_VOICE, VOICE, NITRO_BOOSTER, EVERYONE,
 ]
 
 
@@ -248,7 +249,8 @@ class Mocks():
         channel.guild = self._guild
 
         # A shortcut to get the first webhook.
-        channel.webhook = AsyncMock()
+        channel.webhook = AsyncMock(channel_id=channel.id)
+        channel.webhook.name = WEBHOOK_NAME
         channel.webhooks.return_value = [channel.webhook]
 
         self._guild.channels.append(channel)
@@ -298,8 +300,18 @@ class Mocks():
 
         self._guild.roles.append(role)
 
+        # Discord would send an on_guild_role_create event.
+        forget_roles(self._guild)
+
         return role
 
+    def member_role(self, member: MagicMock, role_id: int) -> MagicMock | None:
+        '''
+        Find one of a mock member's roles by ID, as Member.get_role() does.
+        '''
+
+        return self.find(member.roles, id=role_id)
+
     def member(self, nick=None, **kwargs) -> MagicMock:
         '''
         Create a mock Discord Member.
@@ -318,6 +330,8 @@ class Mocks():
         member.edit = AsyncMock()
         member.mention = '<@' + str(member.id) + '>'
         member.joined_at = datetime.now(timezone.utc) - timedelta(weeks=3)
+        member.guild = self._guild
+        member.get_role = partial(self.member_role, member)
 
         self.set_props(member, kwargs)
 
@@ -470,6 +484,7 @@ class Mocks():
             drone_member.drone = self.drone(drone_id)
 
         drone_member.avatar_url.return_value = drone_member._avatar
+        drone_member.get_role = partial(self.member_role, drone_member)
 
         async_methods = [
             'create',
@@ -584,7 +599,7 @@ class Mocks():
         Create a mock emoji.
         '''
 
-        existing = self.find(self._guild.emoji, name=name)
+        existing = self.find(self._guild.emojis, name=name)
 
         if existing:
             return existing
@@ -597,5 +612,6 @@ class Mocks():
         self.set_props(emoji, kwargs)
 
         self._guild.emojis.append(emoji)
+        forget_emojis(self._guild)
 
         return emoji
@@ -0,0 +1,118 @@
+from typing import Any, Iterable, Set
+from unittest.mock import AsyncMock, NonCallableMock, patch
+from src.db.backend import MemoryBackend
+from src.db.database import connect, prepare, run_on_db_thread
+from src.db.record_cache import clear_caches
+from src.db.trace import QueryTracer
+from test.mocks import Mocks
+
+
+class QueryBudget:
+    '''
+    A real, in-memory SQLite database for counting the SQL statements and Discord API calls made by a flow.
+
+    Every connect() context opened while the budget is active uses the in-memory database,
+    and its statements are counted by a QueryTracer of its own.
+    The record caches are cleared on the way in and out, since they hold records from the other database.
+    Discord API calls are counted as the awaits on the AsyncMock methods of a Mocks guild,
+    i.e. of its members, channels and roles.
+
+    Usage:
+
+    ```
+    async with QueryBudget(mocks) as budget:
+        # ... insert the records that the flow needs ...
+
+        budget.reset()
+        await flow()
+
+        self.assertLessEqual(budget.statements(), 10)
+        self.assertLessEqual(budget.discord_calls(), 2)
+    ```
+    '''
+
+    def __init__(self, mocks: Mocks) -> None:
+        self.mocks = mocks
+        self.tracer = QueryTracer()
+        self.backend: MemoryBackend | None = None
+        self.patches = []
+        self.statement_baseline = 0
+        self.discord_call_baseline = 0
+
+    async def __aenter__(self) -> 'QueryBudget':
+        self.backend = MemoryBackend()
+        self.patches = [
+            patch('src.db.database.get_backend', return_value=self.backend),
+            patch('src.db.database.query_tracer', self.tracer),
+        ]
+
+        for p in self.patches:
+            p.start()
+
+        clear_caches()
+
+        await connect()(run_on_db_thread)(prepare)
+
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        for p in reversed(self.patches):
+            p.stop()
+
+        clear_caches()
+        self.backend.close()
+
+    def reset(self) -> None:
+        '''
+        Start counting from zero, e.g. once the records that a flow needs have been inserted.
+        '''
+
+        self.statement_baseline = self.total_statements()
+        self.discord_call_baseline = self.total_discord_calls()
+
+    def statements(self) -> int:
+        '''
+        The number of SQL statements executed since the last reset().
+        '''
+
+        return self.total_statements() - self.statement_baseline
+
+    def discord_calls(self) -> int:
+        '''
+        The number of Discord API calls awaited since the last reset().
+        '''
+
+        return self.total_discord_calls() - self.discord_call_baseline
+
+    def total_statements(self) -> int:
+        return sum(stats.statements.count for stats in self.tracer.events.values())
+
+    def total_discord_calls(self) -> int:
+        guild = self.mocks.get_guild()
+
+        return count_awaits([guild, *guild.channels, *guild.roles, *guild._members.values()])
+
+
+def count_awaits(roots: Iterable[Any]) -> int:
+    '''
+    Count the awaits on all the AsyncMocks reachable from the given mocks, counting each mock once.
+    '''
+
+    seen: Set[int] = set()
+    pending = list(roots)
+    count = 0
+
+    while pending:
+        mock = pending.pop()
+
+        if not isinstance(mock, NonCallableMock) or id(mock) in seen:
+            continue
+
+        seen.add(id(mock))
+
+        if isinstance(mock, AsyncMock):
+            count += mock.await_count
+
+        pending.extend(mock._mock_children.values())
+
+    return count
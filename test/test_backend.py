@@ -0,0 +1,54 @@
+from unittest import IsolatedAsyncioTestCase
+from src.db.backend import close_backends, get_backend, MEMORY, MemoryBackend, set_backend
+from src.db.database import change, connect, fetchcolumn, prepare, run_on_db_thread
+from src.db.pool import ConnectionPool
+
+
+class TestBackend(IsolatedAsyncioTestCase):
+
+    def tearDown(self) -> None:
+        close_backends()
+
+    def test_get_backend(self) -> None:
+        '''
+        Ensure that there is one backend per database, and that the memory database has a MemoryBackend.
+        '''
+
+        self.assertIs(get_backend('backend.db'), get_backend('backend.db'))
+        self.assertIsInstance(get_backend('backend.db'), ConnectionPool)
+        self.assertIsInstance(get_backend(MEMORY), MemoryBackend)
+
+    def test_set_backend(self) -> None:
+        '''
+        Ensure that a backend can be replaced, and that the replaced backend is closed.
+        '''
+
+        replaced = get_backend(MEMORY)
+        backend = MemoryBackend()
+        set_backend(MEMORY, backend)
+
+        self.assertIs(backend, get_backend(MEMORY))
+
+        with self.assertRaises(Exception):
+            replaced.connection.execute('SELECT 1')
+
+    async def test_memory_backend(self) -> None:
+        '''
+        Ensure that execution contexts share the in-memory database, and that failed transactions are rolled back.
+        '''
+
+        await connect(MEMORY)(run_on_db_thread)(prepare)
+
+        @connect(MEMORY)
+        async def insert(drone_id: str, fail: bool) -> None:
+            await change('INSERT INTO drone (discord_id, drone_id) VALUES (:drone_id, :drone_id)', {'drone_id': drone_id})
+
+            if fail:
+                raise RuntimeError('Rolling back')
+
+        await insert('0001', False)
+
+        with self.assertRaises(RuntimeError):
+            await insert('0002', True)
+
+        self.assertEqual(['0001'], await connect(MEMORY)(fetchcolumn)('SELECT drone_id FROM drone'))
@@ -10,6 +10,96 @@ from test.mocks import Mocks
 
 class TestBattery(unittest.IsolatedAsyncioTestCase):
 
+    @patch('src.ai.battery.forget')
+    @patch('src.ai.battery.change', new_callable=AsyncMock)
+    async def test_flush_ledger(self, change: AsyncMock, forget: Mock):
+        '''
+        Pending drain should be written with one statement per amount drained, and then cleared.
+        '''
+
+        ledger = battery.BatteryLedger()
+        ledger.drain('1234', 2)
+        ledger.drain('5678', 2)
+        ledger.drain('9813')
+
+        await ledger.flush()
+
+        change.assert_any_call('UPDATE drone SET battery_minutes = max(0, battery_minutes - ?) WHERE drone_id IN (?, ?)', [2, '1234', '5678'])
+        change.assert_any_call('UPDATE drone SET battery_minutes = max(0, battery_minutes - ?) WHERE drone_id IN (?)', [1, '9813'])
+        forget.assert_any_call('drone', 'drone_id', '1234')
+        self.assertEqual({}, ledger.pending)
+
+    @patch('src.ai.battery.BATCH_SIZE', 2)
+    @patch('src.ai.battery.forget')
+    @patch('src.ai.battery.change', new_callable=AsyncMock)
+    async def test_flush_ledger_batches(self, change: AsyncMock, forget: Mock):
+        '''
+        Drones that drained by the same amount should be written in batches of BATCH_SIZE.
+        '''
+
+        ledger = battery.BatteryLedger()
+
+        for drone_id in ['1234', '5678', '9813']:
+            ledger.drain(drone_id)
+
+        await ledger.flush()
+
+        self.assertEqual(2, change.await_count)
+        change.assert_any_call('UPDATE drone SET battery_minutes = max(0, battery_minutes - ?) WHERE drone_id IN (?, ?)', [1, '1234', '5678'])
+        change.assert_any_call('UPDATE drone SET battery_minutes = max(0, battery_minutes - ?) WHERE drone_id IN (?)', [1, '9813'])
+        self.assertEqual({}, ledger.pending)
+
+    @patch('src.ai.battery.forget')
+    @patch('src.ai.battery.change', new_callable=AsyncMock)
+    async def test_flush_ledger_failed(self, change: AsyncMock, forget: Mock):
+        '''
+        Pending drain should be kept if writing it fails, so that the next flush writes it.
+        '''
+
+        ledger = battery.BatteryLedger()
+        ledger.drain('1234', 2)
+        change.side_effect = Exception('disk I/O error')
+
+        with self.assertRaises(Exception):
+            await ledger.flush()
+
+        self.assertEqual({'1234': 2}, ledger.pending)
+        self.assertEqual({}, ledger.flushing)
+
+    @patch('src.ai.battery.forget')
+    @patch('src.ai.battery.change', new_callable=AsyncMock)
+    async def test_flush_ledger_concurrent(self, change: AsyncMock, forget: Mock):
+        '''
+        Drain added or discarded while a flush is writing should be kept or dropped, not overwritten by the flush.
+        '''
+
+        ledger = battery.BatteryLedger()
+        ledger.drain('1234', 2)
+        ledger.drain('5678', 2)
+
+        def energize_and_drain(*args):
+            ledger.discard('1234')
+            ledger.drain('5678')
+
+        change.side_effect = energize_and_drain
+
+        await ledger.flush()
+
+        self.assertEqual({'5678': 1}, ledger.pending)
+
+    @cog(battery.BatteryCog)
+    async def test_ledger_read_through(self, mocks: Mocks):
+        '''
+        A drone's battery percentage should include drain that has not been written yet.
+        '''
+
+        drone = mocks.drone('1234', battery_minutes=240)
+
+        with patch.dict(battery.battery_ledger.pending, {'1234': 48}):
+            self.assertEqual(40, drone.get_battery_percent_remaining())
+
+        self.assertEqual(50, drone.get_battery_percent_remaining())
+
     @cog(battery.BatteryCog)
     async def test_recharge_battery(self, mocks: Mocks):
         '''
@@ -25,6 +115,20 @@ class TestBattery(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(drone.battery_minutes, 220)
         drone.save.assert_called_once()
 
+    @cog(battery.BatteryCog)
+    async def test_recharge_battery_pending_drain(self, mocks: Mocks):
+        '''
+        The recharge battery function should recharge from the battery left after the pending drain, and write that drain along with it.
+        '''
+
+        drone = mocks.drone('1234', battery_minutes=480)
+
+        with patch.dict(battery.battery_ledger.pending, {'1234': 400}):
+            await battery.recharge_battery(drone)
+
+            self.assertEqual(drone.battery_minutes, 200)
+            self.assertNotIn('1234', battery.battery_ledger.pending)
+
     @cog(battery.BatteryCog)
     async def test_manually_drain_battery(self, mocks: Mocks):
         '''
@@ -62,12 +166,15 @@ class TestBattery(unittest.IsolatedAsyncioTestCase):
         '''
 
         cog = mocks.get_cog()
-        cog.draining_batteries = {'1234': 10}
-        Drone.load.return_value = mocks.drone('1234')
+        cog.draining_batteries = {'1234': 10, '5678': 0}
 
-        await test_utils.start_and_await_loop(cog.track_active_battery_drain)
+        with patch.dict(battery.battery_ledger.pending, clear=True):
+            await test_utils.start_and_await_loop(cog.track_active_battery_drain)
+
+            self.assertEqual({'1234': 1}, battery.battery_ledger.pending)
 
         self.assertEqual(cog.draining_batteries.get('1234', None), 9)
+        Drone.load.assert_not_called()
 
     @patch('src.ai.battery.Drone', new_callable=AsyncMock)
     @cog(battery.BatteryCog)
@@ -71,10 +71,9 @@ class TestBotUtils(IsolatedAsyncioTestCase):
         # Actual order of operations:
         # Start command 1
         # Insert drone 1000.
-        # Attempt to start command 2, enter retry loop.
-        # Roll back drone 1000.
         # Start command 2.
-        # Insert drone 2000.
+        # Attempt to insert drone 2000, queue for the write lock.
+        # Roll back drone 1000.
         # Insert drone 2000.
         # Commit drone 2000.
         #
@@ -103,8 +102,8 @@ class TestBotUtils(IsolatedAsyncioTestCase):
         expected_calls = [
             call('Inserting drone 1000'),
             call('Inserted drone 1000'),
-            call('Rolling back drone 1000'),
             call('Inserting drone 2000'),
+            call('Rolling back drone 1000'),
             call('Inserted drone 2000'),
             call('Committing drone 2000'),
         ]
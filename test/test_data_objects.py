@@ -4,15 +4,13 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 
 class TestDataObjects(IsolatedAsyncioTestCase):
-    @patch('src.db.data_objects.fetchcolumn', new_callable=AsyncMock)
-    @patch('src.db.record.fetchone', new_callable=AsyncMock)
-    async def test_storage_all_elapsed(self, fetchone: AsyncMock, fetchcolumn: AsyncMock) -> None:
-        fetchcolumn.return_value = [1, 2, 3]
-        fetchone.side_effect = [
-            {'id': 1, 'stored_by': 1, 'target_id': 1, 'purpose': '', 'roles': '', 'release_time': '2000-01-01 01:02:03'},
-            {'id': 2, 'stored_by': 2, 'target_id': 2, 'purpose': '', 'roles': '', 'release_time': '2000-01-01 01:02:03'},
-            {'id': 3, 'stored_by': 3, 'target_id': 3, 'purpose': '', 'roles': '', 'release_time': '2000-01-01 01:02:03'},
-        ]
+    @patch('src.db.data_objects.fetchrows', new_callable=AsyncMock)
+    async def test_storage_all_elapsed(self, fetchrows: AsyncMock) -> None:
+        fetchrows.return_value = (('id', 'stored_by', 'target_id', 'purpose', 'roles', 'release_time'), [
+            (1, 1, 1, '', '', 946688523),
+            (2, 2, 2, '', '', 946688523),
+            (3, 3, 3, '', '', 946688523),
+        ])
 
         records = await Storage.all_elapsed()
 
@@ -22,20 +20,18 @@ class TestDataObjects(IsolatedAsyncioTestCase):
         self.assertEqual(records[2].id, 3)
         self.assertIsInstance(records[0], Storage)
 
-    @patch('src.db.record.fetchcolumn', new_callable=AsyncMock)
-    @patch('src.db.record.fetchone', new_callable=AsyncMock)
+    @patch('src.db.data_objects.fetchrows', new_callable=AsyncMock)
     @patch('src.drone_member.DroneMember')
-    async def test_drone_order_all_drones(self, DroneMember: MagicMock, fetchone: AsyncMock, fetchcolumn: AsyncMock) -> None:
-        fetchcolumn.return_value = [1, 2, 3]
-        fetchone.side_effect = [
-            {'id': '1', 'discord_id': 1, 'protocol': 'test 1', 'finish_time': '2000-01-01 01:02:03'},
-            {'id': '2', 'discord_id': 2, 'protocol': 'test 2', 'finish_time': '2000-01-01 01:02:03'},
-            {'id': '3', 'discord_id': 3, 'protocol': 'test 3', 'finish_time': '2000-01-01 01:02:03'},
-        ]
+    async def test_drone_order_all_finished_drones(self, DroneMember: MagicMock, fetchrows: AsyncMock) -> None:
+        fetchrows.return_value = (('id', 'discord_id', 'protocol', 'finish_time'), [
+            ('1', 1, 'test 1', 946688523),
+            ('2', 2, 'test 2', 946688523),
+            ('3', 3, 'test 3', 946688523),
+        ])
 
         DroneMember.load = AsyncMock(return_value='test')
 
-        records = await DroneOrder.all_drones(None)
+        records = await DroneOrder.all_finished_drones(None)
 
         self.assertEqual(len(records), 3)
         self.assertEqual(records[0], 'test')
@@ -1,8 +1,18 @@
 from unittest import IsolatedAsyncioTestCase
-from src.db.database import change, connect, dictionary_row_factory, fetchall, fetchcolumn, fetchone, prepare
+from src.db.database import (change, connect, cursor, db_scheduler, dictionary_row_factory, fetchall, fetchcolumn, fetchone, prepare, Scheduler,
+                             SQLITE_BUSY_SNAPSHOT, transactions, WriteConflict)
+from src.db.data_objects import DroneOrder, Storage
+from src.db.drone_dao import fetch_all_elapsed_temporary_dronification
+from src.db.backend import close_backends
+from src.db.timer import Timer
+from src.db.transaction import Transaction
+from src.db.trace import query_tracer
 from pathlib import Path
 from unittest.mock import Mock
+from threading import current_thread
+from time import sleep
 import asyncio
+import sqlite3
 
 
 class TestDatabase(IsolatedAsyncioTestCase):
@@ -37,6 +47,8 @@ class TestDatabase(IsolatedAsyncioTestCase):
         Delete the "test.db" file after all the tests have run.
         '''
 
+        # Pooled connections hold the file open, so close them first.
+        close_backends()
         Path.unlink('test.db')
 
     @connect()
@@ -124,3 +136,284 @@ class TestDatabase(IsolatedAsyncioTestCase):
         row = (11, '1111')
         newRow = dictionary_row_factory(cursor, row)
         self.assertEqual({'discord_id': 11, 'drone_id': '1111'}, newRow)
+
+    async def test_concurrent_readers(self):
+        '''
+        Ensure that execution contexts that only read run at the same time.
+        '''
+
+        running = 0
+        most_running = 0
+
+        @connect()
+        async def reader():
+            nonlocal running, most_running
+
+            running += 1
+            most_running = max(running, most_running)
+            await fetchall('SELECT * FROM drone')
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await asyncio.gather(reader(), reader(), reader())
+
+        self.assertEqual(3, most_running)
+
+    async def test_writer_does_not_block_reader(self):
+        '''
+        Ensure that a reader can run while another execution context holds the write lock.
+        '''
+
+        written = asyncio.Event()
+        read = asyncio.Event()
+
+        @connect()
+        async def writer():
+            await change('UPDATE drone SET optimized = 1 WHERE discord_id = 11')
+            written.set()
+            await read.wait()
+
+        @connect()
+        async def reader():
+            await written.wait()
+            rows = await fetchall('SELECT optimized FROM drone WHERE discord_id = 11')
+            read.set()
+            return rows
+
+        _, rows = await asyncio.wait_for(asyncio.gather(writer(), reader()), 5)
+
+        # The reader sees the snapshot from before the writer committed.
+        self.assertEqual([{'optimized': 0}], rows)
+        self.assertFalse(db_scheduler.stats().writing)
+
+    async def test_writers_queue(self):
+        '''
+        Ensure that writers run one at a time, in the order that they started writing.
+        '''
+
+        order = []
+
+        @connect()
+        async def writer(drone_id: str):
+            await change('UPDATE drone SET drone_id = :drone_id WHERE discord_id = 11', {'drone_id': drone_id})
+            order.append(drone_id)
+            await asyncio.sleep(0.01)
+            order.append(drone_id)
+
+        await asyncio.gather(writer('1112'), writer('1113'), writer('1111'))
+
+        self.assertEqual(['1112', '1112', '1113', '1113', '1111', '1111'], order)
+
+    async def test_stale_snapshot(self):
+        '''
+        Ensure that a reader whose snapshot is overtaken by another writer can still write.
+        '''
+
+        written = asyncio.Event()
+
+        @connect()
+        async def writer():
+            await change('UPDATE drone SET glitched = 1 WHERE discord_id = 22')
+            written.set()
+
+        @connect()
+        async def reader():
+            await fetchall('SELECT * FROM drone')
+            await written.wait()
+            await change('UPDATE drone SET optimized = 1 WHERE discord_id = 22')
+
+        await asyncio.wait_for(asyncio.gather(reader(), writer()), 5)
+
+        row = await connect()(fetchone)('SELECT glitched, optimized FROM drone WHERE discord_id = 22')
+        self.assertEqual({'glitched': 1, 'optimized': 1}, row)
+
+    async def test_stale_snapshot_not_retried(self):
+        '''
+        Ensure that a write from a transaction whose snapshot has been overtaken raises WriteConflict, rather than overwriting the other writer's change.
+        '''
+
+        @connect()
+        async def writer():
+            await change('UPDATE drone SET drone_id = 2223 WHERE discord_id = 22')
+
+        connection = sqlite3.connect('test.db', check_same_thread=False, isolation_level=None)
+        cursor.set(connection.cursor())
+        transactions.set([])
+
+        try:
+            with self.assertRaises(WriteConflict) as raised:
+                with Transaction():
+                    drone_id = (await fetchone('SELECT drone_id FROM drone WHERE discord_id = 22'))['drone_id']
+                    await writer()
+                    await change('UPDATE drone SET drone_id = :drone_id WHERE discord_id = 22', {'drone_id': int(drone_id) + 1})
+        finally:
+            connection.close()
+
+        self.assertEqual(SQLITE_BUSY_SNAPSHOT, raised.exception.__cause__.sqlite_errorcode)
+        self.assertEqual({'drone_id': '2223'}, await connect()(fetchone)('SELECT drone_id FROM drone WHERE discord_id = 22'))
+        await connect()(change)('UPDATE drone SET drone_id = 2222 WHERE discord_id = 22')
+
+    @connect()
+    async def test_off_event_loop(self):
+        '''
+        Ensure that queries run on the database thread and other coroutines carry on meanwhile.
+        '''
+
+        connection = cursor.get().connection
+        connection.create_function('slow_thread_name', 0, lambda: sleep(0.2) or current_thread().name)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        row = await fetchone('SELECT slow_thread_name() AS name')
+        ticking.cancel()
+
+        self.assertTrue(row['name'].startswith('database'))
+        self.assertGreater(ticks, 5)
+
+    @connect()
+    async def test_sweeps_use_indexes(self):
+        '''
+        Ensure that the queries for elapsed timers, storage, orders and temporary dronifications search an index rather than scanning their tables.
+        '''
+
+        statements = []
+        cursor.get().connection.set_trace_callback(statements.append)
+
+        await Timer.all_elapsed(None)
+        await Storage.all_elapsed()
+        await DroneOrder.all_finished_drones(None)
+        await fetch_all_elapsed_temporary_dronification()
+
+        cursor.get().connection.set_trace_callback(None)
+        queries = [statement for statement in statements if statement.startswith('SELECT')]
+
+        self.assertEqual(4, len(queries))
+
+        for query in queries:
+            plan = [row['detail'] for row in await fetchall('EXPLAIN QUERY PLAN ' + query)]
+
+            self.assertTrue(plan[0].startswith('SEARCH'), f'{query}: {plan}')
+            self.assertFalse(any('TEMP B-TREE' in detail for detail in plan), f'{query}: {plan}')
+
+    async def test_lazy_transaction(self):
+        '''
+        Ensure that an execution context only begins a transaction when it first changes data.
+        '''
+
+        in_transaction = []
+
+        @connect()
+        async def reader():
+            await fetchall('SELECT * FROM drone')
+            in_transaction.append(cursor.get().connection.in_transaction)
+
+        @connect()
+        async def writer():
+            await fetchall('SELECT * FROM drone')
+            in_transaction.append(cursor.get().connection.in_transaction)
+            await change('UPDATE drone SET optimized = 0 WHERE discord_id = 11')
+            in_transaction.append(cursor.get().connection.in_transaction)
+
+        before = db_scheduler.stats()
+        await reader()
+        await writer()
+        after = db_scheduler.stats()
+
+        self.assertEqual([False, False, True], in_transaction)
+        self.assertEqual(2, after.reads - before.reads)
+        self.assertEqual(1, after.read_only - before.read_only)
+        self.assertEqual(1, after.writes - before.writes)
+
+    async def test_trace(self):
+        '''
+        Ensure that the statements executed by each execution context are traced.
+        '''
+
+        @connect()
+        async def traced_event():
+            await fetchall('SELECT * FROM drone WHERE discord_id = 11')
+            await fetchone('SELECT * FROM drone WHERE discord_id = 22')
+            await change('UPDATE drone SET glitched = 0 WHERE discord_id = 22')
+
+        await traced_event()
+
+        stats = query_tracer.events['traced_event']
+        self.assertEqual(1, stats.events)
+        self.assertEqual(3, stats.statements.count)
+        self.assertEqual(3, stats.statements.rows)
+        self.assertGreaterEqual(query_tracer.by_fingerprint['SELECT * FROM drone WHERE discord_id = ?'].count, 2)
+
+
+class TestScheduler(IsolatedAsyncioTestCase):
+
+    def test_readers(self):
+        '''
+        Ensure that readers are counted.
+        '''
+
+        scheduler = Scheduler()
+
+        scheduler.admit_reader()
+        scheduler.admit_reader()
+        self.assertEqual(2, scheduler.stats().readers)
+
+        scheduler.release_reader()
+        self.assertEqual(1, scheduler.stats().readers)
+        self.assertEqual(2, scheduler.stats().reads)
+        self.assertEqual(1, scheduler.stats().read_only)
+
+    async def test_write_queue(self):
+        '''
+        Ensure that writers wait for the lock in order, and that their queue time is recorded.
+        '''
+
+        scheduler = Scheduler()
+
+        await scheduler.acquire_write()
+        second = asyncio.create_task(scheduler.acquire_write())
+        third = asyncio.create_task(scheduler.acquire_write())
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(2, scheduler.stats().waiting_writers)
+        self.assertFalse(second.done())
+
+        scheduler.release_write()
+        await asyncio.wait_for(second, 1)
+        self.assertFalse(third.done())
+
+        scheduler.release_write()
+        await asyncio.wait_for(third, 1)
+
+        scheduler.release_write()
+
+        stats = scheduler.stats()
+        self.assertFalse(stats.writing)
+        self.assertEqual(3, stats.writes)
+        self.assertEqual(2, stats.write_waits)
+        self.assertGreaterEqual(stats.max_write_wait, 0.01)
+        self.assertGreaterEqual(stats.total_write_wait, stats.max_write_wait)
+
+    async def test_cancelled_writer(self):
+        '''
+        Ensure that a cancelled writer does not keep the lock.
+        '''
+
+        scheduler = Scheduler()
+
+        await scheduler.acquire_write()
+        waiter = asyncio.create_task(scheduler.acquire_write())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+
+        scheduler.release_write()
+
+        self.assertFalse(scheduler.stats().writing)
+        self.assertEqual(0, scheduler.stats().waiting_writers)
@@ -1,6 +1,14 @@
 from datetime import datetime, timedelta
-from src.db.database import change, connect, prepare
-from src.db.data_objects import Drone
+from typing import Tuple
+from src.ai.battery import battery_ledger
+from src.db.database import change, changemany, connect, cursor, db_scheduler, fetchall, fetchcolumn, fetchrows, prepare, WriteConflict
+from src.db.connection import event_trace, identity_map
+from src.db.data_objects import BatteryType, Drone, DroneOrder, ForbiddenWord, Storage
+from src.db.drone_dao import remove_trusted_user_on_all
+from src.db.record import forget
+from src.db.record_cache import RecordCache
+from src.db.timer import Timer
+from unittest.mock import patch
 from unittest import IsolatedAsyncioTestCase
 import asyncio
 from test.mocks import Mocks
@@ -46,7 +54,7 @@ class TestDrone(IsolatedAsyncioTestCase):
         drone.identity_enforcement = True
         drone.third_person_enforcement = True
         drone.can_self_configure = True
-        drone.temporary_until = datetime.now() + timedelta(minutes=30)
+        drone.temporary_until = (datetime.now() + timedelta(minutes=30)).replace(microsecond=0)
         drone.is_battery_powered = True
         drone.battery_type_id = 3
         drone.battery_minutes = 123
@@ -100,6 +108,118 @@ class TestDrone(IsolatedAsyncioTestCase):
         self.assertFalse(loaded.is_battery_powered)
         self.assertEqual(loaded.temporary_until, until)
 
+    async def concurrent_change(self, statement: str, write) -> None:
+        '''
+        Run write() on a drone loaded before another execution context executes the statement.
+        '''
+
+        loaded = asyncio.Event()
+        changed = asyncio.Event()
+
+        @connect()
+        async def writer():
+            drone = await Drone.load(123456789012345)
+            loaded.set()
+            await changed.wait()
+            await write(drone)
+
+        @connect()
+        async def other():
+            await loaded.wait()
+            await change(statement)
+            forget('drone', 'discord_id', 123456789012345)
+            changed.set()
+
+        await asyncio.wait_for(asyncio.gather(writer(), other()), 5)
+
+    async def test_save_conflict(self) -> None:
+        '''
+        Ensure that a drone is not saved over a change made by someone else since it was loaded.
+        '''
+
+        async def recharge(drone: Drone) -> None:
+            drone.battery_minutes = 480
+            await drone.save()
+
+        async def recharge_many(drone: Drone) -> None:
+            drone.battery_minutes = 480
+            await Drone.save_many([drone])
+
+        conflicts = db_scheduler.stats().conflicts
+
+        for write in [recharge, recharge_many]:
+            with self.subTest(write=write.__name__):
+                with self.assertRaises(WriteConflict):
+                    await self.concurrent_change('UPDATE drone SET battery_minutes = battery_minutes - 1 WHERE discord_id = 123456789012345', write)
+
+        self.assertEqual([121], await connect()(fetchcolumn)('SELECT battery_minutes FROM drone'))
+
+        self.assertEqual(conflicts + 2, db_scheduler.stats().conflicts)
+
+        # A change to another column does not conflict.
+        await self.concurrent_change('UPDATE drone SET glitched = 0 WHERE discord_id = 123456789012345', recharge)
+        self.assertEqual([(480, 0)], (await connect()(fetchrows)('SELECT battery_minutes, glitched FROM drone'))[1])
+
+    async def test_delete_conflict(self) -> None:
+        '''
+        Ensure that deleting a drone that someone else has deleted since it was loaded raises WriteConflict.
+        '''
+
+        async def delete(drone: Drone) -> None:
+            await drone.delete()
+
+        with self.assertRaises(WriteConflict):
+            await self.concurrent_change('DELETE FROM drone WHERE discord_id = 123456789012345', delete)
+
+    @connect()
+    async def test_save_changes_only(self) -> None:
+        '''
+        Ensure that saving a drone writes only the columns that changed, and nothing if none did.
+        '''
+
+        drone = await Drone.load(self.drone.discord_id)
+        statements = []
+        cursor.get().connection.set_trace_callback(statements.append)
+
+        await drone.save()
+        unchanged_statements = list(statements)
+
+        drone.glitched = False
+        await drone.save()
+
+        cursor.get().connection.set_trace_callback(None)
+
+        self.assertEqual([], unchanged_statements)
+        self.assertEqual(['BEGIN IMMEDIATE TRANSACTION', "UPDATE drone SET glitched = 0 WHERE discord_id = '123456789012345' AND glitched IS 1"], statements)
+
+        # Saving again writes nothing, because the drone now matches the database.
+        statements.clear()
+        cursor.get().connection.set_trace_callback(statements.append)
+        await drone.save()
+        cursor.get().connection.set_trace_callback(None)
+
+        self.assertEqual([], statements)
+        self.assertFalse((await fetchrows('SELECT glitched FROM drone WHERE discord_id = 123456789012345'))[1][0][0])
+
+    @connect()
+    async def test_save_trusted_users_changes_only(self) -> None:
+        '''
+        Ensure that a drone's trusted users are rewritten only if they changed.
+        '''
+
+        drone = await Drone.load(self.drone.discord_id)
+        drone.optimized = False
+
+        with patch.object(Drone, 'save_trusted_users', wraps=Drone.save_trusted_users) as save_trusted_users:
+            await drone.save()
+            save_trusted_users.assert_called_once_with([])
+
+            drone.trusted_users = [111111]
+            await drone.save()
+            save_trusted_users.assert_called_with([drone])
+
+        self.assertEqual([111111], await fetchcolumn('SELECT trusted_user_id FROM drone_trusted_user WHERE discord_id = 123456789012345'))
+
     @connect()
     async def test_all(self) -> None:
         '''
@@ -123,6 +243,99 @@ class TestDrone(IsolatedAsyncioTestCase):
         self.assertEqual(2, all[1].discord_id)
         self.assertEqual(123456789012345, all[2].discord_id)
 
+    @connect()
+    async def test_all_relations(self) -> None:
+        '''
+        Ensure that all drones and their related records are loaded with one query per table.
+        '''
+
+        for discord_id in range(1, 11):
+            self.drone.discord_id = discord_id
+            self.drone.drone_id = str(discord_id)
+            await self.drone.insert()
+
+        storage = Storage('storage id', None, 5, 'testing', [], datetime.now())
+        await storage.insert()
+
+        with patch('src.db.record.fetchrows', wraps=fetchrows) as fetchrows_spy:
+            all = await Drone.all()
+
+        # One query for the drones, one for each relation and one for the trusted users.
+        self.assertEqual(6, fetchrows_spy.call_count)
+        self.assertEqual(11, len(all))
+        self.assertEqual('storage id', all[4].storage.id)
+        self.assertIsNone(all[3].storage)
+        self.assertEqual(3, all[0].battery_type.id)
+
+        # Drones loaded by all() are shared with find().
+        self.assertIs(all[4], await Drone.find(drone_id='5'))
+
+        await storage.delete()
+
+    @connect()
+    async def test_load_many(self) -> None:
+        '''
+        Ensure that several drones can be loaded by Discord ID at once.
+        '''
+
+        found = await Drone.find(discord_id=123456789012345)
+        loaded = await Drone.load_many([0, 123456789012345])
+
+        self.assertEqual(1, len(loaded))
+        self.assertIs(found, loaded[0])
+
+    @connect()
+    async def test_write_many(self) -> None:
+        '''
+        Ensure that several drones can be inserted, updated and deleted with one statement each.
+        '''
+
+        drones = [Drone(discord_id=discord_id, drone_id=str(discord_id)) for discord_id in range(1, 6)]
+
+        with patch('src.db.record.changemany', wraps=changemany) as changemany_spy:
+            await Drone.insert_many(drones)
+
+            for drone in drones:
+                drone.battery_minutes = drone.discord_id * 10
+
+            await Drone.save_many(drones)
+
+        self.assertEqual(2, changemany_spy.call_count)
+        self.assertEqual([10, 20, 30, 40, 50], await fetchcolumn('SELECT battery_minutes FROM drone WHERE discord_id < 10 ORDER BY discord_id'))
+        self.assertEqual([drones[2]], await Drone.load_many(['3'], column='drone_id'))
+
+        with patch('src.db.record.changemany', wraps=changemany) as changemany_spy:
+            await Drone.delete_many(drones[:3])
+            await Drone.delete_many([])
+
+        changemany_spy.assert_called_once()
+        self.assertEqual(['4', '5', '1234'], await fetchcolumn('SELECT drone_id FROM drone ORDER BY discord_id'))
+        self.assertIsNone(await Drone.find(discord_id=1))
+
+    @connect()
+    async def test_trusted_users(self) -> None:
+        '''
+        Ensure that trusted users are stored in their own table and can be removed from every drone at once.
+        '''
+
+        self.drone.discord_id = 1
+        self.drone.drone_id = '0001'
+        self.drone.trusted_users = [222222, 444444]
+        await self.drone.insert()
+
+        self.assertEqual([111111, 222222, 333333], (await Drone.load_many([123456789012345]))[0].trusted_users)
+        self.assertEqual([222222, 444444], (await Drone.all())[0].trusted_users)
+
+        await remove_trusted_user_on_all(222222)
+
+        self.assertEqual([], await fetchcolumn('SELECT discord_id FROM drone_trusted_user WHERE trusted_user_id = 222222'))
+        self.assertEqual([444444], (await Drone.find(discord_id=1)).trusted_users)
+        self.assertEqual([111111, 333333], (await Drone.find(discord_id=123456789012345)).trusted_users)
+
+        # Trusted users are deleted along with their drone.
+        await self.drone.delete()
+        self.assertEqual([], await fetchcolumn('SELECT trusted_user_id FROM drone_trusted_user WHERE discord_id = 1'))
+
     @connect()
     async def test_find(self) -> None:
         '''
@@ -168,6 +381,40 @@ class TestDrone(IsolatedAsyncioTestCase):
 
         self.assertIsNone(await Drone.find(drone_id='0000'))
 
+    @connect()
+    async def test_find_case_insensitive(self) -> None:
+        '''
+        Ensure that case-insensitive columns are matched regardless of case.
+        '''
+
+        battery_type = await BatteryType.find(name='mEdIuM')
+
+        self.assertEqual('Medium', battery_type.name)
+
+    @connect()
+    async def test_find_uses_indexes(self) -> None:
+        '''
+        Ensure that finding records searches indexes rather than scanning tables.
+        '''
+
+        statements = []
+        cursor.get().connection.set_trace_callback(statements.append)
+
+        await Drone.find(discord_id=123456789012345)
+        await Drone.find(drone_id='9999')
+        await BatteryType.find(name='medium')
+        await ForbiddenWord.find('Think')
+
+        cursor.get().connection.set_trace_callback(None)
+        queries = [statement for statement in statements if statement.startswith('SELECT')]
+
+        self.assertGreaterEqual(len(queries), 4)
+
+        for query in queries:
+            plan = [row['detail'] for row in await fetchall('EXPLAIN QUERY PLAN ' + query)]
+
+            self.assertFalse(any(detail.startswith('SCAN') or 'AUTOMATIC' in detail for detail in plan), f'{query}: {plan}')
+
     @connect()
     async def test_find_by_member(self) -> None:
         '''
@@ -179,6 +426,248 @@ class TestDrone(IsolatedAsyncioTestCase):
 
         self.assertEqual(loaded.drone_id, '1234')
 
+    @connect()
+    async def test_find_relations(self) -> None:
+        '''
+        Ensure that a drone's related records are loaded along with it in a single query.
+        '''
+
+        storage = Storage('storage id', None, 123456789012345, 'testing', [], datetime.now())
+        await storage.insert()
+        order = DroneOrder('order id', 123456789012345, 'protocol', datetime.now())
+        await order.insert()
+        timer = Timer('timer id', 123456789012345, 'optimized', datetime.now())
+        await timer.insert()
+
+        with patch('src.db.record.fetchrows', wraps=fetchrows) as fetchrows_spy:
+            loaded = await Drone.find(discord_id=123456789012345)
+
+        # One query for the drone and its relations, and one for its trusted users.
+        self.assertEqual(2, fetchrows_spy.call_count)
+        self.assertEqual(3, loaded.battery_type.id)
+        self.assertEqual('storage id', loaded.storage.id)
+        self.assertEqual('order id', loaded.order.id)
+        self.assertEqual('timer id', loaded.timer.id)
+
+        await storage.delete()
+        await order.delete()
+        await timer.delete()
+
+    @connect()
+    async def test_find_identity_map(self) -> None:
+        '''
+        Ensure that a drone is only loaded once per execution context, whichever way it is found.
+        '''
+
+        loaded = await Drone.find(discord_id=123456789012345)
+
+        self.assertIs(loaded, await Drone.find(discord_id=123456789012345))
+        self.assertIs(loaded, await Drone.find(drone_id='1234'))
+        self.assertIs(loaded, await Drone.find(member=mocks.member('name', id=123456789012345)))
+        self.assertIsNone(await Drone.find(discord_id=0))
+        self.assertIsNone(await Drone.find(discord_id=0))
+
+        self.assertEqual(4, identity_map.get().stats.hits)
+        self.assertEqual(2, identity_map.get().stats.misses)
+
+    @connect()
+    async def test_identity_map_writes(self) -> None:
+        '''
+        Ensure that the identity map follows inserts, renames and deletes.
+        '''
+
+        self.assertIsNone(await Drone.find(drone_id='5678'))
+
+        # A new drone replaces the remembered absence.
+        self.drone.discord_id = 1
+        self.drone.drone_id = '5678'
+        await self.drone.insert()
+        self.assertIs(self.drone, await Drone.find(drone_id='5678'))
+
+        # A renamed drone is found by its new ID only.
+        self.drone.drone_id = '8765'
+        await self.drone.save()
+        self.assertIs(self.drone, await Drone.find(drone_id='8765'))
+        self.assertIsNone(await Drone.find(drone_id='5678'))
+
+        # A deleted drone is no longer found.
+        await self.drone.delete()
+        self.assertIsNone(await Drone.find(discord_id=1))
+
+    @connect()
+    async def test_identity_map_relations(self) -> None:
+        '''
+        Ensure that a drone is reloaded after its related records change.
+        '''
+
+        loaded = await Drone.find(discord_id=123456789012345)
+        self.assertIsNone(loaded.storage)
+
+        storage = Storage('storage id', None, 123456789012345, 'testing', [], datetime.now())
+        await storage.insert()
+
+        reloaded = await Drone.find(discord_id=123456789012345)
+        self.assertIsNot(loaded, reloaded)
+        self.assertEqual('storage id', reloaded.storage.id)
+
+        await storage.delete()
+
+    @patch.object(RecordCache, 'self_check', False)
+    async def test_cache(self) -> None:
+        '''
+        Ensure that a drone found by one execution context is read from the cache by the next, without querying the database.
+        '''
+
+        @connect()
+        async def find(**kwargs) -> Tuple[Drone, int]:
+            return await Drone.find(**kwargs), event_trace.get().statements.count
+
+        Drone.cache.clear()
+
+        first, statements = await find(discord_id=123456789012345)
+        self.assertGreater(statements, 0)
+
+        second, statements = await find(drone_id='1234')
+        self.assertEqual(0, statements)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+        # Changes to a cached copy are not shared.
+        second.glitched = False
+        self.assertTrue((await find(discord_id=123456789012345))[0].glitched)
+
+    @patch.object(RecordCache, 'self_check', False)
+    async def test_cache_writes(self) -> None:
+        '''
+        Ensure that committed writes are written through to the cache, and rolled back writes are not.
+        '''
+
+        @connect()
+        async def find() -> Tuple[Drone, int]:
+            return await Drone.find(discord_id=123456789012345), event_trace.get().statements.count
+
+        @connect()
+        async def save(fail: bool) -> None:
+            drone = await Drone.find(discord_id=123456789012345)
+            drone.battery_minutes -= 1
+            drone.trusted_users.append(444444)
+            await drone.save()
+
+            if fail:
+                raise RuntimeError('Rolling back')
+
+        Drone.cache.clear()
+        await find()
+        await save(False)
+
+        drone, statements = await find()
+        self.assertEqual(0, statements)
+        self.assertEqual(122, drone.battery_minutes)
+        self.assertEqual([111111, 222222, 333333, 444444], drone.trusted_users)
+        self.assertFalse(drone.trusted_users_changed())
+
+        with self.assertRaises(RuntimeError):
+            await save(True)
+
+        drone, statements = await find()
+        self.assertEqual(0, statements)
+        self.assertEqual(122, drone.battery_minutes)
+
+    @patch.object(RecordCache, 'self_check', False)
+    async def test_cache_forget(self) -> None:
+        '''
+        Ensure that drones changed other than by saving them are reloaded from the database.
+        '''
+
+        @connect()
+        async def find() -> Tuple[Drone, int]:
+            return await Drone.find(discord_id=123456789012345), event_trace.get().statements.count
+
+        @connect()
+        async def store() -> None:
+            await Storage('storage id', None, 123456789012345, 'testing', [], datetime.now()).insert()
+
+        Drone.cache.clear()
+        await find()
+
+        # A new related record.
+        await store()
+        drone, statements = await find()
+        self.assertGreater(statements, 0)
+        self.assertEqual('storage id', drone.storage.id)
+        await connect()(drone.storage.delete)()
+
+        # Battery drain written by the ledger.
+        await find()
+        battery_ledger.drain('1234', 3)
+        await battery_ledger.flush()
+        drone, statements = await find()
+        self.assertGreater(statements, 0)
+        self.assertEqual(120, drone.battery_minutes)
+
+        # A trusted user removed from every drone.
+        await connect()(remove_trusted_user_on_all)(222222)
+        drone, statements = await find()
+        self.assertGreater(statements, 0)
+        self.assertEqual([111111, 333333], drone.trusted_users)
+
+    @patch.object(RecordCache, 'self_check', False)
+    async def test_cache_absent(self) -> None:
+        '''
+        Ensure that once the drone IDs are loaded, members who are not drones are found without querying the database.
+        '''
+
+        @connect()
+        async def find(discord_id: int) -> Tuple[Drone | None, int]:
+            return await Drone.find(discord_id=discord_id), event_trace.get().statements.count
+
+        @connect()
+        async def insert(fail: bool) -> None:
+            await Drone(discord_id=555555, drone_id='5555').insert()
+
+            if fail:
+                raise RuntimeError('Rolling back')
+
+        Drone.cache.clear()
+        self.addCleanup(Drone.cache.clear)
+        await connect()(Drone.load_discord_ids)()
+
+        self.assertEqual((None, 0), await find(555555))
+        self.assertEqual(1, Drone.cache.stats.absent)
+
+        # A drone is only known to exist once its insert has committed.
+        with self.assertRaises(RuntimeError):
+            await insert(True)
+
+        self.assertEqual((None, 0), await find(555555))
+
+        await insert(False)
+        drone, statements = await find(555555)
+        self.assertEqual('5555', drone.drone_id)
+        self.assertGreater(statements, 0)
+
+        # Deleting the drone makes it absent again.
+        await connect()(drone.delete)()
+        self.assertEqual((None, 0), await find(555555))
+
+    @connect()
+    async def test_find_without_relations(self) -> None:
+        '''
+        Ensure that a drone can be found without its related records, which are loaded if it is found again with them.
+        '''
+
+        # Write something first, so that the drone is not read from the cache.
+        await change('DELETE FROM forbidden_word WHERE 0')
+
+        drone = await Drone.find(discord_id=123456789012345, with_relations=False)
+        self.assertFalse(drone.relations_loaded)
+        self.assertIsNone(drone.battery_type)
+        self.assertEqual([111111, 222222, 333333], drone.trusted_users)
+
+        self.assertIs(drone, await Drone.find(drone_id='1234'))
+        self.assertTrue(drone.relations_loaded)
+        self.assertEqual(3, drone.battery_type.id)
+
     def test_allows_configuration_by_hive_mxtress(self) -> None:
         '''
         Ensure that the Hive Mxtress can always configure a drone.
@@ -1,5 +1,6 @@
 import unittest
-from src.ai.emote import generate_big_text, EmoteCog
+from src.ai.emote import big_text_table, generate_big_text, EmoteCog
+from src.emoji import forget_emojis, get_emoji
 from test.cog import cog
 from test.mocks import Mocks
 
@@ -44,3 +45,31 @@ class TestEmote(unittest.IsolatedAsyncioTestCase):
     def test_two_consecutive_colons_are_converted_to_a_single_emoji(self):
         self.assertEqual(generate_big_text(TestEmote.channel, "::"), str(self.mocks.emoji('hex_dc')))
         self.assertEqual(generate_big_text(TestEmote.channel, ":::"), str(self.mocks.emoji('hex_dc')))
+
+    def test_two_colons_apart_are_left_out(self):
+        self.assertEqual(generate_big_text(TestEmote.channel, ":a:"), ':hex_a:')
+        self.assertEqual(generate_big_text(TestEmote.channel, "::::"), str(self.mocks.emoji('hex_dc')) * 2)
+
+    def test_big_text_table_is_rebuilt_when_emojis_change(self):
+        '''
+        Ensure that big text uses the guild's emojis as they are now, once they have changed.
+        '''
+
+        mocks = Mocks()
+        channel = mocks.channel('general')
+        table = big_text_table(channel.guild)
+
+        self.assertIs(table, big_text_table(channel.guild))
+        self.assertEqual(generate_big_text(channel, 'ab'), ':hex_a::hex_b:')
+
+        # Mocks.emoji() forgets the guild's emojis, as on_guild_emojis_update() does.
+        get_emoji(channel.guild, 'hex_a').name = 'renamed'
+        mocks.emoji('hex_a')
+
+        self.assertIsNot(table, big_text_table(channel.guild))
+        self.assertEqual(generate_big_text(channel, 'ab'), ':hex_a::hex_b:')
+
+        channel.guild.emojis.clear()
+        forget_emojis(channel.guild)
+
+        self.assertEqual(generate_big_text(channel, 'ab'), '')
@@ -0,0 +1,55 @@
+from src.db.identity_map import IdentityMap, MISSING
+from unittest import TestCase
+
+
+class TestIdentityMap(TestCase):
+
+    def test_get(self) -> None:
+        '''
+        Ensure that records are returned by any of their keys, and that hits and misses are counted.
+        '''
+
+        records = IdentityMap()
+        record = object()
+
+        self.assertIs(MISSING, records.get('drone', 'discord_id', 1))
+
+        records.add('drone', {'discord_id': 1, 'drone_id': '0001'}, record)
+
+        self.assertIs(record, records.get('drone', 'discord_id', 1))
+        self.assertIs(record, records.get('drone', 'discord_id', '1'))
+        self.assertIs(record, records.get('drone', 'drone_id', '0001'))
+        self.assertIs(MISSING, records.get('timer', 'discord_id', 1))
+
+        self.assertEqual(3, records.stats.hits)
+        self.assertEqual(2, records.stats.misses)
+
+    def test_none(self) -> None:
+        '''
+        Ensure that a lookup that found nothing is remembered.
+        '''
+
+        records = IdentityMap()
+        records.add('drone', {'discord_id': 1}, None)
+
+        self.assertIsNone(records.get('drone', 'discord_id', 1))
+
+    def test_forget(self) -> None:
+        '''
+        Ensure that forgetting a record removes it from under all of its keys.
+        '''
+
+        records = IdentityMap()
+        record = object()
+        other = object()
+        records.add('drone', {'discord_id': 1, 'drone_id': '0001'}, record)
+        records.add('drone', {'discord_id': 2, 'drone_id': '0002'}, other)
+
+        records.forget('drone', 'discord_id', 1)
+
+        self.assertIs(MISSING, records.get('drone', 'discord_id', 1))
+        self.assertIs(MISSING, records.get('drone', 'drone_id', '0001'))
+        self.assertIs(other, records.get('drone', 'drone_id', '0002'))
+
+        # Forgetting an unknown record does nothing.
+        records.forget('drone', 'discord_id', 3)
@@ -0,0 +1,122 @@
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+from src.ai.identity_enforcement import enforce_identity
+from src.ai.third_person_enforcement import enforce_third_person
+from src.channels import DRONE_HIVE_CHANNELS
+from src.db.data_objects import Drone
+from src.listeners import ListenerTable, listens
+
+
+def message(channel: str = 'general', category: str = 'Hive', content: str = 'Beep boop.') -> Mock:
+    '''
+    Create a mock message sent in the given channel and category.
+    '''
+
+    message = Mock(content=content)
+    message.channel.name = channel
+    message.channel.category.name = category
+
+    return message
+
+
+def listener(name: str) -> AsyncMock:
+    '''
+    Create a mock message listener with the given name.
+    '''
+
+    listener = AsyncMock(return_value=False)
+    listener.__name__ = name
+
+    return listener
+
+
+class TestListeners(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.anywhere = listener('anywhere')
+        self.storage = listens(channels=['storage'])(listener('storage'))
+        self.not_moderation = listens(excluded_categories=['Moderation'])(listener('not_moderation'))
+        self.drone = listens(drone=True)(listener('drone'))
+        self.flags = listens(flags=['optimized', 'glitched'])(listener('flags'))
+        self.status_code = listens(content=r'\d{4} :: \d{3}')(listener('status_code'))
+
+        self.table = ListenerTable([self.anywhere, self.storage, self.not_moderation, self.drone, self.flags, self.status_code])
+
+    async def dispatch(self, message: Mock) -> list:
+        return [listener.__name__ async for listener in self.table.dispatch(message)]
+
+    @patch.object(Drone, 'find')
+    async def test_dispatch(self, find: AsyncMock) -> None:
+        '''
+        Ensure that only the listeners whose conditions a message meets are dispatched, in order.
+        '''
+
+        find.return_value = None
+        self.assertEqual(['anywhere', 'not_moderation'], await self.dispatch(message()))
+        self.assertEqual(['anywhere', 'storage', 'not_moderation'], await self.dispatch(message(channel='storage')))
+        self.assertEqual(['anywhere'], await self.dispatch(message(category='Moderation')))
+        self.assertEqual(['anywhere', 'not_moderation', 'status_code'], await self.dispatch(message(content='5890 :: 200')))
+
+        find.return_value = Drone(discord_id=1, drone_id='5890')
+        self.assertEqual(['anywhere', 'not_moderation', 'drone'], await self.dispatch(message()))
+
+        find.return_value = Drone(discord_id=1, drone_id='5890', glitched=True)
+        self.assertEqual(['anywhere', 'not_moderation', 'drone', 'flags'], await self.dispatch(message()))
+
+    @patch.object(Drone, 'find')
+    async def test_drone_loaded_once_if_needed(self, find: AsyncMock) -> None:
+        '''
+        Ensure that the drone is loaded once per message, and only if a listener that might apply needs it.
+        '''
+
+        find.return_value = None
+
+        await self.dispatch(message())
+        find.assert_awaited_once()
+
+        find.reset_mock()
+        table = ListenerTable([self.anywhere, self.storage])
+        [listener async for listener in table.dispatch(message(channel='storage'))]
+        find.assert_not_awaited()
+
+    @patch.object(Drone, 'find')
+    async def test_stats(self, find: AsyncMock) -> None:
+        '''
+        Ensure that each listener counts the messages that it was run for and skipped.
+        '''
+
+        find.return_value = None
+
+        await self.dispatch(message())
+        await self.dispatch(message(category='Moderation'))
+
+        stats = self.table.stats()
+        self.assertEqual((2, 0), stats['anywhere'])
+        self.assertEqual((0, 0), stats['storage'])
+        self.assertEqual((1, 1), stats['not_moderation'])
+        self.assertEqual((0, 2), stats['drone'])
+
+    @patch.object(Drone, 'find')
+    async def test_enforcement_in_hive_channels(self, find: AsyncMock) -> None:
+        '''
+        Ensure that identity and third person enforcement are dispatched in the hive channels even when their flags are off.
+        '''
+
+        find.return_value = Drone(discord_id=1, drone_id='5890', identity_enforcement=False, third_person_enforcement=False)
+        table = ListenerTable([enforce_identity, enforce_third_person])
+
+        dispatched = [listener async for listener in table.dispatch(message(channel=DRONE_HIVE_CHANNELS[0]))]
+
+        self.assertEqual([enforce_identity, enforce_third_person], dispatched)
+        self.assertTrue(find.return_value.identity_enforcable(message(channel=DRONE_HIVE_CHANNELS[0]).channel))
+
+    def test_unknown_flag(self) -> None:
+        with self.assertRaises(ValueError):
+            listens(flags=['no_such_flag'])
+
+    def test_iterate(self) -> None:
+        '''
+        Ensure that iterating over a table gives its listener functions, e.g. for the ai_status report.
+        '''
+
+        self.assertEqual([self.anywhere, self.storage], list(ListenerTable([self.anywhere, self.storage])))
@@ -2,22 +2,20 @@ import unittest
 from unittest.mock import AsyncMock, patch, ANY
 
 import main
+from src.listeners import ListenerTable
 
 
 class MainTest(unittest.IsolatedAsyncioTestCase):
 
     @patch("main.bot")
-    @patch("main.bot_message_listeners")
-    @patch("main.message_listeners")
-    async def test_on_message(self, message_listeners, bot_message_listeners, bot):
+    async def test_on_message(self, bot):
         # init
         first_listener = AsyncMock(return_value=False)
         second_listener = AsyncMock(return_value=False)
         third_listener = AsyncMock(return_value=True)
         fourth_listener = AsyncMock(return_value=False)
 
-        message_listeners.__iter__.return_value = iter([first_listener, second_listener, third_listener, fourth_listener])
-        bot_message_listeners.__iter__.return_value = iter([])
+        listeners = ListenerTable([first_listener, second_listener, third_listener, fourth_listener])
         bot.user.id = 123
 
         message = AsyncMock()
@@ -26,7 +24,8 @@ class MainTest(unittest.IsolatedAsyncioTestCase):
         message.author.name = 'Unit Test'
 
         # run
-        await main.on_message(message)
+        with patch("main.message_listeners", listeners), patch("main.bot_message_listeners", ListenerTable([])):
+            await main.on_message(message)
 
         # assert
         first_listener.assert_any_call(message, ANY)
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import AsyncMock, patch, MagicMock
+from unittest.mock import AsyncMock, patch
 from src.db.maintenance import trusted_user_cleanup
 from test.mocks import Mocks
 
@@ -8,23 +8,16 @@ mocks = Mocks()
 
 class MaintenanceTest(unittest.IsolatedAsyncioTestCase):
 
-    @patch("src.db.maintenance.Drone")
-    async def test_trusted_user_cleanup(self, Drone: MagicMock):
+    @patch("src.db.maintenance.remove_trusted_users_on_all", new_callable=AsyncMock)
+    @patch("src.db.maintenance.fetchcolumn", new_callable=AsyncMock)
+    async def test_trusted_user_cleanup(self, fetchcolumn: AsyncMock, remove_trusted_users_on_all: AsyncMock):
         # init
-        drone_with_dangling_users = mocks.drone('1234', trusted_users=[1, 2])
-        drone_with_no_dangling_users = mocks.drone('5678', trusted_users=[1])
-        drones = [drone_with_dangling_users, drone_with_no_dangling_users]
-
-        Drone.all = AsyncMock(return_value=drones)
+        fetchcolumn.return_value = [1, 2, 3]
 
         members = [mocks.member(id=1)]
 
         # run
         await trusted_user_cleanup(members)
 
-        # assert
-        self.assertEqual(drone_with_dangling_users.trusted_users, [1])
-        drone_with_dangling_users.save.assert_called_once()
-
-        self.assertEqual(drone_with_no_dangling_users.trusted_users, [1])
-        drone_with_no_dangling_users.save.assert_not_called()
+        # assert: only the users who have left the guild are removed, all at once.
+        remove_trusted_users_on_all.assert_called_once_with([2, 3])
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import AsyncMock, MagicMock, Mock, patch
 import src.ai.mantra as mantra
+from src.ai.battery import battery_ledger
 from test.mocks import Mocks
 
 mocks = Mocks()
@@ -154,3 +155,12 @@ class TestMantra(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(author.drone.battery_minutes, 480)
         author.drone.save.assert_not_called()
         message.channel.send.assert_called_once_with('Good drone. Battery already at 100%.')
+
+    @patch.dict(battery_ledger.pending, {'1234': 48})
+    async def test_increase_battery_by_five_percent_pending_drain(self) -> None:
+        author, message = await self.increase_battery(480)
+
+        # assert
+        self.assertEqual(author.drone.battery_minutes, 456)
+        self.assertNotIn('1234', battery_ledger.pending)
+        message.channel.send.assert_called_once_with('Good drone. Battery has been recharged by 5%.')
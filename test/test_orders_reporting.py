@@ -22,7 +22,7 @@ class OrdersReportingTest(unittest.IsolatedAsyncioTestCase):
     async def test_check_for_completed_orders_completed(self, DroneOrders: MagicMock) -> None:
 
         activated_member = self.mocks.drone_member('1234', drone_order=self.mocks.drone_order())
-        DroneOrders.all_drones = AsyncMock(return_value=[activated_member])
+        DroneOrders.all_finished_drones = AsyncMock(return_value=[activated_member])
 
         await test_utils.start_and_await_loop(self.mocks.get_cog().deactivate_drones_with_completed_orders)
 
@@ -31,7 +31,7 @@ class OrdersReportingTest(unittest.IsolatedAsyncioTestCase):
     @patch("src.ai.orders_reporting.DroneOrder")
     async def test_check_for_completed_orders_none_completed(self, DroneOrders: MagicMock) -> None:
         activated_member = self.mocks.drone_member('1234', drone_order=self.mocks.drone_order(finish_time=datetime.now() + timedelta(minutes=25)))
-        DroneOrders.all_drones = AsyncMock(return_value=[activated_member])
+        DroneOrders.all_finished_drones = AsyncMock(return_value=[activated_member])
 
         await test_utils.start_and_await_loop(self.mocks.get_cog().deactivate_drones_with_completed_orders)
 
@@ -48,7 +48,7 @@ class OrdersReportingTest(unittest.IsolatedAsyncioTestCase):
         mocked_datetime.now.return_value = fixed_now
         order = self.mocks.drone_order()
 
-        def create_order(id: str, discord_id: int, protocol: str, finish_time: str) -> MagicMock:
+        def create_order(id: str, discord_id: int, protocol: str, finish_time: datetime) -> MagicMock:
             order.id = id
             order.discord_id = discord_id
             order.protocol = protocol
@@ -66,7 +66,7 @@ class OrdersReportingTest(unittest.IsolatedAsyncioTestCase):
         self.mocks.get_bot().context.send.assert_called_once_with("If safe and willing to do so, Drone 1234 Activate.\nDrone 1234 will elaborate on its exact tasks before proceeding with them.")
         self.assertEqual(order.discord_id, author.id)
         self.assertEqual(order.protocol, 'beeping booping')
-        self.assertEqual(order.finish_time, str(fixed_now + timedelta(minutes=23)))
+        self.assertEqual(order.finish_time, fixed_now + timedelta(minutes=23))
         order.insert.assert_called_once()
 
     @patch("src.ai.orders_reporting.DroneMember")
@@ -0,0 +1,113 @@
+from asyncio import create_task, sleep, wait_for
+from pathlib import Path
+from src.db.pool import ConnectionPool
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase
+
+
+class TestConnectionPool(IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        '''
+        Create a temporary directory to hold the database file.
+        '''
+
+        self.directory = TemporaryDirectory()
+        self.filename = str(Path(self.directory.name) / 'pool.db')
+        self.pool = ConnectionPool(self.filename, size=2)
+
+    def tearDown(self) -> None:
+        '''
+        Close the pool's connections and delete the database file.
+        '''
+
+        self.pool.close()
+        self.directory.cleanup()
+
+    async def test_connections_are_configured(self) -> None:
+        '''
+        Ensure that new connections use WAL journaling and enforce foreign keys.
+        '''
+
+        connection = await self.pool.acquire()
+
+        self.assertEqual('wal', connection.execute('PRAGMA journal_mode').fetchone()[0])
+        self.assertEqual(1, connection.execute('PRAGMA foreign_keys').fetchone()[0])
+
+        self.pool.release(connection)
+
+    async def test_connections_are_reused(self) -> None:
+        '''
+        Ensure that a released connection is handed out again rather than opening a new one.
+        '''
+
+        first = await self.pool.acquire()
+        self.pool.release(first)
+        second = await self.pool.acquire()
+
+        self.assertIs(first, second)
+        self.assertEqual(1, self.pool.stats().size)
+
+    async def test_release_rolls_back(self) -> None:
+        '''
+        Ensure that an open transaction is rolled back when a connection is released.
+        '''
+
+        connection = await self.pool.acquire()
+        connection.execute('CREATE TABLE test (id INT)')
+        connection.execute('BEGIN TRANSACTION')
+        connection.execute('INSERT INTO test VALUES (1)')
+
+        self.pool.release(connection)
+
+        self.assertFalse(connection.in_transaction)
+        self.assertEqual(0, connection.execute('SELECT COUNT(*) FROM test').fetchone()[0])
+
+    async def test_bounded(self) -> None:
+        '''
+        Ensure that callers wait for a connection once the pool is full, and are served in order.
+        '''
+
+        first = await self.pool.acquire()
+        second = await self.pool.acquire()
+
+        third_task = create_task(self.pool.acquire())
+        fourth_task = create_task(self.pool.acquire())
+        await sleep(0)
+
+        stats = self.pool.stats()
+        self.assertEqual(2, stats.size)
+        self.assertEqual(0, stats.idle)
+        self.assertEqual(2, stats.waiting)
+
+        self.pool.release(second)
+        self.assertIs(second, await wait_for(third_task, 1))
+        self.assertFalse(fourth_task.done())
+
+        self.pool.release(first)
+        self.assertIs(first, await wait_for(fourth_task, 1))
+
+        stats = self.pool.stats()
+        self.assertEqual(4, stats.acquisitions)
+        self.assertEqual(2, stats.waits)
+        self.assertEqual(0, stats.waiting)
+        self.assertGreater(stats.total_wait_time, 0)
+        self.assertGreaterEqual(stats.total_wait_time, stats.max_wait_time)
+
+    async def test_cancelled_waiter(self) -> None:
+        '''
+        Ensure that a cancelled waiter does not swallow a released connection.
+        '''
+
+        first = await self.pool.acquire()
+        await self.pool.acquire()
+
+        waiter = create_task(self.pool.acquire())
+        await sleep(0)
+        waiter.cancel()
+        await sleep(0)
+
+        self.pool.release(first)
+
+        self.assertEqual(0, self.pool.stats().waiting)
+        self.assertEqual(1, self.pool.stats().idle)
@@ -0,0 +1,176 @@
+import unittest
+from datetime import datetime, timedelta
+from typing import List
+from uuid import uuid4
+from discord.ext.commands import Bot, MemberNotFound
+from unittest.mock import AsyncMock, MagicMock, patch
+import main
+import src.roles as roles
+from src.ai.battery import battery_ledger
+from src.ai.drone_configuration import DroneConfigurationCog
+from src.db.data_objects import Drone, Storage
+from src.db.database import connect
+from src.db.record_cache import RecordCache
+from src.db.timer import Timer
+from test.mocks import Mocks
+from test.query_budget import QueryBudget
+from test.test_utils import start_and_await_loop
+
+SWEEP_DRONES = 1000
+'''
+The number of drones in the database for the every-minute sweeps.
+'''
+
+ELAPSED = 5
+'''
+The number of elapsed timers, and of elapsed storage periods, for the every-minute sweeps to process.
+'''
+
+
+class TestQueryBudget(unittest.IsolatedAsyncioTestCase):
+    '''
+    Upper bounds on the SQL statements and Discord API calls made by representative flows, run against a real database.
+
+    A flow that goes over its budget has probably started loading records one at a time, or calling Discord in a loop.
+    If the increase is intended then raise the budget, but consider batching the new work first.
+    '''
+
+    def setUp(self) -> None:
+        self.mocks = Mocks()
+
+        # Look members up by ID directly, rather than by scanning every member.
+        guild = self.mocks.get_guild()
+        guild.get_member = guild._members.get
+
+    def drone_members(self, count: int) -> List[MagicMock]:
+        '''
+        Create mock drone members with drone IDs 0000, 0001, 0002...
+        '''
+
+        return [self.mocks.member(f'⬡-Drone #{i:04}', id=int(f'1{i:017}'), name=f'Drone-{i:04}', roles=[roles.DRONE]) for i in range(count)]
+
+    @connect()
+    async def insert_drones(self, discord_ids: List[int], **kwargs) -> None:
+        await Drone.insert_many([Drone(discord_id=id, drone_id=f'{i:04}', battery_minutes=480, **kwargs) for i, id in enumerate(discord_ids)])
+
+    @connect()
+    async def run_command(self, bot: Bot, message: MagicMock) -> None:
+        '''
+        Run a command in its own execution context, as on_message() does.
+        '''
+
+        context = await bot.get_context(message)
+        context.reply = AsyncMock()
+        context.send = AsyncMock()
+
+        await bot.invoke(context)
+
+    async def test_drone_message(self) -> None:
+        '''
+        A battery powered drone's message goes through every message listener and is reposted with its battery indicator.
+        '''
+
+        async with QueryBudget(self.mocks) as budget:
+            member, = self.drone_members(1)
+            member.roles.append(self.mocks.role(roles.BATTERY_POWERED))
+            await self.insert_drones([member.id], is_battery_powered=True)
+            message = self.mocks.message(member, 'general', 'Beep boop.')
+
+            with patch('main.bot') as bot, patch.object(RecordCache, 'self_check', False):
+                bot.user.id = 1
+                bot.process_commands = AsyncMock()
+
+                budget.reset()
+                await main.on_message(message)
+
+                self.assertLessEqual(budget.statements(), 5)
+                self.assertLessEqual(budget.discord_calls(), 2)
+
+                # Once the drone is cached, its later messages do not read it from the database.
+                budget.reset()
+                await main.on_message(message)
+
+                self.assertLessEqual(budget.statements(), 1)
+
+    async def test_associate_message(self) -> None:
+        '''
+        An associate's message goes through every message listener without querying the database for a drone.
+        '''
+
+        async with QueryBudget(self.mocks) as budget:
+            await self.insert_drones([member.id for member in self.drone_members(10)])
+            await connect()(Drone.load_discord_ids)()
+            message = self.mocks.message(self.mocks.member('Associate'), 'general', 'Hello.')
+
+            with patch('main.bot') as bot, patch.object(RecordCache, 'self_check', False):
+                bot.user.id = 1
+                bot.process_commands = AsyncMock()
+
+                budget.reset()
+                await main.on_message(message)
+
+                self.assertEqual(0, budget.statements())
+
+    @patch('src.drone_member.MemberConverter')
+    async def test_toggle_commands(self, MemberConverter: MagicMock) -> None:
+        '''
+        Toggling a mode on ten drones at once takes a few statements and Discord calls per drone.
+        '''
+
+        # Leave DroneMember.convert() to find the drones by drone ID.
+        MemberConverter.return_value.convert = AsyncMock(side_effect=MemberNotFound(''))
+
+        async with QueryBudget(self.mocks) as budget:
+            members = self.drone_members(10)
+            await self.insert_drones([member.id for member in members])
+
+            bot = self.mocks.get_bot()
+            bot.add_cog(DroneConfigurationCog())
+            drone_ids = ' '.join(f'{i:04}' for i in range(len(members)))
+
+            for name in ['toggle_id_prepending', 'toggle_speech_optimization', 'toggle_enforce_identity']:
+                with self.subTest(command=name):
+                    budget.reset()
+
+                    await self.run_command(bot, self.mocks.command(self.mocks.hive_mxtress(), 'general', f'{name} {drone_ids}'))
+
+                    self.assertLessEqual(budget.statements(), 3 * len(members) + 2)
+                    self.assertLessEqual(budget.discord_calls(), 3 * len(members) + 2)
+
+    async def test_minute_tasks(self) -> None:
+        '''
+        Each every-minute sweep over a thousand drones takes a fixed number of statements, plus a few per elapsed item.
+        '''
+
+        async with QueryBudget(self.mocks) as budget:
+            # Only the drones with something elapsed need their own member, the rest can share one.
+            members = self.drone_members(2 * ELAPSED)
+            bystander = self.mocks.member('Bystander', roles=[roles.DRONE])
+            discord_ids = [member.id for member in members] + [int(f'2{i:017}') for i in range(SWEEP_DRONES - len(members))]
+            self.mocks.get_guild()._members.update(dict.fromkeys(discord_ids[len(members):], bystander))
+
+            await self.insert_drones(discord_ids)
+
+            @connect()
+            async def add_elapsed() -> None:
+                past = datetime.now() - timedelta(minutes=1)
+
+                for member in members[:ELAPSED]:
+                    await Timer(str(uuid4()), member.id, 'optimized', past).insert()
+
+                for member in members[ELAPSED:]:
+                    await Storage(str(uuid4()), None, member.id, 'testing', [roles.DRONE], past).insert()
+
+            await add_elapsed()
+            bot = self.mocks.get_bot()
+
+            for task in main.minute_tasks:
+                cog = main.bot.get_cog(type(task._injected).__name__)
+
+                with self.subTest(task=task.coro.__name__), patch.object(cog, 'bot', bot), patch.object(battery_ledger, 'pending', {}):
+                    budget.reset()
+
+                    await start_and_await_loop(task)
+
+                    self.assertLessEqual(budget.statements(), 12 + 3 * ELAPSED)
+                    self.assertLessEqual(budget.discord_calls(), 2 * ELAPSED)
@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, Mock
 from src.roles import DRONE, ASSOCIATE
 
 import src.ai.react as react
+from test.mocks import Mocks
 
 
 GOOD_DRONE_EMOTE = Mock()
@@ -117,10 +118,7 @@ class ReactTest(unittest.IsolatedAsyncioTestCase):
         reaction.emoji = '🗑️'
         reaction.message = message
 
-        member = AsyncMock()
-        member.id = 123456789
-        member.display_name = '⬡-Drone #9813'
-        member.roles = [DRONE_ROLE]
+        member = Mocks().member('⬡-Drone #9813', id=123456789, roles=[DRONE])
 
         # run
         await react.delete_marked_message(reaction, member)
@@ -139,10 +137,7 @@ class ReactTest(unittest.IsolatedAsyncioTestCase):
         reaction.emoji = '🗑️'
         reaction.message = message
 
-        member = AsyncMock()
-        member.id = 123456789
-        member.display_name = '⬢-Drone #9813'
-        member.roles = [DRONE_ROLE]
+        member = Mocks().member('⬢-Drone #9813', id=123456789, roles=[DRONE])
 
         # run
         await react.delete_marked_message(reaction, member)
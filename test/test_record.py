@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from datetime import datetime
-from src.db.record import Record
+from src.db.codec import Epoch
+from src.db.record import Record, Relation
 from typing import Any, List
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, patch
@@ -26,10 +27,37 @@ class RecordTestbed(Record):
     h: List[str]
     i: bool
     j: bool | None
+    k: Epoch | None = None
 
     ignored = 1
 
 
+@dataclass
+class RelatedTestbed(Record):
+    '''
+    A record that is loaded along with another.
+    '''
+
+    table = 'related_table'
+
+    id: str
+    owner_id: int
+
+
+@dataclass
+class OwnerTestbed(Record):
+    '''
+    A record with an embedded related record.
+    '''
+
+    table = 'owner_table'
+    ignore_properties = ['related']
+    relations = [Relation('related', RelatedTestbed, 'id', 'owner_id')]
+
+    id: int
+    related: RelatedTestbed | None = None
+
+
 class UnsupportedData(Record):
     '''
     An invalid record: The data type is not supported.
@@ -124,6 +152,36 @@ class TestRecord(IsolatedAsyncioTestCase):
         self.assertTrue(result['i'])
         self.assertIsNone(result['j'])
 
+    def test_epoch(self) -> None:
+        '''
+        Ensure that epoch datetimes are stored as whole seconds since the Unix epoch.
+        '''
+
+        timestamp = datetime.fromisoformat('2000-01-02 03:04:05')
+
+        result = RecordTestbed.serialize({'k': timestamp.replace(microsecond=123456)})
+
+        self.assertEqual(result['k'], int(timestamp.timestamp()))
+        self.assertEqual({'k': timestamp}, RecordTestbed.deserialize({'k': result['k']}))
+        self.assertIsNone(RecordTestbed.serialize({'k': None})['k'])
+
+    def test_get_changes(self) -> None:
+        '''
+        Ensure that only the columns changed since the record was marked as saved are reported.
+        '''
+
+        record = RelatedTestbed('a', 1)
+
+        self.assertEqual({'id': 'a', 'owner_id': '1'}, record.get_changes())
+
+        record.mark_saved()
+        self.assertEqual({}, record.get_changes())
+
+        record.owner_id = 2
+        record.id = 'b'
+        self.assertEqual({'id': 'b', 'owner_id': '2'}, record.get_changes())
+        self.assertEqual('a', record.get_saved_id())
+
     def test_serialize_empty_list(self) -> None:
         data: dict[str, Any] = {
             'g': [],
@@ -230,23 +288,23 @@ class TestRecord(IsolatedAsyncioTestCase):
         self.assertEqual(result.g, [])
         self.assertEqual(result.h, [])
 
-    @patch('src.db.record.fetchone', new_callable=AsyncMock)
-    async def test_load_missing(self, fetchone: AsyncMock) -> None:
-        fetchone.return_value = None
+    @patch('src.db.record.fetchrows', new_callable=AsyncMock)
+    async def test_load_missing(self, fetchrows: AsyncMock) -> None:
+        fetchrows.return_value = (('a',), [])
 
         with self.assertRaisesRegex(Exception, 'Failed to find record in test_table where a = 1'):
             await RecordTestbed.load(1)
 
-    @patch('src.db.record.fetchone', new_callable=AsyncMock)
-    async def test_find_missing(self, fetchone: AsyncMock) -> None:
-        fetchone.return_value = None
+    @patch('src.db.record.fetchrows', new_callable=AsyncMock)
+    async def test_find_missing(self, fetchrows: AsyncMock) -> None:
+        fetchrows.return_value = (('a',), [])
 
         record = await RecordTestbed.find(1)
 
         self.assertIsNone(record)
 
-    @patch('src.db.record.fetchone', new_callable=AsyncMock)
-    async def test_load(self, fetchone: AsyncMock) -> None:
+    @patch('src.db.record.fetchrows', new_callable=AsyncMock)
+    async def test_load(self, fetchrows: AsyncMock) -> None:
         timestamp = '2000-01-02 03:04:05'
 
         data: dict[str, Any] = {
@@ -262,7 +320,7 @@ class TestRecord(IsolatedAsyncioTestCase):
             'j': None,
         }
 
-        fetchone.return_value = data
+        fetchrows.return_value = (tuple(data.keys()), [tuple(data.values())])
 
         record = await RecordTestbed.load(1)
 
@@ -291,3 +349,131 @@ class TestRecord(IsolatedAsyncioTestCase):
         await record.delete()
 
         change.assert_called_once_with('DELETE FROM test_table WHERE a = :id', {'id': '1'})
+
+    def test_build_joined_select(self) -> None:
+        '''
+        Ensure that related records are left joined on with aliased columns.
+        '''
+
+        self.assertEqual(
+            'SELECT owner_table.id, "related".id AS "related.id", "related".owner_id AS "related.owner_id" '
+            'FROM owner_table LEFT JOIN related_table AS "related" ON "related".owner_id = owner_table.id',
+            OwnerTestbed.build_joined_select()
+        )
+
+    def test_from_joined_row(self) -> None:
+        '''
+        Ensure that a joined row is split into the record and its related record.
+        '''
+
+        record = OwnerTestbed.from_joined_row(('1', 'a', '1'))
+
+        self.assertEqual(1, record.id)
+        self.assertEqual(RelatedTestbed('a', 1), record.related)
+
+    def test_from_joined_row_missing_relation(self) -> None:
+        '''
+        Ensure that the related record is None if the join found nothing.
+        '''
+
+        record = OwnerTestbed.from_joined_row(('1', None, None))
+
+        self.assertEqual(1, record.id)
+        self.assertIsNone(record.related)
+
+    @patch('src.db.record.fetchrows', new_callable=AsyncMock)
+    async def test_select_with_relations(self, fetchrows: AsyncMock) -> None:
+        '''
+        Ensure that a record matched by several related rows is only returned once.
+        '''
+
+        fetchrows.return_value = (('id', 'related.id', 'related.owner_id'), [
+            ('1', 'a', '1'),
+            ('1', 'b', '1'),
+            ('2', None, None),
+        ])
+
+        records = await OwnerTestbed.select_with_relations('owner_table.id > :id', {'id': 0})
+
+        fetchrows.assert_called_once_with(OwnerTestbed.build_joined_select() + ' WHERE owner_table.id > :id ORDER BY owner_table.id', {'id': 0})
+        self.assertEqual([1, 2], [record.id for record in records])
+        self.assertEqual('a', records[0].related.id)
+        self.assertIsNone(records[1].related)
+
+    @patch('src.db.record.fetchrows', new_callable=AsyncMock)
+    async def test_select_without_relations(self, fetchrows: AsyncMock) -> None:
+        '''
+        Ensure that records can be selected without their related records, and have them loaded later.
+        '''
+
+        fetchrows.return_value = (('id',), [('1',), ('2',)])
+
+        records = await OwnerTestbed.select_without_relations('owner_table.id > :id', {'id': 0})
+
+        fetchrows.assert_called_once_with('SELECT * FROM owner_table WHERE owner_table.id > :id ORDER BY owner_table.id', {'id': 0})
+        self.assertEqual([1, 2], [record.id for record in records])
+        self.assertFalse(any(record.relations_loaded for record in records))
+
+        fetchrows.reset_mock()
+        fetchrows.return_value = (('id', 'related.id', 'related.owner_id'), [('1', 'a', '1')])
+
+        await OwnerTestbed.load_relations(records)
+        await OwnerTestbed.load_relations(records)
+
+        fetchrows.assert_called_once_with(OwnerTestbed.build_joined_select() + ' WHERE owner_table.id IN (:id0, :id1) ORDER BY owner_table.id', {'id0': 1, 'id1': 2})
+        self.assertEqual('a', records[0].related.id)
+        self.assertIsNone(records[1].related)
+        self.assertTrue(all(record.relations_loaded for record in records))
+
+    @patch('src.db.record.fetchrows', new_callable=AsyncMock)
+    async def test_load_many(self, fetchrows: AsyncMock) -> None:
+        '''
+        Ensure that records are selected together and returned in the order requested.
+        '''
+
+        fetchrows.side_effect = [
+            (('id',), [('1',), ('2',)]),
+            (('id', 'owner_id'), [('a', '2')]),
+        ]
+
+        records = await OwnerTestbed.load_many([2, 3, 1, 2])
+
+        fetchrows.assert_any_call('SELECT * FROM owner_table WHERE id IN (?, ?, ?) ORDER BY id', [2, 3, 1])
+        fetchrows.assert_any_call('SELECT * FROM related_table WHERE owner_id IN (?, ?) ORDER BY id', [1, 2])
+        self.assertEqual([2, 1, 2], [record.id for record in records])
+        self.assertIsNone(records[1].related)
+        self.assertEqual('a', records[0].related.id)
+
+    @patch('src.db.record.BATCH_SIZE', 2)
+    @patch('src.db.record.fetchrows', new_callable=AsyncMock)
+    async def test_fetch_where_in_batches(self, fetchrows: AsyncMock) -> None:
+        '''
+        Ensure that long lists of values are split into several queries.
+        '''
+
+        fetchrows.side_effect = [(('id',), [('1',), ('2',)]), (('id',), [('3',)])]
+
+        columns, rows = await OwnerTestbed.fetch_where_in('id', [1, 2, 3])
+
+        self.assertEqual(2, fetchrows.call_count)
+        fetchrows.assert_called_with('SELECT * FROM owner_table WHERE id IN (?) ORDER BY id', [3])
+        self.assertEqual(('id',), columns)
+        self.assertEqual(3, len(rows))
+
+    def test_codec_compiled(self) -> None:
+        '''
+        Ensure that each record class has its own codec, and that row decoders are reused.
+        '''
+
+        self.assertIsNot(OwnerTestbed.codec, RelatedTestbed.codec)
+        self.assertEqual(['id', 'owner_id'], RelatedTestbed.codec.columns)
+        self.assertIs(RelatedTestbed.codec.row_decoder(('id', 'owner_id')), RelatedTestbed.codec.row_decoder(('id', 'owner_id')))
+
+    def test_row_decoder(self) -> None:
+        '''
+        Ensure that tuple rows are decoded in the order of the columns given.
+        '''
+
+        decode = RecordTestbed.codec.row_decoder(('g', 'a', 'b', 'i'))
+
+        self.assertEqual({'g': [1, 2], 'a': 1, 'b': None, 'i': False}, decode(('1|2', '1', None, 0)))
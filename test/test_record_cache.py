@@ -0,0 +1,183 @@
+from src.db.data_objects import BatteryType, Drone
+from src.db.record_cache import CacheChanges, RecordCache
+from unittest import TestCase
+
+
+def drone(discord_id: int, drone_id: str, **kwargs) -> Drone:
+    return Drone(discord_id=discord_id, drone_id=drone_id, **kwargs)
+
+
+class TestRecordCache(TestCase):
+
+    def test_get(self) -> None:
+        '''
+        Ensure that records are returned by any of their identity columns, as copies, and that hits and misses are counted.
+        '''
+
+        cache = RecordCache('test', ['discord_id', 'drone_id'])
+        record = drone(1, '0001', trusted_users=[2])
+        cache.put(record)
+
+        copy = cache.get('discord_id', '1')
+        self.assertEqual(record, copy)
+        self.assertIsNot(record, copy)
+        self.assertIsNot(record.trusted_users, copy.trusted_users)
+        self.assertEqual(record, cache.get('drone_id', '0001'))
+        self.assertIsNone(cache.get('discord_id', 2))
+        self.assertIsNone(cache.get('drone_id', '0002'))
+
+        self.assertEqual(2, cache.stats.hits)
+        self.assertEqual(2, cache.stats.misses)
+
+    def test_eviction(self) -> None:
+        '''
+        Ensure that the least recently used record is evicted when the cache is full.
+        '''
+
+        cache = RecordCache('test', ['discord_id', 'drone_id'], size=2)
+        cache.put(drone(1, '0001'))
+        cache.put(drone(2, '0002'))
+        cache.get('discord_id', 1)
+        cache.put(drone(3, '0003'))
+
+        self.assertIsNotNone(cache.get('discord_id', 1))
+        self.assertIsNone(cache.get('drone_id', '0002'))
+        self.assertIsNotNone(cache.get('drone_id', '0003'))
+        self.assertEqual(1, cache.stats.evictions)
+
+    def test_add_after_change(self) -> None:
+        '''
+        Ensure that a record loaded before the cache changed is not added, because it may be out of date.
+        '''
+
+        cache = RecordCache('test', ['discord_id', 'drone_id'])
+        generation = cache.generation
+        cache.discard('discord_id', 1)
+        cache.add(drone(1, '0001'), generation)
+
+        self.assertIsNone(cache.get('discord_id', 1))
+
+    def test_update(self) -> None:
+        '''
+        Ensure that written values replace the cached ones, including renames, while related records are kept.
+        '''
+
+        cache = RecordCache('test', ['discord_id', 'drone_id'])
+        battery_type = BatteryType(1, 'Low', 240, 60)
+        cache.put(drone(1, '0001', battery_type_id=1, battery_type=battery_type))
+
+        cache.update('1', RecordCache.values(drone(1, '0002', battery_type_id=1, glitched=True)))
+
+        updated = cache.get('drone_id', '0002')
+        self.assertTrue(updated.glitched)
+        self.assertEqual(battery_type, updated.battery_type)
+        self.assertIsNone(cache.get('drone_id', '0001'))
+
+        # A changed battery type means the related record must be loaded again.
+        cache.update('1', RecordCache.values(drone(1, '0002', battery_type_id=2)))
+
+        self.assertIsNone(cache.get('discord_id', 1))
+
+    def test_keys(self) -> None:
+        '''
+        Ensure that once the primary keys are loaded, records that do not exist are known to be absent.
+        '''
+
+        cache = RecordCache('test', ['discord_id', 'drone_id'])
+        self.assertFalse(cache.absent(1))
+
+        self.assertTrue(cache.load_keys(['1', 2], cache.generation))
+        self.assertFalse(cache.absent(1))
+        self.assertFalse(cache.absent('2'))
+        self.assertTrue(cache.absent(3))
+        self.assertEqual(1, cache.stats.absent)
+
+        cache.set_exists('3', True)
+        cache.set_exists('1', False)
+        self.assertFalse(cache.absent(3))
+        self.assertTrue(cache.absent(1))
+
+        # Keys selected before a record was inserted or deleted may be out of date.
+        generation = cache.generation
+        cache.set_exists('4', True)
+        self.assertFalse(cache.load_keys([], generation))
+        self.assertFalse(cache.absent(4))
+
+        cache.clear()
+        self.assertIsNone(cache.keys)
+
+
+class TestCacheChanges(TestCase):
+
+    def setUp(self) -> None:
+        self.cache = RecordCache('test', ['discord_id', 'drone_id'])
+        self.cache.put(drone(1, '0001'))
+        self.cache.put(drone(2, '0002'))
+
+    def test_apply(self) -> None:
+        '''
+        Ensure that changes reach the cache only when they are applied.
+        '''
+
+        changes = CacheChanges()
+        changes.write(self.cache, drone(1, '0001', glitched=True), exists=True)
+        changes.write(self.cache, drone(2, '0002'), exists=False)
+        changes.write(self.cache, drone(3, '0003'), exists=True)
+
+        self.assertFalse(changes.empty())
+        self.assertFalse(self.cache.get('discord_id', 1).glitched)
+        self.assertIsNotNone(self.cache.get('discord_id', 2))
+
+        changes.apply()
+
+        self.assertTrue(changes.empty())
+        self.assertTrue(self.cache.get('discord_id', 1).glitched)
+        self.assertIsNone(self.cache.get('discord_id', 2))
+        self.assertIsNone(self.cache.get('discord_id', 3))
+
+    def test_apply_keys(self) -> None:
+        '''
+        Ensure that inserted and deleted records change the known primary keys only when they are applied.
+        '''
+
+        self.cache.load_keys([1, 2], self.cache.generation)
+        changes = CacheChanges()
+        changes.write(self.cache, drone(2, '0002'), exists=False)
+        changes.write(self.cache, drone(3, '0003'), exists=True)
+
+        self.assertFalse(self.cache.absent(2))
+        self.assertTrue(self.cache.absent(3))
+
+        changes.apply()
+
+        self.assertTrue(self.cache.absent(2))
+        self.assertFalse(self.cache.absent(3))
+
+    def test_copy_when_written(self) -> None:
+        '''
+        Ensure that the values written are cached, not any later unsaved changes.
+        '''
+
+        record = drone(1, '0001', glitched=True)
+        changes = CacheChanges()
+        changes.write(self.cache, record, exists=True)
+        record.optimized = True
+        changes.apply()
+
+        self.assertTrue(self.cache.get('discord_id', 1).glitched)
+        self.assertFalse(self.cache.get('discord_id', 1).optimized)
+
+    def test_forgotten(self) -> None:
+        '''
+        Ensure that a forgotten record is removed even if it is written afterwards, and whichever column it is forgotten by.
+        '''
+
+        changes = CacheChanges()
+        changes.forget(self.cache, 'drone_id', '0001')
+        changes.write(self.cache, drone(1, '0001', glitched=True), exists=True)
+        changes.write(self.cache, drone(2, '0002', glitched=True), exists=True)
+        changes.forget(self.cache, 'discord_id', 2)
+        changes.apply()
+
+        self.assertIsNone(self.cache.get('discord_id', 1))
+        self.assertIsNone(self.cache.get('discord_id', 2))
@@ -0,0 +1,56 @@
+from unittest import IsolatedAsyncioTestCase
+from src.roles import DRONE, fetch_role, forget_roles, get_role, has_any_role, has_role, HIVE_MXTRESS, MODERATION_ROLES, role_indexes
+from test.mocks import Mocks
+
+
+class TestRoles(IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.mocks = Mocks()
+        self.guild = self.mocks.get_guild()
+
+    def test_get_role(self) -> None:
+        '''
+        Ensure that roles are found by name from the guild's index, and that the index is rebuilt once forgotten.
+        '''
+
+        drone_role = self.mocks.role(DRONE)
+
+        self.assertIs(drone_role, get_role(self.guild, DRONE))
+        self.assertIsNone(get_role(self.guild, 'No such role'))
+
+        with self.assertRaises(Exception):
+            fetch_role(self.guild, 'No such role')
+
+        # The index is not rebuilt until the guild's roles change.
+        renamed = self.guild.roles[0]
+        old_name = renamed.name
+        renamed.name = 'Renamed'
+        self.assertIs(renamed, get_role(self.guild, old_name))
+
+        forget_roles(self.guild)
+        self.assertIs(renamed, fetch_role(self.guild, 'Renamed'))
+        self.assertIsNone(get_role(self.guild, old_name))
+
+    def test_replaced_guild(self) -> None:
+        '''
+        Ensure that a guild object that replaces another with the same ID is indexed afresh.
+        '''
+
+        other = Mocks().get_guild()
+        role_indexes[other.id] = (self.guild, {})
+
+        self.assertIsNotNone(get_role(other, DRONE))
+
+    def test_has_role(self) -> None:
+        '''
+        Ensure that a member has only the roles that they have been given.
+        '''
+
+        member = self.mocks.member(roles=[DRONE])
+
+        self.assertTrue(has_role(member, DRONE))
+        self.assertFalse(has_role(member, HIVE_MXTRESS))
+        self.assertFalse(has_role(member, 'No such role'))
+        self.assertFalse(has_any_role(member, MODERATION_ROLES))
+        self.assertTrue(has_any_role(self.mocks.hive_mxtress(), MODERATION_ROLES))
@@ -1,6 +1,12 @@
 import unittest
 from unittest.mock import AsyncMock, Mock, patch
-from src.ai.status import read_version, get_list_of_commands, get_list_of_listeners, report_status
+from src.ai.status import read_version, get_cache_report, get_database_report, get_list_of_commands, get_list_of_listeners, get_listener_report, report_status
+from src.db.database import SchedulerStats
+from src.db.identity_map import IdentityMapStats
+from src.db.record_cache import RecordCache, RecordCacheStats
+from src.db.pool import ConnectionPool, PoolStats
+from src.listeners import ListenerTable
+from src.webhook import WebhookCacheStats, WebhookPool
 
 
 class TestStatus(unittest.IsolatedAsyncioTestCase):
@@ -63,6 +69,55 @@ class TestStatus(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(['listener1', 'listener2'], listeners)
 
+    def test_get_listener_report(self):
+        '''
+        Ensure that the listener report gives how often each listener in a ListenerTable was run and skipped, busiest first.
+        '''
+
+        table = Mock(spec=ListenerTable)
+        table.stats.return_value = {'quiet': (1, 9), 'busy': (10, 0)}
+
+        self.assertEqual('busy: 10 run, 0 skipped\nquiet: 1 run, 9 skipped', get_listener_report(table))
+        self.assertEqual('Not counted.', get_listener_report([Mock()]))
+
+    @patch('src.ai.status.db_scheduler')
+    @patch('src.ai.status.query_tracer')
+    def test_get_database_report(self, query_tracer, db_scheduler):
+        '''
+        Ensure that the database report includes the connection pools' and scheduler's metrics as well as the statements executed.
+        '''
+
+        pool = Mock(spec=ConnectionPool)
+        pool.stats.return_value = PoolStats(size=3, idle=2, waiting=0, acquisitions=100, waits=4, total_wait_time=0.05, max_wait_time=0.02)
+        query_tracer.report.return_value = []
+        db_scheduler.stats.return_value = SchedulerStats(readers=1, writing=False, waiting_writers=0, reads=50, read_only=40, writes=10,
+                                                         write_waits=2, conflicts=1, total_write_wait=0.01, max_write_wait=0.008)
+
+        with patch.dict('src.ai.status.backends', {'ai.db': pool}, clear=True):
+            report = get_database_report()
+
+        self.assertEqual('ai.db pool: 3 connections (2 idle, 0 waiting), 4/100 acquisitions waited 50 ms (max 20.0 ms)\n'
+                         'scheduler: 50 contexts (40 read only), 10 writes, 2 queued 10 ms (max 8.0 ms), 1 conflicts\n'
+                         'No statements executed.', report)
+
+    @patch('src.ai.status.webhook_stats', WebhookCacheStats(hits=40, misses=2, created=3))
+    @patch('src.db.identity_map.totals', IdentityMapStats(hits=30, misses=10))
+    def test_get_cache_report(self):
+        '''
+        Ensure that the cache report gives the hits and misses of the identity maps, of each record cache and of the webhook cache.
+        '''
+
+        cache = Mock(spec=RecordCache, records={'1': Mock()}, size=100, stats=RecordCacheStats(hits=5, misses=2, evictions=1, absent=3))
+
+        pools = {1: WebhookPool([Mock(), Mock()]), 2: WebhookPool([Mock()])}
+
+        with patch.dict('src.db.record_cache.caches', {'drone': cache}, clear=True), patch.dict('src.ai.status.webhook_pools', pools, clear=True):
+            report = get_cache_report()
+
+        self.assertEqual('identity map: 30 hits, 10 misses\n'
+                         'drone cache: 1/100 records, 5 hits, 2 misses, 3 known absent, 1 evictions\n'
+                         'webhooks: 3 in 2 channels, 40 hits, 2 misses, 3 created', report)
+
     @patch("src.ai.status.Path")
     async def test_report_status(self, Path):
         Path.return_value.read_text.return_value = 'refs/heads/v1.2.3'
@@ -78,9 +133,9 @@ class TestStatus(unittest.IsolatedAsyncioTestCase):
         # The status should send an embed.
         context.send.assert_called_once()
 
-        # The embed should contain three fields.
+        # The embed should contain six fields.
         embed = context.send.call_args.kwargs['embed']
-        self.assertEqual(3, len(embed.fields))
+        self.assertEqual(6, len(embed.fields))
 
         # Ensure that the version was set correctly.
         self.assertEqual('refs/heads/v1.2.3', embed.fields[0].value)
@@ -90,3 +145,8 @@ class TestStatus(unittest.IsolatedAsyncioTestCase):
 
         # Ensure that the listener list was set correctly.
         self.assertEqual("['listener']", embed.fields[2].value)
+
+        # Ensure that the listener runs, the database statements and the caches were reported.
+        self.assertEqual('message listener runs', embed.fields[3].name)
+        self.assertEqual('database statements', embed.fields[4].name)
+        self.assertEqual('caches', embed.fields[5].name)
@@ -143,7 +143,7 @@ class StorageTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(inserted[4], [roles.DRONE, roles.DEVELOPMENT])
 
         if fixed_now is not None:
-            self.assertEqual(inserted[5], str(fixed_now + timedelta(hours=8.45)))
+            self.assertEqual(inserted[5], fixed_now + timedelta(hours=8.45))
 
     @patch('src.ai.storage.datetime')
     @patch('src.ai.storage.DroneMember')
@@ -310,17 +310,22 @@ class StorageTest(unittest.IsolatedAsyncioTestCase):
         '''
 
         storage = self.mocks.storage(release_time=datetime.now() + timedelta(hours=4), roles=[roles.DRONE, roles.DEVELOPMENT])
+        other_storage = self.mocks.storage(release_time=datetime.now() + timedelta(hours=4), roles=[roles.DRONE])
         stored = self.mocks.member('Stored Drone')
-        Storage.all_elapsed = AsyncMock(return_value=[storage])
+        other_stored = self.mocks.member('Other Stored Drone')
+        Storage.all_elapsed = AsyncMock(return_value=[storage, other_storage])
         cog = self.mocks.get_cog()
 
-        DroneMember.load.side_effect = [stored]
+        DroneMember.load.side_effect = [stored, other_stored]
 
         await start_and_await_loop(cog.release_timed)
 
+        # Each drone's storage record is deleted once its roles have been restored.
         storage.delete.assert_called_once()
+        other_storage.delete.assert_called_once()
         stored.remove_roles.assert_called_once_with(self.mocks.role(roles.STORED))
         stored.add_roles.assert_called_once_with(self.mocks.role(roles.DRONE), self.mocks.role(roles.DEVELOPMENT))
+        other_stored.add_roles.assert_called_once_with(self.mocks.role(roles.DRONE))
 
     async def test_release_unauthorized(self):
         '''
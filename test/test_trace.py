@@ -0,0 +1,71 @@
+from src.db.trace import EventTrace, fingerprint, QueryTracer, STATEMENT_BUDGET
+from src.log import LogContext
+from unittest import TestCase
+from unittest.mock import patch
+
+
+class TestTrace(TestCase):
+
+    def test_fingerprint(self) -> None:
+        '''
+        Ensure that statements that differ only in their values have the same fingerprint.
+        '''
+
+        self.assertEqual('SELECT * FROM drone WHERE discord_id IN (...) ORDER BY discord_id', fingerprint('SELECT * FROM drone\n  WHERE discord_id IN (?, ?, ?) ORDER BY discord_id'))
+        self.assertEqual('UPDATE drone SET glitched = ? WHERE drone_id = ?', fingerprint("UPDATE drone SET glitched = 1 WHERE drone_id = '0001'"))
+        self.assertEqual('SELECT * FROM drone2 WHERE discord_id = :value', fingerprint('SELECT * FROM drone2 WHERE discord_id = :value'))
+        self.assertEqual('SELECT * FROM storage WHERE target_id IN (...)', fingerprint('SELECT * FROM storage WHERE target_id IN (:id0, :id1, :id2)'))
+        self.assertEqual('SELECT * FROM storage WHERE target_id IN (...)', fingerprint('SELECT * FROM storage WHERE target_id IN (:id0)'))
+        self.assertEqual('SELECT * FROM storage WHERE target_id IN (...) AND id = ?', fingerprint('SELECT * FROM storage WHERE target_id IN (?1, ?2) AND id = ?3'))
+
+    def test_record(self) -> None:
+        '''
+        Ensure that an event's statements are grouped by fingerprint and by log context, without the context's arguments.
+        '''
+
+        trace = EventTrace('on_message')
+
+        with LogContext('on_message(from=someone, content=beep)'):
+            trace.record('SELECT * FROM drone WHERE discord_id = 1', 1, 0.5)
+
+            with LogContext('optimize_speech'):
+                trace.record('SELECT * FROM drone WHERE discord_id = 2', 0, 0.25)
+
+        self.assertEqual(2, trace.statements.count)
+        self.assertEqual(1, trace.statements.rows)
+        self.assertEqual(0.75, trace.statements.total_time)
+        self.assertEqual(0.5, trace.statements.max_time)
+        self.assertEqual(['SELECT * FROM drone WHERE discord_id = ?'], list(trace.by_fingerprint.keys()))
+        self.assertEqual(['on_message', 'on_message - optimize_speech'], list(trace.by_context.keys()))
+
+    @patch('src.db.trace.log')
+    def test_tracer(self, log) -> None:
+        '''
+        Ensure that finished events are added up, and that events over budget are logged and counted.
+        '''
+
+        tracer = QueryTracer()
+
+        small = EventTrace('on_message')
+        small.record('SELECT 1', 1, 0.001)
+        tracer.finish(small)
+
+        large = EventTrace('on_message')
+
+        for i in range(STATEMENT_BUDGET + 1):
+            large.record(f'SELECT * FROM drone WHERE discord_id = {i}', 1, 0.001)
+
+        tracer.finish(large)
+
+        stats = tracer.events['on_message']
+        self.assertEqual(2, stats.events)
+        self.assertEqual(STATEMENT_BUDGET + 2, stats.statements.count)
+        self.assertEqual(STATEMENT_BUDGET + 1, stats.max_statements)
+        self.assertEqual(1, stats.over_budget)
+        self.assertEqual(STATEMENT_BUDGET + 1, tracer.by_fingerprint['SELECT * FROM drone WHERE discord_id = ?'].count)
+        log.warning.assert_called_once()
+
+        report = tracer.report()
+
+        self.assertTrue(report[0].startswith('on_message: 2 runs'))
+        self.assertIn(f'{STATEMENT_BUDGET + 1}x', report[-2])
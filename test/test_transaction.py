@@ -1,4 +1,5 @@
 from src.db.transaction import Transaction
+from threading import current_thread
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import call, Mock
 from src.db.database import change, cursor, transactions
@@ -110,3 +111,85 @@ class TestTransaction(IsolatedAsyncioTestCase):
         ]
 
         self.cursor.execute.assert_has_calls(expected_calls)
+
+    async def test_async_transaction(self):
+        '''
+        Ensure that an asynchronous transaction nests and commits in the same way, on the database thread.
+        '''
+
+        threads = []
+        self.cursor.execute.side_effect = lambda *args: threads.append(current_thread().name)
+
+        async with Transaction():
+            await change('QUERY 1')
+
+            try:
+                async with Transaction():
+                    await change('QUERY 2')
+                    raise RuntimeError()
+            except RuntimeError:
+                pass
+
+        expected_calls = [
+            call('BEGIN TRANSACTION'),
+            call('QUERY 1', ()),
+            call('SAVEPOINT :id', {'id': 2}),
+            call('QUERY 2', ()),
+            call('ROLLBACK TO SAVEPOINT :id', {'id': 2}),
+            call('COMMIT TRANSACTION'),
+        ]
+
+        self.cursor.execute.assert_has_calls(expected_calls)
+        self.assertTrue(all(thread.startswith('database') for thread in threads))
+        self.assertEqual([], transactions.get())
+
+    async def test_lazy_transaction(self):
+        '''
+        Ensure that a lazy transaction issues nothing unless it is started, and then begins immediately.
+        '''
+
+        with Transaction(lazy=True):
+            await change('QUERY 1')
+
+        self.assertEqual([call('QUERY 1', ())], self.cursor.execute.call_args_list)
+
+        self.cursor.execute.reset_mock()
+        transaction = Transaction(lazy=True)
+
+        with transaction:
+            await change('QUERY 2')
+            transaction.start()
+            transaction.start()
+            await change('QUERY 3')
+
+        expected_calls = [
+            call('QUERY 2', ()),
+            call('BEGIN IMMEDIATE TRANSACTION'),
+            call('QUERY 3', ()),
+            call('COMMIT TRANSACTION'),
+        ]
+
+        self.assertEqual(expected_calls, self.cursor.execute.call_args_list)
+        self.assertEqual([], transactions.get())
+
+    async def test_nested_in_lazy_transaction(self):
+        '''
+        Ensure that a transaction nested in a lazy transaction starts it before making a savepoint.
+        '''
+
+        with Transaction(lazy=True):
+            await change('QUERY 1')
+
+            with Transaction():
+                await change('QUERY 2')
+
+        expected_calls = [
+            call('QUERY 1', ()),
+            call('BEGIN IMMEDIATE TRANSACTION'),
+            call('SAVEPOINT :id', {'id': 2}),
+            call('QUERY 2', ()),
+            call('RELEASE SAVEPOINT :id', {'id': 2}),
+            call('COMMIT TRANSACTION'),
+        ]
+
+        self.assertEqual(expected_calls, self.cursor.execute.call_args_list)
@@ -1,8 +1,8 @@
 import unittest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from discord import Message
 from src.ai.trusted_user import TrustedUserCog, TrustedUserRequest
-from src.db.drone_dao import remove_trusted_user_on_all
+from src.db.drone_dao import remove_trusted_user_on_all, remove_trusted_users_on_all
 from test.cog import cog
 from test.mocks import Mocks
 
@@ -137,15 +137,38 @@ class TrustedUserTest(unittest.IsolatedAsyncioTestCase):
 
         await self.assert_command_error(message, 'Can not remove the Hive Mxtress as a trusted user.')
 
-    @patch('src.db.drone_dao.fetchcolumn')
-    @patch('src.db.drone_dao.Drone', new_callable=AsyncMock)
-    async def test_remove_trusted_user_on_all(self, Drone: AsyncMock, fetchcolumn: AsyncMock):
+    @patch('src.db.drone_dao.forget')
+    @patch('src.db.drone_dao.change', new_callable=AsyncMock)
+    @patch('src.db.drone_dao.fetchcolumn', new_callable=AsyncMock)
+    async def test_remove_trusted_user_on_all(self, fetchcolumn: AsyncMock, change: AsyncMock, forget: Mock):
         user_id = 111112222233333
-        drone = self.mocks.drone('1234', trusted_users=[user_id])
-        fetchcolumn.return_value = [drone.discord_id]
-        Drone.load.return_value = drone
+        fetchcolumn.return_value = [1234]
 
         await remove_trusted_user_on_all(user_id)
 
-        self.assertEqual([], drone.trusted_users)
-        drone.save.assert_called_once()
+        change.assert_called_once_with('DELETE FROM drone_trusted_user WHERE trusted_user_id = :id', {'id': user_id})
+        forget.assert_called_once_with('drone', 'discord_id', 1234)
+
+    @patch('src.db.drone_dao.forget')
+    @patch('src.db.drone_dao.change', new_callable=AsyncMock)
+    @patch('src.db.drone_dao.fetchcolumn', new_callable=AsyncMock)
+    async def test_remove_trusted_users_on_all(self, fetchcolumn: AsyncMock, change: AsyncMock, forget: Mock):
+        fetchcolumn.return_value = [1234, 5678]
+
+        await remove_trusted_users_on_all([111, 222])
+
+        change.assert_called_once_with('DELETE FROM drone_trusted_user WHERE trusted_user_id IN (?, ?)', [111, 222])
+        forget.assert_any_call('drone', 'discord_id', 1234)
+        forget.assert_any_call('drone', 'discord_id', 5678)
+
+        # Nothing is done if there is no one to remove.
+        change.reset_mock()
+        await remove_trusted_users_on_all([])
+        change.assert_not_called()
+
+        # Long lists are removed in batches.
+        with patch('src.db.drone_dao.BATCH_SIZE', 2):
+            await remove_trusted_users_on_all([111, 222, 333])
+
+        change.assert_any_call('DELETE FROM drone_trusted_user WHERE trusted_user_id IN (?, ?)', [111, 222])
+        change.assert_any_call('DELETE FROM drone_trusted_user WHERE trusted_user_id IN (?)', [333])
@@ -1,4 +1,6 @@
-from src.webhook import webhook_if_message_altered
+from src.webhook import (forget_webhook, get_webhook_for_channel, proxy_message_by_webhook, refresh_webhooks, WEBHOOK_NAME,
+                         webhook_if_message_altered, webhook_pools, WEBHOOK_RATE_LIMIT, webhook_stats)
+import asyncio
 import unittest
 from unittest.mock import ANY, Mock, AsyncMock, patch
 from src.ai.data_objects import MessageCopy
@@ -6,6 +8,17 @@ import discord
 import io
 
 
+def ai_webhook(channel_id: int) -> AsyncMock:
+    '''
+    Create a mock webhook owned by the AI.
+    '''
+
+    webhook = AsyncMock(channel_id=channel_id)
+    webhook.name = WEBHOOK_NAME
+
+    return webhook
+
+
 class TestWebhook(unittest.IsolatedAsyncioTestCase):
 
     @patch("src.webhook.proxy_message_by_webhook")
@@ -210,3 +223,132 @@ class TestWebhook(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(send_webhook.call_args.kwargs['channel'], message_original.channel)
         self.assertEqual(send_webhook.call_args.kwargs['webhook'], None)
         self.assertEqual(send_webhook.call_args.kwargs['embed'].description, "[Reply to](pointing to original message): This message got replied to")
+
+    async def test_webhook_cached(self):
+        '''
+        A channel's webhooks should be looked up once, and looked up again once they have been forgotten.
+        '''
+
+        channel = AsyncMock(id=1001)
+        channel.webhooks.return_value = [ai_webhook(channel.id)]
+        hits = webhook_stats.hits
+        misses = webhook_stats.misses
+
+        self.assertIs(channel.webhooks.return_value[0], await get_webhook_for_channel(channel))
+        self.assertIs(channel.webhooks.return_value[0], await get_webhook_for_channel(channel))
+        channel.webhooks.assert_awaited_once()
+        self.assertEqual((hits + 1, misses + 1), (webhook_stats.hits, webhook_stats.misses))
+
+        channel.webhooks.return_value = [ai_webhook(channel.id)]
+        forget_webhook(channel.id)
+
+        self.assertIs(channel.webhooks.return_value[0], await get_webhook_for_channel(channel))
+        self.assertEqual(2, channel.webhooks.await_count)
+
+    async def test_only_ai_webhooks_used(self):
+        '''
+        Webhooks that the AI did not create should be left alone.
+        '''
+
+        channel = AsyncMock(id=1002)
+        channel.webhooks.return_value = [AsyncMock(channel_id=channel.id)]
+
+        self.assertIs(channel.create_webhook.return_value, await get_webhook_for_channel(channel))
+        channel.create_webhook.assert_awaited_once_with(name=WEBHOOK_NAME)
+
+    async def test_webhook_created_once(self):
+        '''
+        Concurrent lookups in a channel without a webhook should create a single webhook.
+        '''
+
+        channel = AsyncMock(id=1003)
+        channel.webhooks.return_value = []
+
+        webhooks = await asyncio.gather(*[get_webhook_for_channel(channel) for _ in range(5)])
+
+        channel.create_webhook.assert_awaited_once()
+        self.assertEqual([channel.create_webhook.return_value] * 5, webhooks)
+
+    async def test_pool_grows_with_load(self):
+        '''
+        Messages should be spread across more webhooks once each has used up its rate limit, up to the pool size.
+        '''
+
+        channel = AsyncMock(id=1004)
+        first = ai_webhook(channel.id)
+        channel.webhooks.return_value = [first]
+        channel.create_webhook.side_effect = lambda name: ai_webhook(channel.id)
+
+        for _ in range(WEBHOOK_RATE_LIMIT):
+            await proxy_message_by_webhook('Beep boop.', channel=channel)
+
+        self.assertEqual(WEBHOOK_RATE_LIMIT, first.send.await_count)
+        channel.create_webhook.assert_not_awaited()
+
+        # The next message goes through a new webhook, and the one after that through whichever is less loaded.
+        await proxy_message_by_webhook('Beep boop.', channel=channel)
+        await proxy_message_by_webhook('Beep boop.', channel=channel)
+
+        second = webhook_pools[channel.id].webhooks[1]
+        self.assertEqual(WEBHOOK_RATE_LIMIT, first.send.await_count)
+        self.assertEqual(2, second.send.await_count)
+
+        # The pool stops growing at its size, after which the least loaded webhook is used.
+        pool = webhook_pools[channel.id]
+        pool.size = 2
+
+        for _ in range(2 * WEBHOOK_RATE_LIMIT):
+            await proxy_message_by_webhook('Beep boop.', channel=channel)
+
+        self.assertEqual(2, len(pool.webhooks))
+        self.assertEqual(first.send.await_count + second.send.await_count, 3 * WEBHOOK_RATE_LIMIT + 2)
+        self.assertLessEqual(abs(first.send.await_count - second.send.await_count), 1)
+
+    async def test_deleted_webhook_replaced(self):
+        '''
+        A message sent through a webhook that has been deleted should be sent again through a new webhook.
+        '''
+
+        deleted = ai_webhook(1005)
+        deleted.send.side_effect = discord.NotFound(Mock(status=404, reason='Not Found'), 'Unknown Webhook')
+        replacement = ai_webhook(1005)
+
+        channel = AsyncMock(id=1005)
+        channel.webhooks.return_value = [deleted]
+        channel.create_webhook.return_value = replacement
+
+        self.assertIs(replacement.send.return_value, await proxy_message_by_webhook('Beep boop.', channel=channel))
+        replacement.send.assert_awaited_once()
+        self.assertEqual([replacement], webhook_pools[channel.id].webhooks)
+
+        # A webhook passed in by the caller is not replaced, but is still removed from the pool.
+        webhook_pools[channel.id].add(deleted)
+
+        with self.assertRaises(discord.NotFound):
+            await proxy_message_by_webhook('Beep boop.', webhook=deleted)
+
+        self.assertEqual([replacement], webhook_pools[channel.id].webhooks)
+
+    async def test_pool_refreshed(self):
+        '''
+        When a channel's webhooks are updated, only the webhooks that no longer exist should be removed from its pool.
+        '''
+
+        first = ai_webhook(1006)
+        second = ai_webhook(1006)
+
+        channel = AsyncMock(id=1006)
+        channel.webhooks.return_value = [first, second]
+
+        await get_webhook_for_channel(channel)
+        pool = webhook_pools[channel.id]
+
+        # An update caused by the pool's own webhooks leaves the pool as it is.
+        await refresh_webhooks(channel)
+        self.assertIs(pool, webhook_pools[channel.id])
+        self.assertEqual([first, second], pool.webhooks)
+
+        channel.webhooks.return_value = [second]
+        await refresh_webhooks(channel)
+        self.assertIs(pool, webhook_pools[channel.id])
+        self.assertEqual([second], pool.webhooks)